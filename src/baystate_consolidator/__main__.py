@@ -5,17 +5,247 @@ import os
 # Add src to path to allow direct execution
 sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
 
-from baystate_consolidator.main import run_consolidation
+from baystate_consolidator.main import (
+    analyze_blocking,
+    run_benchmarks,
+    run_consolidation,
+    train_model,
+)
+from baystate_consolidator.pipelines.blocking import parse_blocking_keys
+from baystate_consolidator.pipelines.fast_match import FAST_PATH_MAX_RECORDS
+from baystate_consolidator.stages.runner import STAGES
 
 
 def main():
     parser = argparse.ArgumentParser(description="BayState Consolidator Engine")
-    parser.add_argument("--limit", type=int, default=100, help="Number of products to process")
+    parser.add_argument(
+        "--limit",
+        type=int,
+        default=100,
+        help="Number of products to process (default: 100)",
+    )
+    parser.add_argument(
+        "--drain",
+        action="store_true",
+        help="Process every pending product, batch by batch, instead of --limit. Duplicates "
+        "in different batches are not linked to each other",
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=5000,
+        help="Source records per batch held in memory",
+    )
+    parser.add_argument(
+        "--cluster-store",
+        default=None,
+        help="Parquet file of previous cluster assignments; enables incremental linking",
+    )
+    parser.add_argument(
+        "--model-dir",
+        default=None,
+        help="Directory of trained Splink models; the latest version is used for prediction",
+    )
+    parser.add_argument(
+        "--blocking-keys",
+        type=parse_blocking_keys,
+        default=None,
+        help="Comma-separated blocking keys, '+' for composites "
+        "(e.g. brand+weight,brand+name_token,category)",
+    )
+    parser.add_argument(
+        "--max-block-comparisons",
+        type=int,
+        default=None,
+        help="Split or skip blocks that would generate more pairs than this",
+    )
+    parser.add_argument(
+        "--max-comparisons",
+        type=int,
+        default=None,
+        help="Pairs scored per batch across all blocking rules",
+    )
+    parser.add_argument(
+        "--lsh-bands",
+        type=int,
+        default=None,
+        help="Add MinHash-LSH blocking on names with this many bands (off by default)",
+    )
+    parser.add_argument("--lsh-rows", type=int, default=5, help="MinHash rows per LSH band")
+    parser.add_argument(
+        "--shard-key",
+        type=lambda spec: parse_blocking_keys(spec)[0],
+        default=None,
+        help="Partition each batch by this key ('+' for composites, e.g. brand+category) "
+        "and deduplicate the partitions in parallel processes",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Worker processes for --shard-key (default: one per CPU)",
+    )
+    parser.add_argument(
+        "--fast-path-max-records",
+        type=int,
+        default=FAST_PATH_MAX_RECORDS,
+        help="Match batches up to this size in-process instead of with Splink (0 disables)",
+    )
+    parser.add_argument(
+        "--source",
+        default="supabase",
+        help="Where pending products come from: 'supabase' (default) or 'file://<path>' "
+        "for a JSON/NDJSON/Parquet scrape dump or a directory of them",
+    )
+    parser.add_argument(
+        "--checkpoint-dir",
+        default=None,
+        help="Write each stage's output per batch as Parquet here, keyed by a hash of its "
+        "inputs and configuration (default with --resume/--from-stage: ./checkpoints)",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Load the checkpoint of every stage whose inputs and configuration are unchanged",
+    )
+    parser.add_argument(
+        "--from-stage",
+        choices=STAGES,
+        default=None,
+        help="Recompute this stage and every later one; earlier stages resume from checkpoints",
+    )
+    parser.add_argument(
+        "--checkpoint-max-age-days",
+        type=float,
+        default=None,
+        help="Before running, delete checkpoints not written or reused in this many days "
+        "(default: keep every checkpoint)",
+    )
+    parser.add_argument(
+        "--lineage-dir",
+        default=None,
+        help="Write each batch's field lineage (value, source, confidence, timestamp per "
+        "golden record field) here as a Parquet table",
+    )
+    parser.add_argument(
+        "--write-back",
+        action="store_true",
+        help="Upsert golden records and mark SKUs consolidated (default: dry run)",
+    )
+
+    subparsers = parser.add_subparsers(dest="command")
+    train_parser = subparsers.add_parser("train", help="Retrain the Splink model on a sample")
+    train_parser.add_argument(
+        "--sample-size", type=int, default=20000, help="Number of products to train on"
+    )
+    train_parser.add_argument(
+        "--max-pairs", type=int, default=1_000_000, help="Pairs sampled to estimate u"
+    )
+    analyze_parser = subparsers.add_parser(
+        "analyze-blocking", help="Report comparison counts and largest blocks per blocking key"
+    )
+    analyze_parser.add_argument(
+        "--sample-size", type=int, default=20000, help="Number of products to analyze"
+    )
+
+    benchmark_parser = subparsers.add_parser(
+        "benchmark", help="Time each stage on synthetic data (offline) and check for regressions"
+    )
+    benchmark_parser.add_argument(
+        "--sizes",
+        type=lambda spec: [int(size) for size in spec.split(",")],
+        default=[10_000, 100_000, 1_000_000],
+        help="Comma-separated source record counts (default: 10000,100000,1000000)",
+    )
+    benchmark_parser.add_argument(
+        "--baseline", default="./benchmarks/baseline.json", help="Stored baseline timings"
+    )
+    benchmark_parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.25,
+        help="Allowed slowdown / memory growth over the baseline (0.25 = 25%%)",
+    )
+    benchmark_parser.add_argument(
+        "--update-baseline", action="store_true", help="Record this run as the new baseline"
+    )
+    benchmark_parser.add_argument(
+        "--duplicate-rate",
+        type=float,
+        default=0.2,
+        help="Share of products listed under a second SKU",
+    )
+    benchmark_parser.add_argument("--seed", type=int, default=0, help="Data generator seed")
+    benchmark_parser.add_argument(
+        "--serialization",
+        action="store_true",
+        help="Also time golden record and lineage serialization",
+    )
+    benchmark_parser.add_argument(
+        "--match",
+        action="store_true",
+        help="Also report /match lookup latency (p50/p99) at each size",
+    )
 
     args = parser.parse_args()
 
-    print(f"Starting consolidation job (limit={args.limit})...")
-    run_consolidation(limit=args.limit)
+    if args.command == "train":
+        model_dir = args.model_dir or "./models"
+        print(f"Starting training job (sample_size={args.sample_size}, model_dir={model_dir})...")
+        train_model(
+            sample_size=args.sample_size,
+            model_dir=model_dir,
+            max_pairs=args.max_pairs,
+            source=args.source,
+        )
+        return
+
+    if args.command == "benchmark":
+        passed = run_benchmarks(
+            sizes=args.sizes,
+            baseline_path=args.baseline,
+            tolerance=args.tolerance,
+            update_baseline=args.update_baseline,
+            duplicate_rate=args.duplicate_rate,
+            seed=args.seed,
+            serialization=args.serialization,
+            match=args.match,
+        )
+        sys.exit(0 if passed else 1)
+
+    if args.command == "analyze-blocking":
+        analyze_blocking(
+            sample_size=args.sample_size, blocking_keys=args.blocking_keys, source=args.source
+        )
+        return
+
+    if args.write_back and args.cluster_store:
+        # Incremental runs only link records; they produce no golden records to write
+        parser.error("--write-back cannot be combined with --cluster-store")
+
+    limit = None if args.drain else args.limit
+    print(f"Starting consolidation job (limit={limit or 'all'}, batch_size={args.batch_size})...")
+    run_consolidation(
+        limit=limit,
+        batch_size=args.batch_size,
+        cluster_store=args.cluster_store,
+        model_dir=args.model_dir,
+        blocking_keys=args.blocking_keys,
+        max_block_comparisons=args.max_block_comparisons,
+        max_comparisons=args.max_comparisons,
+        lsh_bands=args.lsh_bands,
+        lsh_rows=args.lsh_rows,
+        write_back=args.write_back,
+        shard_key=args.shard_key,
+        workers=args.workers,
+        source=args.source,
+        fast_path_max_records=args.fast_path_max_records,
+        checkpoint_dir=args.checkpoint_dir,
+        resume=args.resume,
+        from_stage=args.from_stage,
+        lineage_dir=args.lineage_dir,
+        checkpoint_max_age_days=args.checkpoint_max_age_days,
+    )
 
 
 if __name__ == "__main__":
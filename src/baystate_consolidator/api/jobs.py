@@ -0,0 +1,275 @@
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import CancelledError, Future, ProcessPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from baystate_consolidator.utils.metrics import JOBS, REGISTRY, STAGE_SECONDS
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+CANCELLED = "cancelled"
+ACTIVE_STATUSES = (QUEUED, RUNNING)
+# Re-submitting one of these job_ids starts a new run; anything else returns the existing job
+RETRYABLE_STATUSES = (FAILED, CANCELLED)
+
+
+class QueueFullError(Exception):
+    pass
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class JobProgress:
+    """
+    Handle a job uses inside the worker process to report progress and stage timings.
+    Stage timings are also recorded in STAGE_SECONDS, which reaches the web process's
+    /metrics with the rest of the worker's metrics when the job finishes.
+    Cancellation is cooperative: it is checked whenever a stage starts or progress is set.
+    """
+
+    def __init__(self, job_id: str, shared: Any, cancel_flags: Any):
+        self.job_id = job_id
+        self._shared = shared
+        self._cancel_flags = cancel_flags
+
+    def _update(self, **changes):
+        # Manager dict proxies only see re-assigned values, not in-place mutation
+        state = dict(self._shared.get(self.job_id, {}))
+        state.update(changes)
+        self._shared[self.job_id] = state
+
+    def check_cancelled(self):
+        if self._cancel_flags.get(self.job_id):
+            raise JobCancelled(self.job_id)
+
+    def set(self, progress: float, message: Optional[str] = None):
+        self.check_cancelled()
+        self._update(progress=progress, message=message)
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        self.check_cancelled()
+        self._update(stage=name)
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - started
+            STAGE_SECONDS.observe(seconds, stage=name)
+            timings = dict(self._shared.get(self.job_id, {}).get("stage_timings", {}))
+            timings[name] = round(seconds, 3)
+            self._update(stage_timings=timings)
+
+
+def _run_in_worker(job_func: Callable, job_id: str, shared: Any, cancel_flags: Any) -> Any:
+    progress = JobProgress(job_id, shared, cancel_flags)
+    # Cancelled while it sat in the executor's call queue, where Future.cancel() cannot reach
+    progress.check_cancelled()
+    progress._update(status=RUNNING, started_at=time.time())
+    before = REGISTRY.snapshot()
+    try:
+        return job_func(job_id, progress)
+    finally:
+        # Worker metrics live in this process; the done callback merges them into the web one
+        progress._update(metrics=REGISTRY.changes_since(before))
+
+
+def _ready() -> bool:
+    return True
+
+
+class JobManager:
+    """
+    Runs consolidation jobs in a separate worker process pool, so CPU-heavy work never
+    shares the web process's threadpool with request handling. At most max_parallel_jobs
+    run at once and at most max_queued wait; submissions beyond that are rejected.
+    Submitting a job_id that is queued, running or already succeeded returns that job.
+    Each worker runs initializer (e.g. utils.warmup.warm_up) before taking any job.
+    Only the max_finished most recently finished jobs are kept; older ones are forgotten,
+    so get() no longer finds them and re-submitting their job_id starts a new run.
+    """
+
+    def __init__(
+        self,
+        job_func: Callable[[str, JobProgress], Any],
+        max_parallel_jobs: int = 2,
+        max_queued: int = 100,
+        initializer: Optional[Callable[[], Any]] = None,
+        max_finished: int = 1000,
+    ):
+        self.job_func = job_func
+        self.max_parallel_jobs = max_parallel_jobs
+        self.max_queued = max_queued
+        self.max_finished = max_finished
+        # spawn: the web process is multi-threaded, forking it is not safe
+        context = multiprocessing.get_context("spawn")
+        self._manager = context.Manager()
+        self._shared = self._manager.dict()
+        self._cancel_flags = self._manager.dict()
+        self._executor = ProcessPoolExecutor(
+            max_workers=max_parallel_jobs, mp_context=context, initializer=initializer
+        )
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._futures: Dict[str, Future] = {}
+        # Re-entrant: Future.cancel() runs the done callback, which takes the lock, inline
+        self._lock = threading.RLock()
+
+    def prewarm(self) -> List[Future]:
+        """
+        Starts every worker now instead of on first use, so their initializer runs while
+        the service is idle. The returned futures resolve once each worker is ready.
+        """
+        # Workers are spawned on demand, one per submission that finds none idle
+        return [self._executor.submit(_ready) for _ in range(self.max_parallel_jobs)]
+
+    def submit(self, job_id: str) -> Dict[str, Any]:
+        with self._lock:
+            existing = self._jobs.get(job_id)
+            if existing is not None and existing["status"] not in RETRYABLE_STATUSES:
+                return self._snapshot(job_id)
+
+            queued = sum(1 for job in self._jobs.values() if job["status"] == QUEUED)
+            running = sum(1 for job in self._jobs.values() if job["status"] == RUNNING)
+            if queued + running >= self.max_parallel_jobs + self.max_queued:
+                raise QueueFullError(f"Job queue is full ({self.max_queued} waiting)")
+
+            self._jobs[job_id] = {
+                "job_id": job_id,
+                "status": QUEUED,
+                "submitted_at": time.time(),
+                "started_at": None,
+                "finished_at": None,
+                "error": None,
+            }
+            self._shared[job_id] = {}
+            self._cancel_flags.pop(job_id, None)
+            future = self._executor.submit(
+                _run_in_worker, self.job_func, job_id, self._shared, self._cancel_flags
+            )
+            self._futures[job_id] = future
+        future.add_done_callback(lambda f: self._finished(job_id, f))
+        return self.get(job_id)
+
+    def _finished(self, job_id: str, future: Future):
+        with self._lock:
+            if self._futures.get(job_id) is not future:
+                # A later re-submission of the same job_id owns the record now
+                return
+            job = self._jobs[job_id]
+            job["finished_at"] = time.time()
+            try:
+                future.result()
+                job["status"] = SUCCEEDED
+            except (CancelledError, JobCancelled):
+                job["status"] = CANCELLED
+            except Exception as e:
+                job["status"] = FAILED
+                job["error"] = f"{type(e).__name__}: {e}"
+            try:
+                worker_metrics = dict(self._shared.get(job_id, {})).get("metrics", {})
+            except (OSError, EOFError):
+                # The manager process is already gone during shutdown
+                worker_metrics = {}
+            self._evict_finished()
+        JOBS.inc(status=job["status"])
+        # Workers record stage, pair, cluster and cache metrics in their own registry
+        REGISTRY.merge(worker_metrics)
+
+    def _evict_finished(self):
+        """Forgets the oldest finished jobs beyond max_finished. Called with the lock held."""
+        finished = sorted(
+            (job["finished_at"], job_id)
+            for job_id, job in self._jobs.items()
+            if job["status"] not in ACTIVE_STATUSES
+        )
+        for _, job_id in finished[: max(len(finished) - self.max_finished, 0)]:
+            del self._jobs[job_id]
+            del self._futures[job_id]
+            try:
+                self._shared.pop(job_id, None)
+                self._cancel_flags.pop(job_id, None)
+            except (OSError, EOFError):
+                pass
+
+    def _snapshot(self, job_id: str) -> Dict[str, Any]:
+        job = dict(self._jobs[job_id])
+        worker_state = dict(self._shared.get(job_id, {}))
+        if job["status"] == QUEUED and worker_state.get("status") == RUNNING:
+            job["status"] = RUNNING
+        job["started_at"] = worker_state.get("started_at")
+        job["stage"] = worker_state.get("stage")
+        job["progress"] = worker_state.get("progress")
+        job["message"] = worker_state.get("message")
+        job["stage_timings"] = worker_state.get("stage_timings", {})
+        return job
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            if job_id not in self._jobs:
+                return None
+            return self._snapshot(job_id)
+
+    def list(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [self._snapshot(job_id) for job_id in self._jobs]
+
+    def cancel(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Queued jobs are dropped before they start; running jobs stop at their next
+        stage boundary or progress update.
+        """
+        with self._lock:
+            if job_id not in self._jobs:
+                return None
+            if self._jobs[job_id]["status"] in ACTIVE_STATUSES:
+                self._cancel_flags[job_id] = True
+                self._futures[job_id].cancel()
+        return self.get(job_id)
+
+    def shutdown(self, wait: bool = True):
+        for job_id in list(self._jobs):
+            self._cancel_flags[job_id] = True
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+        self._manager.shutdown()
+
+
+_default_manager: Optional[JobManager] = None
+
+
+def get_job_manager() -> JobManager:
+    """
+    Process-wide manager. CONSOLIDATOR_MAX_JOBS, CONSOLIDATOR_MAX_QUEUED and
+    CONSOLIDATOR_MAX_FINISHED_JOBS size it;
+    workers warm up before their first job unless CONSOLIDATOR_WARMUP is 0.
+    """
+    global _default_manager
+    if _default_manager is None:
+        from baystate_consolidator.api.routes import run_consolidation_pipeline
+        from baystate_consolidator.utils.warmup import warm_up
+
+        _default_manager = JobManager(
+            run_consolidation_pipeline,
+            max_parallel_jobs=int(os.environ.get("CONSOLIDATOR_MAX_JOBS", 2)),
+            max_queued=int(os.environ.get("CONSOLIDATOR_MAX_QUEUED", 100)),
+            max_finished=int(os.environ.get("CONSOLIDATOR_MAX_FINISHED_JOBS", 1000)),
+            initializer=warm_up if warmup_enabled() else None,
+        )
+    return _default_manager
+
+
+def warmup_enabled() -> bool:
+    return os.environ.get("CONSOLIDATOR_WARMUP", "1") != "0"
+
+
+def shutdown_job_manager():
+    global _default_manager
+    if _default_manager is not None:
+        _default_manager.shutdown(wait=False)
+        _default_manager = None
@@ -1,9 +1,10 @@
-from fastapi import APIRouter, HTTPException, BackgroundTasks
+from fastapi import APIRouter, HTTPException, Query
 from pydantic import BaseModel
-from typing import Dict, Any, List
+from contextlib import nullcontext
+from typing import Dict, Any, List, Optional
 import os
-from supabase import create_client
 
+from baystate_consolidator.api.jobs import JobProgress, QueueFullError, get_job_manager
 from baystate_consolidator.core.normalization import (
     normalize_consolidation_result,
     SurvivorshipEngine,
@@ -11,6 +12,9 @@ from baystate_consolidator.core.normalization import (
 from baystate_consolidator.core.taxonomy import TaxonomyService
 from baystate_consolidator.services.ocr import OCRService
 from baystate_consolidator.models.golden_record import GoldenRecord, FieldMetadata
+from baystate_consolidator.models.raw import RawScrapedProduct
+from baystate_consolidator.pipelines.match_index import MatchQuery, get_product_index
+from baystate_consolidator.utils.metrics import MATCH_SECONDS
 
 router = APIRouter()
 
@@ -19,35 +23,83 @@ class ConsolidateRequest(BaseModel):
     job_id: str
 
 
-def run_consolidation_pipeline(job_id: str):
-    try:
+def run_consolidation_pipeline(job_id: str, progress: Optional[JobProgress] = None):
+    """
+    Job body; runs in a JobManager worker process. Errors propagate so the job is
+    marked failed with the message.
+    """
+    stage = progress.stage if progress else lambda name: nullcontext()
+
+    with stage("connect"):
         url = os.environ.get("SUPABASE_URL", "")
         key = os.environ.get("SUPABASE_KEY", "")
         if not url or not key:
             print("Skipping DB ops: Missing env vars")
             return
 
-        supabase = create_client(url, key)
+        from baystate_consolidator.utils.supabase_client import get_supabase_client
 
-        # taxonomy_service = TaxonomyService() # unused in stub
-        # ocr_service = OCRService() # unused in stub
-        survivorship = SurvivorshipEngine()
+        # Pooled per worker process, so consecutive jobs reuse its connections
+        supabase = get_supabase_client(url, key)
 
-        print(f"Processing job {job_id}")
+    # taxonomy_service = TaxonomyService() # unused in stub
+    # ocr_service = OCRService() # unused in stub
+    survivorship = SurvivorshipEngine()
 
-        # Stub implementation for pipeline
-        # 1. Fetch raw rows
-        # rows = supabase.table("products_ingestion").select("*").eq("job_id", job_id).execute()
+    print(f"Processing job {job_id}")
 
-        # 2. Process
-        # for row in rows.data:
-        #    ...
+    # Stub implementation for pipeline
+    # 1. Fetch raw rows
+    # rows = supabase.table("products_ingestion").select("*").eq("job_id", job_id).execute()
 
-    except Exception as e:
-        print(f"Pipeline error: {e}")
+    # 2. Process
+    # for row in rows.data:
+    #    ...
 
 
 @router.post("/consolidate")
-async def consolidate(request: ConsolidateRequest, background_tasks: BackgroundTasks):
-    background_tasks.add_task(run_consolidation_pipeline, request.job_id)
-    return {"status": "processing", "job_id": request.job_id}
+async def consolidate(request: ConsolidateRequest):
+    try:
+        job = get_job_manager().submit(request.job_id)
+    except QueueFullError as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    return {"status": job["status"], "job_id": request.job_id}
+
+
+@router.get("/jobs")
+async def list_jobs() -> List[Dict[str, Any]]:
+    return get_job_manager().list()
+
+
+@router.get("/jobs/{job_id}")
+async def get_job(job_id: str) -> Dict[str, Any]:
+    job = get_job_manager().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job {job_id}")
+    return job
+
+
+@router.post("/jobs/{job_id}/cancel")
+async def cancel_job(job_id: str) -> Dict[str, Any]:
+    job = get_job_manager().cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job {job_id}")
+    return job
+
+
+@router.post("/match")
+def match(
+    product: RawScrapedProduct,
+    limit: int = Query(10, ge=1, le=100),
+    min_probability: float = Query(0.0, ge=0.0, le=1.0),
+) -> Dict[str, Any]:
+    """
+    Golden records the scraped product may duplicate, best first. A plain def, so the
+    lookup runs in the threadpool rather than on the event loop.
+    """
+    index = get_product_index()
+    if not index.ready:
+        raise HTTPException(status_code=503, detail="Product index is still loading")
+    with MATCH_SECONDS.time():
+        matches = index.match(MatchQuery.from_product(product), limit, min_probability)
+    return {"matches": [candidate._asdict() for candidate in matches], "index_size": len(index)}
@@ -0,0 +1,243 @@
+import re
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+
+class UnitRule(NamedTuple):
+    """
+    A canonical unit and every spelling scrapers use for it (matched case-insensitively).
+    """
+
+    canonical: str
+    aliases: Tuple[str, ...]
+
+
+# Declarative rule table: extend here rather than adding regex passes.
+UNIT_RULES: Tuple[UnitRule, ...] = (
+    UnitRule("lb", ("lb", "lbs", "pound", "pounds")),
+    UnitRule("oz", ("oz", "ounce", "ounces")),
+    UnitRule("ct", ("ct", "count")),
+    UnitRule("ft", ("ft", "feet")),
+    UnitRule("in", ("in", "inch", "inches")),
+    UnitRule("L", ("l", "liter", "liters")),
+)
+
+DIMENSION_SEPARATOR = "X"
+INCH_UNIT = "in"
+
+# Piece kinds
+_WORD = 0
+_UNIT = 1
+_NUM = 2
+_SEP = 3
+_GLUED_INCH = 4  # the "in" of "3inx4": only a unit if it ends up inside an inch dimension
+
+_TOKEN_PATTERN = (
+    r"(?P<dim>(?<=\d)\s*[xX]\s*(?=\d))"
+    r"|(?P<space>\s+)"
+    r"|(?P<inch>\")"
+    r"|(?P<num>\d+(?:\.\d+)?)"
+    r"|(?P<word>[^\W\d]+)"
+    r"|(?P<other>.)"
+)
+
+
+def _format_quantity(number: str) -> str:
+    # Two decimals at most, trailing zeros trimmed: "2.50" -> "2.5", "10.00" -> "10"
+    return f"{float(number):.2f}".rstrip("0").rstrip(".")
+
+
+def is_all_caps_text(text: str) -> bool:
+    """
+    True when the text is "shouted" (has letters, none of them lowercase).
+    Brand casing can't be told apart from the rest of such a name, so nothing is preserved.
+    """
+    return text.upper() == text and text.lower() != text
+
+
+def _is_inch(piece: list) -> bool:
+    return piece[1] == _GLUED_INCH or (piece[1] == _UNIT and piece[0] == INCH_UNIT)
+
+
+def _is_word_char(char: str) -> bool:
+    return char.isalnum() or char == "_"
+
+
+class NameNormalizer:
+    """
+    Single-pass product-name normalizer.
+
+    Produces the same output as the multi-pass regex chain in
+    core.normalization.normalize_name_multipass (dimensions, units, decimals,
+    inch spacing, brand-preserving title case) but tokenizes the name once with
+    a precompiled pattern and resolves units through a lookup built from UNIT_RULES.
+    """
+
+    def __init__(self, unit_rules: Tuple[UnitRule, ...] = UNIT_RULES):
+        self.unit_rules = unit_rules
+        self._aliases: Dict[str, str] = {
+            alias.lower(): rule.canonical for rule in unit_rules for alias in rule.aliases
+        }
+        self._token_re = re.compile(_TOKEN_PATTERN, re.DOTALL)
+
+    def _tokenize(self, name: str) -> List[list]:
+        """
+        Splits the name into pieces [text, kind, breaks_before].
+        Units are canonicalized and quantities formatted on the way through.
+        """
+        pieces: List[list] = []
+        gap = False  # whitespace seen since the last piece
+        pending_break = False
+        skip_period_at = -1
+        last_num: Optional[list] = None
+        last_num_end = -1
+        gap_start = -1
+        for match in self._token_re.finditer(name):
+            kind = match.lastgroup
+            text = match.group()
+            start, end = match.span()
+
+            if kind == "space":
+                gap = True
+                gap_start = start
+                continue
+            if kind == "other" and start == skip_period_at:
+                continue
+
+            if kind == "dim":
+                pieces.append([DIMENSION_SEPARATOR, _SEP, True])
+                pending_break = True
+                gap = False
+                last_num = None
+                continue
+
+            if kind == "inch":
+                # '10"' becomes "10 in"; a quote after whitespace leaves the quantity untouched
+                if last_num is not None and last_num_end == start:
+                    last_num[0] = _format_quantity(last_num[0])
+                pieces.append([INCH_UNIT, _UNIT, True])
+                pending_break = True
+                gap = False
+                last_num = None
+                continue
+
+            breaks = gap or pending_break
+            pending_break = False
+
+            if kind == "word":
+                canonical = self._aliases.get(text.lower())
+                if canonical is not None and not (end < len(name) and name[end].isdigit()):
+                    # Units swallow a trailing period ("oz." -> "oz")
+                    unit_end = end
+                    if end < len(name) and name[end] == ".":
+                        skip_period_at = end
+                        unit_end = end + 1
+                    glued = unit_end < len(name) and _is_word_char(name[unit_end])
+                    if glued:
+                        # "ct.Bag" -> "ctBag": canonical text, but no longer a unit
+                        pieces.append([canonical, _WORD, breaks])
+                    else:
+                        if last_num is not None and last_num_end in (start, gap_start):
+                            last_num[0] = _format_quantity(last_num[0])
+                        # A unit glued to its quantity gets its own word: "10lb" -> "10 lb"
+                        if last_num is not None and last_num_end == start:
+                            breaks = True
+                        pieces.append([canonical, _UNIT, breaks])
+                    gap = False
+                    last_num = None
+                    continue
+                if last_num is not None and text.lower() == "inx":
+                    pieces.append([text[:2], _GLUED_INCH, breaks])
+                    pieces.append([text[2:], _WORD, False])
+                else:
+                    pieces.append([text, _WORD, breaks])
+                last_num = None
+            elif kind == "num":
+                piece = [text, _NUM, breaks]
+                pieces.append(piece)
+                last_num = piece
+                last_num_end = end
+            else:
+                pieces.append([text, _WORD, breaks])
+                last_num = None
+            gap = False
+
+        return pieces
+
+    def _collapse_inch_dimensions(self, pieces: List[list], after_title_case: bool) -> None:
+        """
+        '3 in X 4 in' -> '3 X 4 in'.
+        Pairs are taken greedily left to right, so '24"x36" x 12"x24"' stays two groups;
+        a second call (after title case) folds the middle of three-part dimensions.
+        """
+        drop = []
+        i = 0
+        while i + 4 < len(pieces):
+            number, unit, sep, next_number, next_unit = pieces[i : i + 5]
+            if (
+                number[1] == _NUM
+                and _is_inch(unit)
+                and (sep[1] == _SEP or (sep[1] == _WORD and sep[0] in ("x", "X")))
+                and next_number[1] == _NUM
+                and "." not in next_number[0]
+                and _is_inch(next_unit)
+            ):
+                drop.append(i + 1)
+                sep[0] = DIMENSION_SEPARATOR
+                sep[2] = True
+                next_number[2] = True
+                next_unit[2] = True
+                if after_title_case and next_unit[1] == _GLUED_INCH:
+                    next_unit[0] = INCH_UNIT
+                i += 5
+            else:
+                i += 1
+        for index in reversed(drop):
+            del pieces[index]
+
+    def _title_case(self, pieces: List[list], preserve_caps: bool) -> None:
+        """
+        Capitalizes each word in place, keeping all-caps words (brands) and canonical units.
+        """
+        words: List[List[list]] = []
+        for piece in pieces:
+            if piece[2] or not words:
+                words.append([piece])
+            else:
+                words[-1].append(piece)
+
+        for word in words:
+            if preserve_caps:
+                alpha = "".join(
+                    c for piece in word for c in piece[0] if c.isascii() and c.isalpha()
+                )
+                if len(alpha) > 1 and alpha == alpha.upper():
+                    continue
+            for index, piece in enumerate(word):
+                if piece[1] == _UNIT:
+                    continue
+                piece[0] = piece[0].capitalize() if index == 0 else piece[0].lower()
+
+    def normalize(self, name: str) -> str:
+        pieces = self._tokenize(name)
+        if not pieces:
+            return ""
+        self._collapse_inch_dimensions(pieces, after_title_case=False)
+        self._title_case(pieces, preserve_caps=not is_all_caps_text(name))
+        self._collapse_inch_dimensions(pieces, after_title_case=True)
+
+        parts = []
+        for text, _, breaks in pieces:
+            if breaks and parts:
+                parts.append(" ")
+            parts.append(text)
+        return "".join(parts)
+
+
+_default_normalizer = NameNormalizer()
+
+
+def normalize_name(name: str) -> str:
+    """
+    Normalizes a product name with the shared, precompiled NameNormalizer.
+    """
+    return _default_normalizer.normalize(name)
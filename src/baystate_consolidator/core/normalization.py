@@ -1,9 +1,12 @@
 import re
 from typing import Dict, Any, List, Optional
 from baystate_consolidator.models.golden_record import GoldenRecord, FieldMetadata
+from baystate_consolidator.core.name_normalizer import is_all_caps_text, normalize_name
 
 
-def to_title_case_preserve_brand(text: str) -> str:
+def to_title_case_preserve_brand(text: str, preserve_caps: Optional[bool] = None) -> str:
+    if preserve_caps is None:
+        preserve_caps = not is_all_caps_text(text)
     words = text.split(" ")
     result = []
     for word in words:
@@ -12,7 +15,7 @@ def to_title_case_preserve_brand(text: str) -> str:
             continue
         alpha = re.sub(r"[^a-zA-Z]", "", word)
         is_all_caps = len(alpha) > 1 and alpha == alpha.upper()
-        if is_all_caps:
+        if is_all_caps and preserve_caps:
             result.append(word)
         else:
             result.append(word.capitalize())
@@ -20,19 +23,22 @@ def to_title_case_preserve_brand(text: str) -> str:
 
 
 def normalize_units(text: str) -> str:
+    # Units may be glued to their quantity ("10lbs"), so a preceding digit also counts as a boundary
     replacements = [
-        (r"\b(lbs?\.?)\b", "lb", re.IGNORECASE),
-        (r"\b(pounds?)\b", "lb", re.IGNORECASE),
-        (r"\b(ounces?|oz\.?)\b", "oz", re.IGNORECASE),
-        (r"\b(count|ct\.?)\b", "ct", re.IGNORECASE),
-        (r"\b(feet|ft\.?)\b", "ft", re.IGNORECASE),
-        (r"\b(inches?|in\.?)\b", "in", re.IGNORECASE),
-        (r'"', " in "),
-        (r"\b(liters?|l\.?)\b", "L", re.IGNORECASE),
+        (r"(?:\b|(?<=\d))(lbs?)\b\.?", "lb", re.IGNORECASE),
+        (r"(?:\b|(?<=\d))(pounds?)\b\.?", "lb", re.IGNORECASE),
+        (r"(?:\b|(?<=\d))(ounces?|oz)\b\.?", "oz", re.IGNORECASE),
+        (r"(?:\b|(?<=\d))(count|ct)\b\.?", "ct", re.IGNORECASE),
+        (r"(?:\b|(?<=\d))(feet|ft)\b\.?", "ft", re.IGNORECASE),
+        (r"(?:\b|(?<=\d))(inch(?:es)?|in)\b\.?", "in", re.IGNORECASE),
+        (r'"', " in ", 0),
+        (r"(?:\b|(?<=\d))(liters?|l)\b\.?", "L", re.IGNORECASE),
     ]
     output = text
     for pattern, repl, flags in replacements:
         output = re.sub(pattern, repl, output, flags=flags)
+    # Split glued quantities: "10lb" -> "10 lb"
+    output = re.sub(r"(\d)(lb|oz|ct|ft|in|L)\b", r"\1 \2", output)
     return output
 
 
@@ -89,25 +95,33 @@ def normalize_spacing(text: str) -> str:
     return text.strip()
 
 
+def normalize_name_multipass(name: str) -> str:
+    """
+    Reference implementation of product-name normalization as a chain of regex passes.
+    Production code uses core.name_normalizer.normalize_name; this is kept for differential tests.
+    """
+    preserve_caps = not is_all_caps_text(name)
+    name = normalize_dimensions(name)
+    name = normalize_units(name)
+    name = normalize_decimals(name)
+    name = strip_trailing_unit_periods(name)
+    name = normalize_unit_casing(name)
+    name = ensure_inches_spacing(name)
+    name = normalize_spacing(name)
+    name = to_title_case_preserve_brand(name, preserve_caps=preserve_caps)
+    # Re-assert canonical units after title case
+    name = normalize_unit_casing(normalize_units(name))
+    name = strip_trailing_unit_periods(name)
+    name = ensure_inches_spacing(name)
+    name = normalize_spacing(name)
+    return name
+
+
 def normalize_consolidation_result(data: Dict[str, Any]) -> Dict[str, Any]:
     normalized = data.copy()
 
     if isinstance(normalized.get("name"), str):
-        name = normalized["name"]
-        name = normalize_dimensions(name)
-        name = normalize_units(name)
-        name = normalize_decimals(name)
-        name = strip_trailing_unit_periods(name)
-        name = normalize_unit_casing(name)
-        name = ensure_inches_spacing(name)
-        name = normalize_spacing(name)
-        name = to_title_case_preserve_brand(name)
-        # Re-assert canonical units after title case
-        name = normalize_unit_casing(normalize_units(name))
-        name = strip_trailing_unit_periods(name)
-        name = ensure_inches_spacing(name)
-        name = normalize_spacing(name)
-        normalized["name"] = name
+        normalized["name"] = normalize_name(normalized["name"])
 
     if isinstance(normalized.get("weight"), str):
         try:
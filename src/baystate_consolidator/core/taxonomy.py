@@ -1,33 +1,242 @@
+import logging
 import os
+import threading
+import time
 from functools import lru_cache
-from typing import List, Optional
-from supabase import create_client, Client
+from typing import TYPE_CHECKING, Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+from baystate_consolidator.normalizers.text import normalize_text
+from baystate_consolidator.utils.hashing import FNV_PRIME, shingle_hashes
+
+if TYPE_CHECKING:
+    from supabase import Client
+
+# Taxonomy tables change rarely; re-read them every 15 minutes
+TAXONOMY_TTL_SECONDS = 15 * 60
+NGRAM_SIZES = (2, 3, 4)
+MIN_CONFIDENCE = 0.3
+_BOUNDARY = "\x02"
+# Upper bound on the (names x vocabulary) matrix materialized at once
+_CHUNK_ELEMENTS = 1 << 22
+
+logger = logging.getLogger(__name__)
+
+
+class TaxonomyMatch(NamedTuple):
+    value: Optional[str]
+    # None when nothing scored at least min_confidence
+    category: Optional[str]
+    confidence: float
+    exact: bool = False
+
+
+def _ngram_hashes(
+    texts: Sequence[Optional[str]], sizes: Sequence[int]
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Hashes of every character n-gram of every text for each size, with the owning
+    text index; the same vectorized shingling MinHash blocking uses.
+    """
+    # Boundary markers give n-grams at the start and end of a text their own weight
+    padded = [f"{_BOUNDARY}{text}{_BOUNDARY}" if text else None for text in texts]
+    hashes, owners = zip(*(shingle_hashes(padded, n) for n in sizes))
+    return np.concatenate(hashes), np.concatenate(owners)
+
+
+class TaxonomyIndex:
+    """
+    Immutable index over one list of taxonomy names. Exact matches (after
+    normalize_text) are a dict lookup; everything else is scored against every name at
+    once by cosine similarity of character n-gram TF-IDF vectors, a whole batch of
+    values per matrix product.
+    """
+
+    def __init__(
+        self,
+        names: Sequence[str],
+        ngram_sizes: Sequence[int] = NGRAM_SIZES,
+        min_confidence: float = MIN_CONFIDENCE,
+    ):
+        self.names = list(dict.fromkeys(name for name in names if name))
+        self.ngram_sizes = tuple(ngram_sizes)
+        self.min_confidence = min_confidence
+        self._exact: Dict[str, str] = {}
+        for name in self.names:
+            self._exact.setdefault(normalize_text(name), name)
+
+        hashes, owner = _ngram_hashes(self.names, self.ngram_sizes)
+        # Sorted n-gram hashes; a hash's position is its column
+        self._vocabulary = np.unique(hashes)
+        counts = self._term_counts(
+            np.searchsorted(self._vocabulary, hashes), owner, len(self.names)
+        )
+        document_frequency = (counts > 0).sum(axis=0)
+        # Smoothed idf, as in scikit-learn's TfidfVectorizer
+        self._idf = np.log((1 + len(self.names)) / (1 + document_frequency)) + 1
+        self._matrix = self._weigh(counts)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __contains__(self, value: str) -> bool:
+        return normalize_text(value) in self._exact
+
+    def _term_counts(self, columns: np.ndarray, owner: np.ndarray, rows: int) -> np.ndarray:
+        width = len(self._vocabulary)
+        counts = np.bincount(owner * width + columns, minlength=rows * width)
+        return counts.reshape(rows, width).astype(np.float32)
+
+    def _weigh(self, counts: np.ndarray, extra_square_norm: float = 0.0) -> np.ndarray:
+        weighted = counts * self._idf.astype(np.float32)
+        norms = np.sqrt((weighted**2).sum(axis=1, keepdims=True) + extra_square_norm)
+        return np.divide(weighted, norms, out=np.zeros_like(weighted), where=norms > 0)
+
+    def lookup(self, value: Optional[str]) -> Optional[str]:
+        """
+        Canonical name for an exact (case and whitespace insensitive) match, else None.
+        """
+        return self._exact.get(normalize_text(value)) if value else None
+
+    def similarity(self, values: Sequence[Optional[str]]) -> np.ndarray:
+        """
+        (len(values), len(names)) cosine similarity matrix, one matrix product per call.
+        """
+        hashes, owner = _ngram_hashes(values, self.ngram_sizes)
+        columns = np.searchsorted(self._vocabulary, hashes)
+        known = columns < len(self._vocabulary)
+        known[known] = self._vocabulary[columns[known]] == hashes[known]
+        counts = self._term_counts(columns[known], owner[known], len(values))
+
+        # Unseen n-grams still count towards a value's norm, at the idf of an unseen term,
+        # so a value sharing a few n-grams with a name does not score as a near-match
+        unseen_owner = owner[~known]
+        with np.errstate(over="ignore"):
+            # Fold the owner into the hash so repeats are counted per value
+            per_value = hashes[~known] ^ (unseen_owner.astype(np.uint64) * FNV_PRIME)
+        _, first, repeats = np.unique(per_value, return_index=True, return_counts=True)
+        unseen_weight = np.log(1 + len(self.names)) + 1
+        unseen_square_norm = np.bincount(
+            unseen_owner[first], weights=(repeats * unseen_weight) ** 2, minlength=len(values)
+        )
+        return self._weigh(counts, unseen_square_norm[:, None]) @ self._matrix.T
+
+    def match_many(self, values: Sequence[Optional[str]]) -> List[TaxonomyMatch]:
+        """
+        One match per value. Values equal after normalize_text are scored once.
+        """
+        values = list(values)
+        if not self.names:
+            return [TaxonomyMatch(value, None, 0.0) for value in values]
+        keys = [normalize_text(value) for value in values]
+        scored: Dict[str, Tuple[Optional[str], float, bool]] = {}
+        fuzzy = []
+        for key in dict.fromkeys(keys):
+            if key in self._exact:
+                scored[key] = (self._exact[key], 1.0, True)
+            else:
+                fuzzy.append(key)
+
+        chunk = max(1, _CHUNK_ELEMENTS // max(1, len(self._vocabulary)))
+        for start in range(0, len(fuzzy), chunk):
+            batch = fuzzy[start : start + chunk]
+            scores = self.similarity(batch)
+            best = scores.argmax(axis=1)
+            confidence = scores[np.arange(len(batch)), best]
+            for key, index, score in zip(batch, best.tolist(), confidence.tolist()):
+                category = self.names[index] if score >= self.min_confidence else None
+                scored[key] = (category, round(score, 4), False)
+        return [TaxonomyMatch(value, *scored[key]) for value, key in zip(values, keys)]
+
+    def match(self, value: Optional[str]) -> TaxonomyMatch:
+        return self.match_many([value])[0]
+
+
+@lru_cache(maxsize=32)
+def _options_index(options: Tuple[str, ...]) -> TaxonomyIndex:
+    return TaxonomyIndex(options)
 
 
 class TaxonomyService:
-    def __init__(self):
+    """
+    Categories and product types from Supabase, held as TaxonomyIndexes that are
+    rebuilt on first use after ttl seconds. A failed refresh keeps serving the last index.
+    """
+
+    def __init__(
+        self,
+        client: Optional["Client"] = None,
+        ttl: float = TAXONOMY_TTL_SECONDS,
+        clock: Callable[[], float] = time.monotonic,
+    ):
         url: str = os.environ.get("SUPABASE_URL", "")
         key: str = os.environ.get("SUPABASE_KEY", "")
-        if url and key:
-            self.supabase: Client = create_client(url, key)
+        if client is not None:
+            self.supabase = client
+        elif url and key:
+            from baystate_consolidator.utils.supabase_client import get_supabase_client
+
+            self.supabase: "Client" = get_supabase_client(url, key)
         else:
             self.supabase = None
+        self.ttl = ttl
+        self._clock = clock
+        self._indexes: Dict[str, Tuple[float, TaxonomyIndex]] = {}
+        self._lock = threading.Lock()
 
-    @lru_cache(maxsize=1)
-    def get_categories(self) -> List[str]:
+    def _fetch_names(self, table: str) -> List[str]:
         if not self.supabase:
             return []
-        response = self.supabase.table("categories").select("name").execute()
+        response = self.supabase.table(table).select("name").execute()
         return [item["name"] for item in response.data]
 
-    @lru_cache(maxsize=1)
+    def _index(self, table: str) -> TaxonomyIndex:
+        with self._lock:
+            loaded = self._indexes.get(table)
+            if loaded is not None and self._clock() - loaded[0] < self.ttl:
+                return loaded[1]
+            try:
+                index = TaxonomyIndex(self._fetch_names(table))
+            except Exception as e:
+                if loaded is None:
+                    raise
+                logger.warning(f"Taxonomy refresh of {table} failed ({e}); keeping cached copy")
+                index = loaded[1]
+            self._indexes[table] = (self._clock(), index)
+            return index
+
+    def refresh(self):
+        with self._lock:
+            self._indexes.clear()
+
+    def category_index(self) -> TaxonomyIndex:
+        return self._index("categories")
+
+    def product_type_index(self) -> TaxonomyIndex:
+        return self._index("product_types")
+
+    def get_categories(self) -> List[str]:
+        return self.category_index().names
+
     def get_product_types(self) -> List[str]:
-        if not self.supabase:
-            return []
-        response = self.supabase.table("product_types").select("name").execute()
-        return [item["name"] for item in response.data]
+        return self.product_type_index().names
+
+    def assign_categories(self, names: Sequence[Optional[str]]) -> List[TaxonomyMatch]:
+        """
+        Best category per (normalized) product name, with a confidence score.
+        """
+        return self.category_index().match_many(names)
+
+    def assign_product_types(self, names: Sequence[Optional[str]]) -> List[TaxonomyMatch]:
+        return self.product_type_index().match_many(names)
 
     def validate_category(self, value: str, valid_options: List[str]) -> str:
-        if value in valid_options:
+        """
+        The valid option matching value exactly or, failing that, most similar to it.
+        Returns value unchanged when no option is close enough.
+        """
+        match = _options_index(tuple(valid_options)).match(value)
+        if match.category is None:
+            logger.info(f"No taxonomy match for {value!r} (best score {match.confidence})")
             return value
-        return valid_options[0] if valid_options else value
+        return match.category
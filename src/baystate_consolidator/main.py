@@ -1,9 +1,46 @@
+import json
 import logging
-from typing import List, Dict, Any
+import os
+import time
+import polars as pl
+from typing import List, Dict, Any, Iterator, Optional, Sequence, Union
 from baystate_consolidator.utils.database import DatabaseIngestor
-from baystate_consolidator.pipelines.dedupe import DeduplicationPipeline
-from baystate_consolidator.normalizers.price import normalize_price
-from baystate_consolidator.normalizers.text import normalize_text, normalize_weight
+from baystate_consolidator.utils.file_source import FileIngestor, source_path
+from baystate_consolidator.pipelines.blocking import (
+    DERIVED_KEYS,
+    BlockingKey,
+    format_blocking_report,
+    key_columns,
+)
+from baystate_consolidator.pipelines.dedupe import DeduplicationPipeline, group_clusters
+from baystate_consolidator.pipelines.fast_match import FAST_PATH_MAX_RECORDS
+from baystate_consolidator.pipelines.incremental import ClusterStore
+from baystate_consolidator.pipelines.lsh import MinHashLSH
+from baystate_consolidator.pipelines.model import ModelRegistry
+from baystate_consolidator.stages.ingest import SOURCE_FIELDS, concat_records
+from baystate_consolidator.stages.lineage import lineage_frame, write_lineage
+from baystate_consolidator.stages.load import SupabaseLoader
+from baystate_consolidator.stages.normalize import normalize_records
+from baystate_consolidator.stages.runner import StageRunner, fingerprint_records
+from baystate_consolidator.stages.survivorship import BatchSurvivorshipEngine
+from baystate_consolidator.utils.benchmark import (
+    compare_to_baseline,
+    format_match,
+    format_results,
+    format_serialization,
+    load_baseline,
+    run_benchmark,
+    run_match_benchmark,
+    run_serialization_benchmark,
+    save_baseline,
+)
+from baystate_consolidator.utils.metrics import (
+    CLUSTER_SIZE,
+    REGISTRY,
+    STAGE_RECORDS,
+    STAGE_SECONDS,
+)
+from baystate_consolidator.utils.synthetic import CatalogGenerator
 
 # Configure logging
 logging.basicConfig(
@@ -11,74 +48,386 @@ logging.basicConfig(
 )
 logger = logging.getLogger("BayStateConsolidator")
 
+DEFAULT_CHECKPOINT_DIR = "./checkpoints"
+
 
-def run_consolidation(limit: int = 100):
+def run_consolidation(
+    limit: Optional[int] = 100,
+    batch_size: int = 5000,
+    cluster_store: Optional[str] = None,
+    model_dir: Optional[str] = None,
+    blocking_keys: Optional[List[BlockingKey]] = None,
+    max_block_comparisons: Optional[int] = None,
+    max_comparisons: Optional[int] = None,
+    lsh_bands: Optional[int] = None,
+    lsh_rows: int = 5,
+    write_back: bool = False,
+    shard_key: Optional[BlockingKey] = None,
+    workers: Optional[int] = None,
+    source: Optional[str] = None,
+    fast_path_max_records: Optional[int] = FAST_PATH_MAX_RECORDS,
+    checkpoint_dir: Optional[str] = None,
+    resume: bool = False,
+    from_stage: Optional[str] = None,
+    lineage_dir: Optional[str] = None,
+    checkpoint_max_age_days: Optional[float] = None,
+):
     """
     Main execution flow:
-    1. Ingest Pending Data
+    1. Ingest Pending Data (streamed in batches, keyset-paginated)
     2. Normalize
     3. Deduplicate
-    4. (Future) Consolidate & Push
+    4. Consolidate & Push (with write_back; a dry run otherwise)
+
+    limit caps the number of products read; None drains the whole backlog
+    while holding at most one batch of source records in memory. Each batch is linked on
+    its own, so with write_back duplicates listed under different SKUs in different
+    batches become separate golden records; a batch_size covering the backlog avoids that.
+    cluster_store points at a Parquet file of earlier cluster assignments; when set,
+    records are linked incrementally against it instead of only within each batch.
+    model_dir holds trained Splink models (see train_model); the latest one is used.
+    max_block_comparisons / max_comparisons cap the pairs scored per block and per batch.
+    lsh_bands enables MinHash-LSH name blocking with lsh_bands x lsh_rows permutations.
+    write_back upserts golden records and marks their SKUs consolidated after each batch;
+    incremental runs produce no golden records, so it cannot be combined with cluster_store.
+    shard_key splits each batch by that key and links the shards in `workers` processes.
+    source is "file://<path>" to read a scrape dump instead of Supabase (see FileIngestor).
+    Batches of up to fast_path_max_records records are matched in-process without Splink.
+    checkpoint_dir stores each stage's output per batch; resume reuses the checkpoints of
+    stages whose inputs are unchanged, and from_stage recomputes that stage onwards.
+    Checkpoints accumulate until pruned: checkpoint_max_age_days first deletes those not
+    written or reused in that many days.
+    lineage_dir receives each batch's field lineage as a Parquet table (see stages.lineage).
     """
+    if write_back and cluster_store:
+        raise ValueError(
+            "write_back needs golden records, which incremental (cluster_store) runs do not "
+            "resolve; their SKUs would stay pending"
+        )
     try:
         # 1. Ingest
-        logger.info("Connecting to Supabase...")
-        # Note: Ensure SUPABASE_URL and SUPABASE_KEY are set in env
-        db = DatabaseIngestor()
+        db = _ingestor(source)
+        pipeline = DeduplicationPipeline(
+            blocking_columns=blocking_keys,
+            model_path=_latest_model(model_dir),
+            max_block_comparisons=max_block_comparisons,
+            max_comparisons=max_comparisons,
+            lsh=MinHashLSH(bands=lsh_bands, rows=lsh_rows) if lsh_bands else None,
+            shard_key=shard_key,
+            max_workers=workers,
+            fast_path_max_records=fast_path_max_records or None,
+        )
+        store = ClusterStore(cluster_store) if cluster_store else None
+        survivorship = BatchSurvivorshipEngine()
+        loader = SupabaseLoader(_supabase(db)) if write_back else None
+        if (resume or from_stage) and not checkpoint_dir:
+            checkpoint_dir = DEFAULT_CHECKPOINT_DIR
+        runner = StageRunner(checkpoint_dir, resume=resume, from_stage=from_stage)
+        if checkpoint_max_age_days is not None:
+            runner.prune(checkpoint_max_age_days * 86400)
+
+        if limit is None:
+            logger.info(f"Draining all pending records in batches of {batch_size}...")
+        else:
+            logger.info(f"Fetching up to {limit} pending records...")
+
+        total_records = 0
+        run_id = time.strftime("%Y%m%dT%H%M%S")
+        promote = _payload_columns(pipeline.blocking_columns + ([shard_key] if shard_key else []))
+        batches = _timed_batches(
+            db.iter_pending_frames(batch_size=batch_size, max_rows=limit, promote=promote)
+        )
+        for batch_number, raw_data in enumerate(batches, start=1):
+            if batch_number == 2 and loader is not None:
+                logger.warning(
+                    "Writing back more than one batch: duplicates in different batches are "
+                    "not linked and become separate golden records. Raise --batch-size to "
+                    "consolidate the backlog in one batch."
+                )
+            total_records += len(raw_data)
+            logger.info(f"Batch {batch_number}: fetched {len(raw_data)} source records.")
+            resolved = process_batch(raw_data, pipeline, store, survivorship, runner)
+
+            if lineage_dir and resolved is not None:
+                path = os.path.join(lineage_dir, f"lineage-{run_id}-{batch_number:05d}.parquet")
+                write_lineage(lineage_frame(resolved), path)
 
-        logger.info(f"Fetching up to {limit} pending records...")
-        raw_data = db.fetch_pending_products(limit=limit)
+            # 4. Consolidate & Push
+            if loader is not None and resolved is not None:
+                with STAGE_SECONDS.time(stage="load"):
+                    stats = loader.upsert_records(survivorship.to_golden_records(resolved))
+                    skus = consolidated_skus(raw_data, resolved, stats.keys)
+                    loader.update_status(skus, "consolidated")
+                pending = raw_data["sku"].n_unique() - len(skus)
+                if pending:
+                    logger.warning(
+                        f"Batch {batch_number}: {pending} SKU(s) left pending; their golden "
+                        "record had no sku or lost a sku collision (see warnings above)"
+                    )
+                STAGE_RECORDS.inc(resolved.height, stage="load")
 
-        if not raw_data:
+        if not total_records:
             logger.info("No pending products found.")
             return
 
-        logger.info(f"Fetched {len(raw_data)} source records.")
+        logger.info(f"Processed {total_records} source records.")
+        logger.info("Job completed successfully.")
+        logger.info(f"Run metrics: {json.dumps(REGISTRY.summary(), sort_keys=True)}")
+
+    except Exception as e:
+        logger.error(f"Consolidation job failed: {e}", exc_info=True)
+        raise
+
+
+def train_model(
+    sample_size: int = 20000,
+    model_dir: str = "./models",
+    max_pairs: int = 1_000_000,
+    source: Optional[str] = None,
+):
+    """
+    Retrains the Splink model on a sample of pending products and saves it as a new version.
+    Meant to run on a schedule; consolidation runs then load the saved parameters.
+    """
+    try:
+        db = _ingestor(source)
 
-        # 2. Normalize
-        logger.info("Normalizing data...")
-        normalized_data = []
-        for record in raw_data:
-            norm_record = record.copy()
+        logger.info(f"Fetching a training sample of up to {sample_size} products...")
+        raw_data = _sample(db, sample_size)
+        if raw_data is None:
+            logger.info("No pending products found; nothing to train on.")
+            return None
 
-            # Normalize Price
-            if "price" in record:
-                norm_record["price"] = normalize_price(record["price"])
+        logger.info(f"Training on {len(raw_data)} source records...")
+        normalized_data = normalize_records(raw_data)
+        model_path = DeduplicationPipeline().train(
+            normalized_data, ModelRegistry(model_dir), max_pairs=max_pairs
+        )
+        logger.info(f"Training completed: {model_path}")
+        return model_path
 
-            # Normalize Title (Name)
-            if "title" in record:
-                norm_record["name"] = normalize_text(record["title"])
+    except Exception as e:
+        logger.error(f"Training job failed: {e}", exc_info=True)
+        raise
 
-            # Normalize Brand
-            if "brand" in record:
-                norm_record["brand"] = normalize_text(record["brand"])
 
-            # Normalize Weight
-            # Assuming 'weight' might be in attributes or direct field
-            if "weight" in record:
-                norm_record["weight"] = normalize_weight(record["weight"])
+def analyze_blocking(
+    sample_size: int = 20000,
+    blocking_keys: Optional[List[BlockingKey]] = None,
+    source: Optional[str] = None,
+):
+    """
+    Reports the estimated comparison count and largest blocks of each blocking key
+    on a sample of pending products, without running the linker.
+    """
+    db = _ingestor(source)
+    raw_data = _sample(db, sample_size, promote=_payload_columns(blocking_keys or []))
+    if raw_data is None:
+        logger.info("No pending products found; nothing to analyze.")
+        return []
 
-            normalized_data.append(norm_record)
+    normalized_data = normalize_records(raw_data)
+    reports = DeduplicationPipeline(blocking_columns=blocking_keys).analyze_blocking(
+        normalized_data, top_n=10
+    )
+    logger.info(f"Blocking analysis on {len(raw_data)} records:\n{format_blocking_report(reports)}")
+    return reports
 
-        # 3. Deduplicate
-        logger.info("Running Splink deduplication...")
-        pipeline = DeduplicationPipeline()
-        clusters = pipeline.run(normalized_data)
 
-        logger.info(f"Found {len(clusters)} unique clusters.")
+def run_benchmarks(
+    sizes: List[int],
+    baseline_path: str = "./benchmarks/baseline.json",
+    tolerance: float = 0.25,
+    update_baseline: bool = False,
+    duplicate_rate: float = 0.2,
+    seed: int = 0,
+    serialization: bool = False,
+    match: bool = False,
+) -> bool:
+    """
+    Times every stage on synthetic catalogs of each size and compares against the stored
+    baseline. Returns False when a stage regressed; update_baseline records this run instead.
+    serialization also times golden record and lineage serialization, and match /match
+    lookups against indexes of that many golden records (neither is baselined).
+    """
+    run = run_benchmark(sizes, generator=CatalogGenerator(duplicate_rate=duplicate_rate, seed=seed))
+    logger.info(f"Benchmark results:\n{format_results(run)}")
+    if serialization:
+        results = run_serialization_benchmark(
+            sizes, generator=CatalogGenerator(duplicate_rate=duplicate_rate, seed=seed)
+        )
+        logger.info(f"Serialization results:\n{format_serialization(results)}")
+    if match:
+        latencies = run_match_benchmark(
+            sizes, generator=CatalogGenerator(duplicate_rate=duplicate_rate, seed=seed)
+        )
+        logger.info(f"Match latency:\n{format_match(latencies)}")
 
-        for cluster in clusters:
-            cluster_id = cluster["cluster_id"]
-            record_ids = cluster["record_ids"]
-            if len(record_ids) > 1:
-                logger.info(f"Cluster {cluster_id} has duplicates: {record_ids}")
+    if update_baseline:
+        save_baseline(baseline_path, run.results)
+        logger.info(f"Baseline written to {baseline_path}")
+        return True
 
-        # 4. Update Status (Dry Run for now)
-        # logger.info("Updating pipeline status...")
-        # db.update_status(processed_skus, "consolidated")
+    baseline = load_baseline(baseline_path)
+    if not baseline:
+        logger.warning(f"No baseline at {baseline_path}; run with --update-baseline to record one.")
+        return True
+    regressions = compare_to_baseline(
+        run.results, baseline, tolerance=tolerance, memory_tolerance=tolerance
+    )
+    for regression in regressions:
+        logger.error(f"Regression: {regression}")
+    return not regressions
 
-        logger.info("Job completed successfully.")
 
-    except Exception as e:
-        logger.error(f"Consolidation job failed: {e}", exc_info=True)
-        raise
+def consolidated_skus(
+    raw_data: pl.DataFrame, resolved: pl.DataFrame, written: Sequence[str]
+) -> List[str]:
+    """
+    Source SKUs whose every record is in a golden record the loader wrote: per written
+    key the last cluster resolving to it, as unique_by_key keeps, through its record_ids.
+    """
+    if not written:
+        return []
+    record_ids = (
+        resolved.filter(pl.col("sku").is_in(list(written)))
+        .unique("sku", keep="last", maintain_order=True)
+        .select(pl.col("record_ids").explode())
+        .to_series()
+    )
+    return (
+        raw_data.group_by("sku", maintain_order=True)
+        .agg(pl.col("unique_id").is_in(record_ids.implode()).all().alias("written"))
+        .filter("written")["sku"]
+        .to_list()
+    )
+
+
+def _timed_batches(batches: Iterator[pl.DataFrame]) -> Iterator[pl.DataFrame]:
+    """
+    Records each fetch as the ingest stage; the fetch happens inside next().
+    """
+    while True:
+        with STAGE_SECONDS.time(stage="ingest"):
+            batch = next(batches, None)
+        if batch is None:
+            return
+        STAGE_RECORDS.inc(len(batch), stage="ingest")
+        yield batch
+
+
+def _payload_columns(keys: List[BlockingKey]) -> List[str]:
+    """
+    Columns of the blocking keys that come straight from the scraper payloads, so that
+    ingest keeps them as columns instead of packing them into extras.
+    """
+    columns = [column for key in keys for column in key_columns(key)]
+    return [c for c in dict.fromkeys(columns) if c not in SOURCE_FIELDS and c not in DERIVED_KEYS]
+
+
+def _sample(
+    db: Union[DatabaseIngestor, FileIngestor], sample_size: int, promote: Sequence[str] = ()
+) -> Optional[pl.DataFrame]:
+    frames = list(db.iter_pending_frames(max_rows=sample_size, promote=promote))
+    return concat_records(frames) if frames else None
+
+
+def _ingestor(source: Optional[str]) -> Union[DatabaseIngestor, FileIngestor]:
+    """
+    Supabase by default; "file://<path>" reads a JSON/NDJSON/Parquet dump or directory.
+    """
+    path = source_path(source or "")
+    if path is not None:
+        logger.info(f"Reading scrape dumps from {path}...")
+        return FileIngestor(path)
+    if source not in (None, "supabase"):
+        raise ValueError(f"Unknown source {source!r}; expected 'supabase' or 'file://<path>'")
+    logger.info("Connecting to Supabase...")
+    # Note: Ensure SUPABASE_URL and SUPABASE_KEY are set in env
+    return DatabaseIngestor()
+
+
+def _supabase(db: Union[DatabaseIngestor, FileIngestor]):
+    """
+    Write-back always goes to Supabase, also when replaying a file source.
+    """
+    return db.supabase if isinstance(db, DatabaseIngestor) else DatabaseIngestor().supabase
+
+
+def _latest_model(model_dir: Optional[str]) -> Optional[str]:
+    if not model_dir:
+        return None
+    model_path = ModelRegistry(model_dir).latest_path()
+    if model_path is None:
+        logger.warning(f"No trained model in {model_dir}; predicting with default parameters.")
+    else:
+        logger.info(f"Loading trained model {model_path}")
+    return model_path
+
+
+def process_batch(
+    raw_data: Union[List[Dict[str, Any]], pl.DataFrame],
+    pipeline: DeduplicationPipeline,
+    store: Optional[ClusterStore] = None,
+    survivorship: Optional[BatchSurvivorshipEngine] = None,
+    runner: Optional[StageRunner] = None,
+) -> Optional[pl.DataFrame]:
+    """
+    Normalizes and deduplicates one batch of source records, as dicts or as a frame
+    from iter_pending_frames. Returns the resolved golden records (one row
+    per cluster, see BatchSurvivorshipEngine.resolve) for full-batch runs.
+    With a checkpointing runner, stages whose inputs and configuration are unchanged are
+    loaded from their checkpoints; incremental dedupe also depends on the store and
+    always runs.
+    """
+    runner = runner or StageRunner()
+    survivorship = survivorship or BatchSurvivorshipEngine()
+    batch_key = fingerprint_records(raw_data) if runner.enabled else None
+
+    # 2. Normalize
+    logger.info("Normalizing data...")
+    with STAGE_SECONDS.time(stage="normalize"):
+        normalized = runner.run("normalize", batch_key, normalize_records, raw_data)
+    normalized_data = normalized.frame
+    STAGE_RECORDS.inc(len(normalized_data) if normalized_data is not None else 0, stage="normalize")
+
+    # 3. Deduplicate
+    with STAGE_SECONDS.time(stage="dedupe"):
+        if store is not None:
+            logger.info("Running incremental Splink deduplication...")
+            clusters = pipeline.run_incremental(normalized_data, store)
+        else:
+            logger.info("Running Splink deduplication...")
+            deduped = runner.run(
+                "dedupe",
+                normalized.key or None,
+                pipeline.run,
+                normalized_data,
+                config=pipeline.checkpoint_config(),
+            )
+            clustered = deduped.frame
+            clusters = group_clusters(clustered).to_dicts()
+    STAGE_RECORDS.inc(sum(len(cluster["record_ids"]) for cluster in clusters), stage="dedupe")
+    CLUSTER_SIZE.observe_many(len(cluster["record_ids"]) for cluster in clusters)
+
+    logger.info(f"Found {len(clusters)} unique clusters.")
+
+    for cluster in clusters:
+        cluster_id = cluster["cluster_id"]
+        record_ids = cluster["record_ids"]
+        if len(record_ids) > 1:
+            logger.info(f"Cluster {cluster_id} has duplicates: {record_ids}")
+
+    if store is not None or clustered.is_empty():
+        return None
+    with STAGE_SECONDS.time(stage="survivorship"):
+        resolved = runner.run(
+            "survivorship",
+            deduped.key or None,
+            survivorship.resolve,
+            clustered,
+            config=survivorship.checkpoint_config(),
+        ).frame
+    STAGE_RECORDS.inc(resolved.height, stage="survivorship")
+    logger.info(f"Resolved {resolved.height} golden records.")
+    return resolved
@@ -1,6 +1,7 @@
+import sys
 from datetime import datetime
-from typing import List, Optional, Dict, Any
-from pydantic import BaseModel, Field
+from typing import List, Optional, Dict, Any, Sequence
+from pydantic import BaseModel, Field, TypeAdapter, field_validator
 
 
 class FieldMetadata(BaseModel):
@@ -14,6 +15,12 @@ class FieldMetadata(BaseModel):
     confidence: float = Field(default=1.0, ge=0.0, le=1.0)
     timestamp: datetime = Field(default_factory=datetime.now)
 
+    @field_validator("source")
+    @classmethod
+    def _intern_source(cls, source: str) -> str:
+        # A handful of sources repeat across every field of every record; share one string each
+        return sys.intern(source)
+
 
 class GoldenRecord(BaseModel):
     """
@@ -38,3 +45,15 @@ class GoldenRecord(BaseModel):
     consolidation_metadata: Dict[str, FieldMetadata] = Field(default_factory=dict)
 
     model_config = {"extra": "ignore"}
+
+
+_GOLDEN_RECORDS = TypeAdapter(List[GoldenRecord])
+
+
+def dump_records_json(records: Sequence[GoldenRecord]) -> bytes:
+    """
+    JSON array of already validated records, encoded in one pass by pydantic-core without
+    re-validating them or building intermediate dicts; the same JSON model_dump_json gives
+    per record.
+    """
+    return _GOLDEN_RECORDS.dump_json(list(records))
@@ -0,0 +1,219 @@
+import os
+import re
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from baystate_consolidator.utils.metrics import REGISTRY, Sample
+
+# Precompiled grammar for the forms scrapers send most often: "5 lb", "12 oz bag", "2.5kg", "5-lb".
+# Anything else (fractions, ranges, multiple quantities, unusual units) goes to quantulum3.
+_WEIGHT_RE = re.compile(
+    r"^ *(?P<value>\d{1,3}(?:,\d{3})+(?:\.\d+)?|\d*\.\d+|\d+)(?: *|-)"
+    r"(?P<unit>[a-zA-Z]+)\.?"
+    r"(?: +(?i:bag|box|pack|can|bottle|jar|pouch|tub|bucket|case|sack|tin|carton|container))? *$"
+)
+
+# Unit spelling (lowercased) -> canonical unit. "g" is matched case-sensitively below,
+# since quantulum3 reads "G" as gauss.
+_UNITS: Dict[str, str] = {
+    "lb": "lb",
+    "lbs": "lb",
+    "pound": "lb",
+    "pounds": "lb",
+    "oz": "oz",
+    "ounce": "oz",
+    "ounces": "oz",
+    "kg": "kg",
+    "kgs": "kg",
+    "kilogram": "kg",
+    "kilograms": "kg",
+    "g": "g",
+    "gram": "g",
+    "grams": "g",
+    "ct": "ct",
+    "count": "ct",
+}
+
+KG_TO_LB = 2.20462
+G_TO_OZ = 0.035274
+
+_MISSING = object()
+
+
+def format_weight(value: float, unit: str) -> Optional[str]:
+    """
+    Formats a parsed quantity as "X lb" / "Y oz". Counts are not weights and yield None.
+    """
+    if unit == "lb":
+        return f"{value} lb"
+    if unit == "oz":
+        return f"{value} oz"
+    if unit == "kg":
+        return f"{value * KG_TO_LB:.2f} lb"
+    if unit == "g":
+        return f"{value * G_TO_OZ:.2f} oz"
+    return None
+
+
+def parse_weight_fast(text: str) -> Tuple[bool, Optional[str]]:
+    """
+    Parses the common weight forms without quantulum3.
+    Returns (recognized, result); when recognized is False the caller must fall back.
+    """
+    match = _WEIGHT_RE.match(text)
+    if not match:
+        return False, None
+    raw_unit = match.group("unit")
+    unit = _UNITS.get(raw_unit.lower())
+    if unit is None or (unit == "g" and raw_unit == "G"):
+        return False, None
+    value = float(match.group("value").replace(",", ""))
+    return True, format_weight(value, unit)
+
+
+def parse_weight_quantulum(text: str) -> Optional[str]:
+    """
+    Slow path: full quantity extraction with quantulum3. The first call loads its unit
+    and entity data, which takes seconds; see utils.warmup.
+    """
+    from quantulum3 import parser
+
+    try:
+        quants = parser.parse(text)
+        for quant in quants:
+            unit_name = quant.unit.name.lower()
+            if "pound" in unit_name or "lb" in unit_name:
+                return format_weight(quant.value, "lb")
+            elif "ounce" in unit_name or "oz" in unit_name:
+                return format_weight(quant.value, "oz")
+            elif "kilogram" in unit_name:
+                return format_weight(quant.value, "kg")
+            elif "gram" in unit_name:
+                return format_weight(quant.value, "g")
+    except Exception:
+        return None
+
+    return None
+
+
+class WeightParser:
+    """
+    Weight normalizer with a precompiled fast path, a bounded in-memory LRU cache and an
+    optional SQLite cache shared across runs. quantulum3 only runs for strings the fast
+    path does not recognize and no cache has seen before.
+    """
+
+    def __init__(self, max_size: int = 65536, disk_cache_path: Optional[str] = None):
+        self.max_size = max_size
+        self._cache: "OrderedDict[str, Optional[str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "fast_path": 0, "fallbacks": 0, "disk_hits": 0}
+        self._disk: Optional[sqlite3.Connection] = None
+        if disk_cache_path:
+            self._disk = sqlite3.connect(disk_cache_path, check_same_thread=False)
+            self._disk.execute(
+                "CREATE TABLE IF NOT EXISTS weights (text TEXT PRIMARY KEY, result TEXT)"
+            )
+            self._disk.commit()
+
+    def parse(self, text: Optional[str]) -> Optional[str]:
+        # Bare numbers carry no unit; like any non-string they are not a weight
+        if not text or not isinstance(text, str):
+            return None
+
+        with self._lock:
+            cached = self._cache.get(text, _MISSING)
+            if cached is not _MISSING:
+                self._cache.move_to_end(text)
+                self._stats["hits"] += 1
+                return cached
+            self._stats["misses"] += 1
+
+        result = self._parse_uncached(text)
+
+        with self._lock:
+            self._cache[text] = result
+            if len(self._cache) > self.max_size:
+                self._cache.popitem(last=False)
+        return result
+
+    def _parse_uncached(self, text: str) -> Optional[str]:
+        recognized, result = parse_weight_fast(text)
+        if recognized:
+            with self._lock:
+                self._stats["fast_path"] += 1
+            return result
+
+        if self._disk is not None:
+            with self._lock:
+                row = self._disk.execute(
+                    "SELECT result FROM weights WHERE text = ?", (text,)
+                ).fetchone()
+            if row is not None:
+                with self._lock:
+                    self._stats["disk_hits"] += 1
+                return row[0]
+
+        result = parse_weight_quantulum(text)
+        with self._lock:
+            self._stats["fallbacks"] += 1
+            if self._disk is not None:
+                self._disk.execute(
+                    "INSERT OR REPLACE INTO weights (text, result) VALUES (?, ?)", (text, result)
+                )
+                self._disk.commit()
+        return result
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Hit/miss counters for the LRU cache plus how misses were resolved
+        (fast path, disk cache or quantulum3 fallback).
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats["size"] = len(self._cache)
+        return stats
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+            for key in self._stats:
+                self._stats[key] = 0
+
+    def close(self):
+        if self._disk is not None:
+            self._disk.close()
+            self._disk = None
+
+
+_default_parser: Optional[WeightParser] = None
+
+
+def get_weight_parser() -> WeightParser:
+    """
+    Process-wide parser. Set WEIGHT_CACHE_PATH to share quantulum3 results across runs.
+    """
+    global _default_parser
+    if _default_parser is None:
+        _default_parser = WeightParser(disk_cache_path=os.environ.get("WEIGHT_CACHE_PATH"))
+    return _default_parser
+
+
+def _cache_samples() -> List[Sample]:
+    if _default_parser is None:
+        return []
+    return [
+        ("baystate_weight_cache_events_total", {"event": event}, value)
+        for event, value in _default_parser.stats().items()
+        if event != "size"
+    ]
+
+
+REGISTRY.register_collector(
+    "baystate_weight_cache_events_total",
+    "Weight normalization cache hits and misses, and how misses were resolved",
+    _cache_samples,
+    kind="counter",
+)
@@ -0,0 +1,239 @@
+import logging
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple, TypeVar, Union
+
+import polars as pl
+
+# A blocking key is a column name, or a list of columns for a composite key (brand + weight)
+BlockingKey = Union[str, Sequence[str]]
+FrameT = TypeVar("FrameT", pl.DataFrame, pl.LazyFrame)
+
+BLOCK_KEY_PREFIX = "block_key_"
+# Keys used, in order, to break up blocks over the per-block comparison budget
+DEFAULT_SPLIT_KEYS = ["name_token", "size_bucket"]
+
+logger = logging.getLogger(__name__)
+
+
+def _name_token_expr() -> pl.Expr:
+    """
+    First word of the name after the brand, e.g. "acana puppy recipe" -> "puppy".
+    """
+    name = pl.col("name").cast(pl.String).str.to_lowercase().str.strip_chars()
+    brand = pl.col("brand").cast(pl.String).str.to_lowercase().fill_null("")
+    return name.str.strip_prefix(brand).str.extract(r"([a-z0-9]+)", 1)
+
+
+def _size_bucket_expr() -> pl.Expr:
+    """
+    Log2 bucket of the normalized weight in pounds, so "4.0 lb" and "64.0 oz" share a block.
+    """
+    parts = pl.col("weight").cast(pl.String).str.extract_groups(r"^([\d.]+)\s*(lb|oz)$")
+    value = parts.struct.field("1").cast(pl.Float64, strict=False)
+    pounds = pl.when(parts.struct.field("2") == "oz").then(value / 16).otherwise(value)
+    return (
+        pl.when(pounds > 0)
+        .then(pounds.log(2).round(0).cast(pl.Int64).cast(pl.String))
+        .otherwise(None)
+    )
+
+
+# Derived key name -> (expression, source columns it needs)
+DERIVED_KEYS: Dict[str, Tuple[Callable[[], pl.Expr], List[str]]] = {
+    "name_token": (_name_token_expr, ["name", "brand"]),
+    "size_bucket": (_size_bucket_expr, ["weight"]),
+}
+
+
+class BlockingReport(NamedTuple):
+    key: str
+    records: int
+    blocks: int
+    comparisons: int
+    largest_blocks: List[Tuple[str, int]]
+
+
+def key_columns(key: BlockingKey) -> List[str]:
+    return [key] if isinstance(key, str) else list(key)
+
+
+def key_name(key: BlockingKey) -> str:
+    return "+".join(key_columns(key))
+
+
+def parse_blocking_keys(spec: str) -> List[BlockingKey]:
+    """
+    Parses "brand+weight,brand+name_token,category" into blocking keys.
+    """
+    keys: List[BlockingKey] = []
+    for part in spec.split(","):
+        columns = [column.strip() for column in part.split("+") if column.strip()]
+        if columns:
+            keys.append(columns[0] if len(columns) == 1 else columns)
+    return keys
+
+
+def block_key_expr(key: BlockingKey) -> pl.Expr:
+    """
+    One string per record identifying its block; null when any key part is missing,
+    which, like SQL equality on NULL, keeps the record out of this rule's blocks.
+    """
+    return pl.concat_str([pl.col(c).cast(pl.String) for c in key_columns(key)], separator="|")
+
+
+def derive_keys(frame: FrameT, keys: Sequence[BlockingKey]) -> FrameT:
+    """
+    Adds the derived key columns referenced by keys that the frame can compute.
+    """
+    columns = frame.collect_schema().names() if isinstance(frame, pl.LazyFrame) else frame.columns
+    wanted = {column for key in keys for column in key_columns(key)}
+    exprs = []
+    for name in sorted(wanted):
+        if name in columns or name not in DERIVED_KEYS:
+            continue
+        build, sources = DERIVED_KEYS[name]
+        if all(source in columns for source in sources):
+            exprs.append(build().alias(name))
+    return frame.with_columns(exprs) if exprs else frame
+
+
+def usable_keys(df: pl.DataFrame, keys: Sequence[BlockingKey]) -> List[BlockingKey]:
+    return [key for key in keys if all(c in df.columns for c in key_columns(key))]
+
+
+def _block_sizes(block_keys: pl.Series) -> pl.DataFrame:
+    return (
+        block_keys.drop_nulls()
+        .value_counts(name="size")
+        .rename({block_keys.name: "block"})
+        .with_columns((pl.col("size") * (pl.col("size") - 1) // 2).alias("comparisons"))
+        .sort("comparisons", descending=True)
+    )
+
+
+def count_comparisons(block_keys: pl.Series) -> int:
+    """
+    Pairs a blocking rule on these block keys generates; null keys join nothing.
+    """
+    return int(_block_sizes(block_keys)["comparisons"].sum() or 0)
+
+
+def analyze_blocking(
+    df: pl.DataFrame, keys: Sequence[BlockingKey], top_n: int = 5
+) -> List[BlockingReport]:
+    """
+    Estimated pairwise comparisons per blocking key and its largest blocks.
+    Counts are per rule; Splink drops pairs an earlier rule already generated.
+    """
+    df = derive_keys(df, keys)
+    reports = []
+    for key in usable_keys(df, keys):
+        sizes = _block_sizes(df.select(block_key_expr(key).alias("block")).to_series())
+        reports.append(
+            BlockingReport(
+                key=key_name(key),
+                records=int(sizes["size"].sum() or 0),
+                blocks=sizes.height,
+                comparisons=int(sizes["comparisons"].sum() or 0),
+                largest_blocks=list(zip(sizes["block"][:top_n], sizes["size"][:top_n])),
+            )
+        )
+    return reports
+
+
+def format_blocking_report(reports: List[BlockingReport]) -> str:
+    lines = []
+    for report in reports:
+        largest = ", ".join(f"{block!r} ({size})" for block, size in report.largest_blocks)
+        lines.append(
+            f"{report.key}: {report.comparisons:,} comparisons across {report.blocks:,} blocks "
+            f"({report.records:,} records); largest: {largest or 'none'}"
+        )
+    return "\n".join(lines)
+
+
+def _split_oversized(
+    df: pl.DataFrame,
+    block_keys: pl.Series,
+    max_block_comparisons: int,
+    split_keys: Sequence[str],
+    label: str,
+) -> pl.Series:
+    """
+    Re-keys records in oversized blocks by appending split keys until each sub-block fits;
+    records still in oversized sub-blocks are dropped from the rule.
+    """
+    sizes = _block_sizes(block_keys)
+    oversized = sizes.filter(pl.col("comparisons") > max_block_comparisons)["block"]
+    for split_key in split_keys:
+        if oversized.is_empty():
+            return block_keys
+        if split_key not in df.columns:
+            continue
+        # A missing split value is a sub-block of its own, not a reason to drop the record
+        split = df[split_key].cast(pl.String).fill_null("")
+        block_keys = (
+            pl.DataFrame({"block": block_keys, "split": split})
+            .select(
+                pl.when(pl.col("block").is_in(oversized.to_list()))
+                .then(pl.concat_str(["block", "split"], separator="|"))
+                .otherwise(pl.col("block"))
+            )
+            .to_series()
+            .alias(block_keys.name)
+        )
+        for block in oversized:
+            logger.info(f"Blocking {label}: split oversized block {block!r} on {split_key}")
+        sizes = _block_sizes(block_keys)
+        oversized = sizes.filter(pl.col("comparisons") > max_block_comparisons)["block"]
+    if oversized.is_empty():
+        return block_keys
+
+    for block, size in oversized.to_frame().join(sizes, on="block").select("block", "size").rows():
+        logger.warning(f"Blocking {label}: skipped block {block!r} with {size} records")
+    return block_keys.set(block_keys.is_in(oversized.to_list()), None)
+
+
+def apply_comparison_budget(
+    df: pl.DataFrame,
+    keys: Sequence[BlockingKey],
+    max_block_comparisons: Optional[int] = None,
+    max_comparisons: Optional[int] = None,
+    split_keys: Sequence[str] = DEFAULT_SPLIT_KEYS,
+) -> Tuple[pl.DataFrame, List[str]]:
+    """
+    Materializes one block key column per blocking key and returns the frame with the
+    matching blocking rules. Blocks over max_block_comparisons are split on split_keys or
+    skipped; once the run-wide max_comparisons is spent, the largest remaining blocks of
+    later rules are skipped. Every split and skip is logged.
+    """
+    df = derive_keys(df, [*keys, *split_keys])
+    rules = []
+    remaining = max_comparisons
+    for index, key in enumerate(usable_keys(df, keys)):
+        label = key_name(key)
+        column = f"{BLOCK_KEY_PREFIX}{index}"
+        block_keys = df.select(block_key_expr(key).alias(column)).to_series()
+
+        if max_block_comparisons is not None:
+            block_keys = _split_oversized(df, block_keys, max_block_comparisons, split_keys, label)
+
+        if remaining is not None:
+            sizes = _block_sizes(block_keys)
+            # Keep the smallest blocks first, so the budget covers as many records as possible
+            cumulative = sizes.sort("comparisons").with_columns(
+                pl.col("comparisons").cum_sum().alias("cumulative")
+            )
+            over = cumulative.filter(pl.col("cumulative") > remaining)
+            for block, size in over.select("block", "size").rows():
+                logger.warning(
+                    f"Blocking {label}: comparison budget spent, skipped {block!r} ({size} records)"
+                )
+            if not over.is_empty():
+                block_keys = block_keys.set(block_keys.is_in(over["block"].to_list()), None)
+            remaining -= int(
+                cumulative.filter(pl.col("cumulative") <= remaining)["comparisons"].sum() or 0
+            )
+
+        df = df.with_columns(block_keys)
+        rules.append(f"l.{column} = r.{column}")
+    return df, rules
@@ -0,0 +1,60 @@
+from typing import Dict, Hashable, Iterable, List, Tuple
+
+
+class UnionFind:
+    """
+    Disjoint-set forest with path halving and union by size.
+    """
+
+    def __init__(self):
+        self.parent: Dict[Hashable, Hashable] = {}
+        self.size: Dict[Hashable, int] = {}
+
+    def add(self, item: Hashable):
+        if item not in self.parent:
+            self.parent[item] = item
+            self.size[item] = 1
+
+    def find(self, item: Hashable) -> Hashable:
+        self.add(item)
+        parent = self.parent
+        while parent[item] != item:
+            parent[item] = parent[parent[item]]
+            item = parent[item]
+        return item
+
+    def union(self, a: Hashable, b: Hashable):
+        root_a, root_b = self.find(a), self.find(b)
+        if root_a == root_b:
+            return
+        if self.size[root_a] < self.size[root_b]:
+            root_a, root_b = root_b, root_a
+        self.parent[root_b] = root_a
+        self.size[root_a] += self.size[root_b]
+
+    def groups(self) -> Dict[Hashable, List[Hashable]]:
+        components: Dict[Hashable, List[Hashable]] = {}
+        for item in self.parent:
+            components.setdefault(self.find(item), []).append(item)
+        return components
+
+
+def connected_components(
+    ids: Iterable[Hashable], edges: Iterable[Tuple[Hashable, Hashable]]
+) -> Dict[Hashable, Hashable]:
+    """
+    Maps every id to its cluster id (the smallest id in its connected component),
+    matching how Splink labels clusters.
+    """
+    forest = UnionFind()
+    for item in ids:
+        forest.add(item)
+    for left, right in edges:
+        forest.union(left, right)
+
+    assignments = {}
+    for members in forest.groups().values():
+        cluster_id = min(members)
+        for member in members:
+            assignments[member] = cluster_id
+    return assignments
@@ -1,44 +1,112 @@
+import copy
+import logging
+import os
+import time
+import duckdb
 import polars as pl
-from typing import List, Dict, Any
-from splink.duckdb.linker import DuckDBLinker
-from splink.duckdb.blocking_rule_library import block_on
-import splink.duckdb.comparison_library as cl
-import splink.duckdb.comparison_level_library as cll
+from typing import TYPE_CHECKING, List, Dict, Any, Optional, Tuple, Union
+
+from baystate_consolidator.pipelines.blocking import (
+    BLOCK_KEY_PREFIX,
+    BlockingKey,
+    BlockingReport,
+    analyze_blocking,
+    apply_comparison_budget,
+    count_comparisons,
+    derive_keys,
+    format_blocking_report,
+    key_columns,
+    usable_keys,
+)
+from baystate_consolidator.pipelines.fast_match import FAST_PATH_MAX_RECORDS, InProcessMatcher
+from baystate_consolidator.pipelines.incremental import (
+    ClusterStore,
+    assign_incremental_clusters,
+    clusters_from_assignments,
+    incremental_blocking_rules,
+    split_new_and_existing,
+)
+from baystate_consolidator.pipelines.lsh import LSH_COLUMN_PREFIX, MinHashLSH
+from baystate_consolidator.pipelines.model import ModelRegistry, load_model
+from baystate_consolidator.pipelines.sharding import ShardReport, format_shard_report, run_sharded
+from baystate_consolidator.utils.metrics import CANDIDATE_PAIRS, MATCHED_PAIRS
+
+if TYPE_CHECKING:
+    import pyarrow as pa
+
+NEW_RECORD_FLAG = "is_new_record"
+
+logger = logging.getLogger(__name__)
 
 
 class DeduplicationPipeline:
-    def __init__(self, output_path: str = "./matches.parquet"):
+    def __init__(
+        self,
+        output_path: str = "./matches.parquet",
+        blocking_columns: Optional[List[BlockingKey]] = None,
+        match_threshold: float = 0.9,
+        model_path: Optional[str] = None,
+        max_block_comparisons: Optional[int] = None,
+        max_comparisons: Optional[int] = None,
+        lsh: Optional[MinHashLSH] = None,
+        shard_key: Optional[BlockingKey] = None,
+        max_workers: Optional[int] = None,
+        fast_path_max_records: Optional[int] = FAST_PATH_MAX_RECORDS,
+    ):
         self.output_path = output_path
+        # Plain columns, derived keys (name_token, size_bucket) or lists of them as composites
+        self.blocking_columns: List[BlockingKey] = blocking_columns or ["brand", "category"]
+        self.match_threshold = match_threshold
+        self.max_block_comparisons = max_block_comparisons
+        self.max_comparisons = max_comparisons
+        # Extra blocking source over shingled names, for records whose brand is missing or off
+        self.lsh = lsh
+        # Run each partition of this key (e.g. brand) as its own linker in a process pool
+        self.shard_key = shard_key
+        self.max_workers = max_workers
+        # Trained m/u parameters; when present, prediction skips all estimation
+        self.model_settings: Optional[Dict[str, Any]] = (
+            load_model(model_path) if model_path else None
+        )
+        # Batches up to this size are matched in-process without Splink; None disables
+        self.fast_path_max_records = fast_path_max_records
+        self.matcher = InProcessMatcher.from_settings(self.model_settings)
 
-    def _get_settings(self) -> Dict[str, Any]:
+    def _get_settings(self, blocking_rules: Optional[List[Any]] = None) -> Dict[str, Any]:
+        # Splink takes over a second to import; the in-process fast path never needs it
+        from splink.duckdb.blocking_rule_library import block_on
+        import splink.duckdb.comparison_library as cl
+        import splink.duckdb.comparison_level_library as cll
+
+        if blocking_rules is None:
+            blocking_rules = [block_on(key_columns(key)) for key in self.blocking_columns]
+        if self.model_settings is not None:
+            settings = copy.deepcopy(self.model_settings)
+            settings["blocking_rules_to_generate_predictions"] = blocking_rules
+            return settings
         return {
             "link_type": "dedupe_only",
-            "blocking_rules_to_generate_predictions": [
-                block_on("brand"),
-                block_on("category"),
-            ],
+            "blocking_rules_to_generate_predictions": blocking_rules,
             "comparisons": [
-                cl.LevenshteinAtThresholds("name", [2, 5]),
-                cl.ExactMatch("brand"),
-                cl.ExactMatch("weight"),
+                cl.levenshtein_at_thresholds("name", [2, 5]),
+                cl.exact_match("brand"),
+                cl.exact_match("weight"),
                 # Custom price comparison
                 {
                     "output_column_name": "price",
                     "comparison_description": "Price difference",
                     "comparison_levels": [
-                        cll.NullLevel("price"),
-                        cll.ExactMatchLevel("price"),
+                        cll.null_level("price"),
+                        cll.exact_match_level("price"),
                         {
                             "sql_condition": "abs(price_l - price_r) <= 1.0",
                             "label_for_charts": "Difference <= 1.0",
-                            "is_match": True,
                         },
                         {
                             "sql_condition": "abs(price_l - price_r) <= 5.0",
                             "label_for_charts": "Difference <= 5.0",
-                            "is_match": True,
                         },
-                        cll.ElseLevel("price"),
+                        cll.else_level(),
                     ],
                 },
             ],
@@ -46,43 +114,286 @@ class DeduplicationPipeline:
             "retain_intermediate_calculation_columns": True,
         }
 
-    def run(self, data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    def checkpoint_config(self) -> Dict[str, Any]:
+        """
+        Everything that changes run()'s output for the same input, for checkpoint keys.
+        """
+        return {
+            "blocking_columns": self.blocking_columns,
+            "match_threshold": self.match_threshold,
+            "max_block_comparisons": self.max_block_comparisons,
+            "max_comparisons": self.max_comparisons,
+            "lsh": self.lsh
+            and {
+                "bands": self.lsh.bands,
+                "rows": self.lsh.rows,
+                "shingle_size": self.lsh.shingle_size,
+                "max_bucket_size": self.lsh.max_bucket_size,
+                "seed": self.lsh.seed,
+            },
+            "shard_key": self.shard_key,
+            # The in-process matcher and the Splink linker may score borderline pairs apart
+            "fast_path_max_records": self.fast_path_max_records,
+            # Default comparisons are code; CHECKPOINT_VERSION covers changes to them
+            "model_settings": self.model_settings,
+        }
+
+    def run(self, data: Union[List[Dict[str, Any]], pl.DataFrame, "pa.Table"]) -> pl.DataFrame:
         """
         Runs the deduplication pipeline on the input data.
-        Returns a list of clusters, where each cluster contains the source records.
+        Returns the source records with a cluster_id column, as an Arrow-backed frame.
+        With a shard_key the batch is split and clustered per shard (see run_sharded).
+        """
+        if data is None or len(data) == 0:
+            return pl.DataFrame()
+
+        df = _with_unique_id(_to_frame(data))
+        if self._use_fast_path(df):
+            return self._cluster_in_process(df)
+
+        if self.shard_key is not None:
+            clustered, reports = self.run_sharded(df, self.shard_key, self.max_workers)
+            logger.info(format_shard_report(self.shard_key, reports))
+            return clustered
+
+        return self._cluster(df)
+
+    def _use_fast_path(self, df: pl.DataFrame) -> bool:
+        return (
+            self.fast_path_max_records is not None
+            and len(df) <= self.fast_path_max_records
+            and self.matcher is not None
+            and self.matcher.supports(df)
+        )
+
+    def run_sharded(
+        self,
+        data: Union[List[Dict[str, Any]], pl.DataFrame, "pa.Table"],
+        shard_key: BlockingKey,
+        max_workers: Optional[int] = None,
+        num_shards: Optional[int] = None,
+        broadcast_missing: bool = False,
+    ) -> Tuple[pl.DataFrame, List[ShardReport]]:
+        """
+        Like run(), but partitions the batch by shard_key and predicts and clusters each
+        shard in its own worker process. Returns the clustered frame and per-shard reports.
+        """
+        df = _with_unique_id(_to_frame(data))
+        return run_sharded(self, df, shard_key, max_workers, num_shards, broadcast_missing)
+
+    def _block(self, df: pl.DataFrame) -> Tuple[pl.DataFrame, List[str]]:
+        """
+        Adds the block key (and LSH band) columns and returns the matching blocking rules.
+        """
+        for report in self.analyze_blocking(df):
+            logger.info(f"Blocking {format_blocking_report([report])}")
+        blocked, rules = apply_comparison_budget(
+            df, self.blocking_columns, self.max_block_comparisons, self.max_comparisons
+        )
+        if self.lsh is not None and "name" in blocked.columns:
+            blocked = blocked.with_columns(self.lsh.band_keys(blocked["name"].to_list()))
+            rules = rules + self.lsh.blocking_rules()
+        return blocked, rules
+
+    def _cluster_in_process(self, df: pl.DataFrame) -> pl.DataFrame:
+        """
+        Same clusters as _cluster, scored by InProcessMatcher instead of a DuckDB linker.
         """
-        if not data:
+        blocked, _ = self._block(df)
+        assignments, candidates, matched = self.matcher.cluster(blocked, self.match_threshold)
+        CANDIDATE_PAIRS.inc(candidates)
+        MATCHED_PAIRS.inc(matched)
+        return df.join(assignments, on="unique_id", how="left")
+
+    def _cluster(
+        self, df: pl.DataFrame, connection: Optional[duckdb.DuckDBPyConnection] = None
+    ) -> pl.DataFrame:
+        from splink.duckdb.linker import DuckDBLinker
+
+        if connection is None:
+            connection = duckdb.connect()
+
+        blocked, rules = self._block(df)
+        CANDIDATE_PAIRS.inc(
+            sum(
+                count_comparisons(blocked[column])
+                for column in blocked.columns
+                if column.startswith((BLOCK_KEY_PREFIX, LSH_COLUMN_PREFIX))
+            )
+        )
+
+        # DuckDB scans the Arrow buffers in place, no pandas copy of the batch
+        linker = DuckDBLinker(blocked.to_arrow(), self._get_settings(rules), connection)
+
+        # Predict Matches
+        df_predictions = linker.predict(threshold_match_probability=self.match_threshold)
+        matched = linker.query_sql(f"SELECT count(*) AS pairs FROM {df_predictions.physical_name}")
+        MATCHED_PAIRS.inc(int(matched["pairs"].iloc[0]))
+
+        # Cluster
+        df_clusters = linker.cluster_pairwise_predictions_at_threshold(
+            df_predictions, self.match_threshold
+        )
+
+        assignments = _fetch_frame(
+            connection, f"SELECT unique_id, cluster_id FROM {df_clusters.physical_name}"
+        )
+        return df.join(assignments, on="unique_id", how="left")
+
+    def analyze_blocking(
+        self, data: Union[List[Dict[str, Any]], pl.DataFrame, "pa.Table"], top_n: int = 5
+    ) -> List[BlockingReport]:
+        """
+        Estimated comparison count and largest blocks for each blocking key, before any
+        budget is applied. Cheap enough to run before every batch.
+        """
+        return analyze_blocking(_to_frame(data), self.blocking_columns, top_n)
+
+    def run_incremental(
+        self, data: Union[List[Dict[str, Any]], pl.DataFrame, "pa.Table"], store: ClusterStore
+    ) -> List[Dict[str, Any]]:
+        """
+        Links a batch of new records against records clustered in earlier runs.
+        Only new-new and new-existing pairs within shared blocks are scored, so the cost
+        follows the size of the delta rather than the catalog. New records join existing
+        clusters (or merge the clusters they bridge); existing cluster IDs never change
+        except when merged into another. Returns the clusters touched by this batch.
+        """
+        if data is None or len(data) == 0:
             return []
 
-        # Convert to Polars DataFrame for efficient handling
-        df = pl.DataFrame(data)
+        new_df = _to_frame(data)
+        if "unique_id" not in new_df.columns:
+            raise ValueError("Incremental deduplication requires a stable unique_id column.")
+        new_df = new_df.with_columns(pl.col("unique_id").cast(pl.String))
 
-        # Ensure we have a unique ID for Splink
+        existing_df = store.load_blocks(new_df, self.blocking_columns)
+        existing = {}
+        if not existing_df.is_empty():
+            existing = dict(
+                zip(existing_df["unique_id"].to_list(), existing_df["cluster_id"].to_list())
+            )
+
+        df = derive_keys(
+            split_new_and_existing(new_df, existing_df, NEW_RECORD_FLAG), self.blocking_columns
+        )
+        rules = incremental_blocking_rules(usable_keys(df, self.blocking_columns), NEW_RECORD_FLAG)
+        edges = []
+        if len(df) > 1 and rules:
+            pairs = self._predict_pairs(df, self._get_settings(rules))
+            MATCHED_PAIRS.inc(len(pairs))
+            edges = list(zip(pairs["unique_id_l"].to_list(), pairs["unique_id_r"].to_list()))
+
+        assignments, merges = assign_incremental_clusters(
+            new_df["unique_id"].to_list(), existing, edges
+        )
+
+        assigned = pl.DataFrame(
+            {"unique_id": list(assignments.keys()), "cluster_id": list(assignments.values())}
+        )
+        store.update(new_df.join(assigned, on="unique_id", how="left"), merges)
+
+        return clusters_from_assignments(assignments)
+
+    def _predict_pairs(self, df: pl.DataFrame, settings: Dict[str, Any]) -> pl.DataFrame:
+        """
+        Scores candidate pairs and returns those above the match threshold.
+        """
+        from splink.duckdb.linker import DuckDBLinker
+
+        connection = duckdb.connect()
+        linker = DuckDBLinker(df.to_arrow(), settings, connection)
+        df_predictions = linker.predict(threshold_match_probability=self.match_threshold)
+        return _fetch_frame(
+            connection,
+            "SELECT unique_id_l, unique_id_r, match_probability "
+            f"FROM {df_predictions.physical_name}",
+        )
+
+    def train(
+        self,
+        data: Union[List[Dict[str, Any]], pl.DataFrame],
+        registry: ModelRegistry,
+        max_pairs: int = 1_000_000,
+        em_blocking_rules: Optional[List[Any]] = None,
+        seed: Optional[int] = None,
+    ) -> str:
+        """
+        Estimates u by random sampling and m by expectation-maximisation on a sample,
+        then saves the model as the next version in the registry. Returns its path.
+        """
+        from splink.duckdb.blocking_rule_library import block_on
+        from splink.duckdb.linker import DuckDBLinker
+
+        df = derive_keys(_to_frame(data), self.blocking_columns)
         if "unique_id" not in df.columns:
             df = df.with_columns(pl.arange(0, pl.len()).alias("unique_id"))
+        if em_blocking_rules is None:
+            # Each rule leaves the comparisons it does not block on free to be estimated
+            em_blocking_rules = [block_on("brand"), block_on("name")]
 
-        # Initialize Linker
-        linker = DuckDBLinker(df.to_pandas(), self._get_settings())
+        timings: Dict[str, float] = {}
 
-        # Predict Matches
-        df_predictions = linker.predict(threshold_match_probability=0.9)
+        def timed(step: str, func, *args, **kwargs):
+            started = time.perf_counter()
+            result = func(*args, **kwargs)
+            timings[step] = round(time.perf_counter() - started, 3)
+            logger.info(f"Training step {step} took {timings[step]:.2f}s")
+            return result
 
-        # Cluster
-        df_clusters = linker.cluster_pairwise_predictions_at_threshold(df_predictions, 0.9)
-
-        # Convert back to list of dicts for return
-        # Group by cluster_id
-        clusters = (
-            df_clusters.as_pandas_dataframe()
-            .groupby("cluster_id")["unique_id"]
-            .apply(list)
-            .to_dict()
+        linker = timed("setup", DuckDBLinker, df.to_arrow(), self._get_settings())
+        timed(
+            "estimate_u",
+            linker.estimate_u_using_random_sampling,
+            max_pairs=max_pairs,
+            seed=seed,
         )
+        for index, rule in enumerate(em_blocking_rules):
+            timed(
+                f"estimate_m_em_{index}",
+                linker.estimate_parameters_using_expectation_maximisation,
+                rule,
+            )
+
+        model_path = registry.next_path()
+        os.makedirs(registry.model_dir, exist_ok=True)
+        timed("save", linker.save_model_to_json, model_path)
+        registry.write_metadata(
+            model_path,
+            {"records": len(df), "max_pairs": max_pairs, "timings": timings},
+        )
+        logger.info(f"Saved trained model to {model_path}")
+        return model_path
+
+
+def _to_frame(data: Union[List[Dict[str, Any]], pl.DataFrame, "pa.Table"]) -> pl.DataFrame:
+    if isinstance(data, pl.DataFrame):
+        return data
+    if type(data).__module__.startswith("pyarrow"):
+        # Wraps the Arrow buffers without copying
+        return pl.from_arrow(data)
+    return pl.DataFrame(data)
+
+
+def _with_unique_id(df: pl.DataFrame) -> pl.DataFrame:
+    # Ensure we have a unique ID for Splink
+    if "unique_id" not in df.columns:
+        df = df.with_columns(pl.arange(0, pl.len()).alias("unique_id"))
+    return df
+
+
+def group_clusters(clustered: pl.DataFrame) -> pl.DataFrame:
+    """
+    Collapses the frame returned by run() to one row per cluster with its record_ids.
+    """
+    if clustered.is_empty():
+        return pl.DataFrame(schema={"cluster_id": pl.String, "record_ids": pl.List(pl.String)})
+    return clustered.group_by("cluster_id", maintain_order=True).agg(
+        pl.col("unique_id").alias("record_ids")
+    )
 
-        result = []
-        # Map back to original data
-        # Note: In a real scenario, we'd join back. Here we just return the grouped IDs.
-        for cluster_id, record_ids in clusters.items():
-            result.append({"cluster_id": cluster_id, "record_ids": record_ids})
 
-        return result
+def _fetch_frame(connection: duckdb.DuckDBPyConnection, sql: str) -> pl.DataFrame:
+    # Splink's own accessors go through pandas; read the linker's tables as Arrow through
+    # the connection it was given instead
+    return connection.sql(sql).pl()
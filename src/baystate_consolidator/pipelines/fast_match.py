@@ -0,0 +1,248 @@
+import math
+from typing import Any, Dict, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+import polars as pl
+
+from baystate_consolidator.pipelines.blocking import BLOCK_KEY_PREFIX
+from baystate_consolidator.pipelines.clustering import connected_components
+from baystate_consolidator.pipelines.lsh import LSH_COLUMN_PREFIX
+from baystate_consolidator.utils.hashing import pairs_from_buckets
+
+# Batches up to this many records skip the DuckDB linker
+FAST_PATH_MAX_RECORDS = 500
+LEVENSHTEIN = "levenshtein"
+EXACT = "exact"
+ABS_DIFFERENCE = "abs_difference"
+# Splink's default prior when no model has been trained
+DEFAULT_PRIOR = 0.0001
+
+
+class ComparisonSpec(NamedTuple):
+    column: str
+    kind: str
+    # Levenshtein distances or absolute differences, tightest first
+    thresholds: Tuple[float, ...] = ()
+
+    @property
+    def num_levels(self) -> int:
+        """
+        Non-null levels: exact match, one per threshold, else.
+        """
+        return len(self.thresholds) + 2
+
+
+# Mirrors the comparisons of DeduplicationPipeline._get_settings
+DEFAULT_COMPARISONS = (
+    ComparisonSpec("name", LEVENSHTEIN, (2, 5)),
+    ComparisonSpec("brand", EXACT),
+    ComparisonSpec("weight", EXACT),
+    ComparisonSpec("price", ABS_DIFFERENCE, (1.0, 5.0)),
+)
+
+
+def default_level_weights(num_levels: int) -> np.ndarray:
+    """
+    log2(m/u) of Splink's default m and u values, ordered from exact match to else.
+    """
+    # Splink spreads match weights from -5 (else) to 3 and gives exact matches 10
+    weights = [-5.0] if num_levels == 2 else np.linspace(-5, 3, num_levels - 1).tolist()
+    return np.array([10.0, *reversed(weights)])
+
+
+def levenshtein(
+    left: Sequence[str], right: Sequence[str], max_distance: Optional[int] = None
+) -> np.ndarray:
+    """
+    Edit distance of every (left[i], right[i]) pair, over UTF-8 bytes like DuckDB's
+    levenshtein(). With max_distance, larger distances come back as max_distance + 1 and
+    only the diagonal band of the DP table that can stay within it is computed.
+    """
+    a_codes, a_lengths = _encode(left)
+    b_codes, b_lengths = _encode(right)
+    longest = max(a_codes.shape[1], b_codes.shape[1])
+    band = longest if max_distance is None else max_distance
+    cap = band + 1
+    distances = np.minimum(np.abs(a_lengths - b_lengths), cap)
+    # Pairs whose lengths differ by more than the band cannot come within it
+    rows = np.flatnonzero(distances <= band)
+    if not len(rows):
+        return distances
+    a_codes, a_lengths = a_codes[rows], a_lengths[rows]
+    b_lengths = b_lengths[rows]
+
+    # Cell d of row i holds D[i][i + d - band]; right is padded so each row is a slice
+    width = 2 * band + 1
+    offsets = np.arange(width)
+    padded = np.zeros((len(rows), band + longest + band + 1), dtype=np.int16)
+    padded[:, band : band + b_codes.shape[1]] = b_codes[rows]
+    column = offsets - band
+    valid = (column >= 0) & (column <= b_lengths[:, None])
+    previous = np.where(valid, column, cap)
+    result = np.minimum(b_lengths, cap)
+    for i in range(1, int(a_lengths.max(initial=0)) + 1):
+        column = offsets + (i - band)
+        substitution = padded[:, i - 1 : i - 1 + width] != a_codes[:, i - 1 : i]
+        deletion = np.empty_like(previous)
+        deletion[:, :-1] = previous[:, 1:] + 1
+        deletion[:, -1] = cap
+        current = np.minimum(previous + substitution, deletion)
+        current[:, column == 0] = i
+        # Insertions within the row: a running minimum of D[i][j'] + (j - j')
+        current = np.minimum.accumulate(current - offsets, axis=1) + offsets
+        valid = (column >= 0) & (column <= b_lengths[:, None])
+        current = np.where(valid, np.minimum(current, cap), cap)
+        done = np.flatnonzero(a_lengths == i)
+        end = b_lengths[done] - i + band
+        inside = (end >= 0) & (end < width)
+        result[done[inside]] = current[done[inside], end[inside]]
+        previous = current
+    distances[rows] = result
+    return distances
+
+
+def _encode(texts: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+    encoded = [text.encode("utf-8") for text in texts]
+    lengths = np.array([len(text) for text in encoded], dtype=np.int64)
+    codes = np.zeros((len(encoded), int(lengths.max(initial=0))), dtype=np.uint8)
+    for row, text in enumerate(encoded):
+        codes[row, : len(text)] = np.frombuffer(text, dtype=np.uint8)
+    return codes, lengths
+
+
+def candidate_pairs(blocked: pl.DataFrame) -> np.ndarray:
+    """
+    Distinct (i, j) row pairs, i < j, sharing a block in any block key or LSH band column:
+    the pairs Splink generates from the same blocking rules.
+    """
+    columns = [c for c in blocked.columns if c.startswith((BLOCK_KEY_PREFIX, LSH_COLUMN_PREFIX))]
+    if not columns:
+        return np.empty((0, 2), dtype=np.int64)
+    buckets = blocked.select(
+        (pl.col(column).rank("dense").cast(pl.Int64) - 1).fill_null(-1) for column in columns
+    ).to_numpy()
+    return pairs_from_buckets(buckets, blocked.height)
+
+
+class InProcessMatcher:
+    """
+    Scores candidate pairs with the same Fellegi-Sunter comparisons the Splink linker
+    uses (name Levenshtein thresholds, exact brand and weight, price difference bands),
+    as NumPy operations over the pair index arrays. Meant for batches small enough that
+    linker setup would dominate.
+    """
+
+    def __init__(
+        self,
+        comparisons: Sequence[ComparisonSpec] = DEFAULT_COMPARISONS,
+        level_weights: Optional[Sequence[np.ndarray]] = None,
+        prior: float = DEFAULT_PRIOR,
+    ):
+        self.comparisons = list(comparisons)
+        self.level_weights = [
+            np.asarray(weights, dtype=np.float64)
+            for weights in (
+                level_weights or [default_level_weights(c.num_levels) for c in self.comparisons]
+            )
+        ]
+        self.prior_weight = math.log2(prior / (1 - prior))
+
+    @classmethod
+    def from_settings(cls, settings: Optional[Dict[str, Any]]) -> Optional["InProcessMatcher"]:
+        """
+        Matcher for a trained Splink model, or None when the model has comparisons or
+        term-frequency adjustments this matcher cannot reproduce.
+        """
+        if settings is None:
+            return cls()
+        by_column = {
+            comparison.get("output_column_name"): comparison
+            for comparison in settings.get("comparisons", [])
+        }
+        if set(by_column) != {spec.column for spec in DEFAULT_COMPARISONS}:
+            return None
+        level_weights = []
+        for spec in DEFAULT_COMPARISONS:
+            levels = [
+                level
+                for level in by_column[spec.column].get("comparison_levels", [])
+                if not level.get("is_null_level")
+            ]
+            if len(levels) != spec.num_levels:
+                return None
+            weights = []
+            for level in levels:
+                m, u = level.get("m_probability"), level.get("u_probability")
+                if not m or not u or level.get("tf_adjustment_column"):
+                    return None
+                weights.append(math.log2(m / u))
+            level_weights.append(np.array(weights))
+        prior = settings.get("probability_two_random_records_match", DEFAULT_PRIOR)
+        return cls(DEFAULT_COMPARISONS, level_weights, prior)
+
+    def supports(self, df: pl.DataFrame) -> bool:
+        return all(spec.column in df.columns for spec in self.comparisons)
+
+    def _levels(self, spec: ComparisonSpec, df: pl.DataFrame, pairs: np.ndarray) -> np.ndarray:
+        """
+        Level per pair: 0 for an exact match, 1.. for each threshold, the last for else,
+        and -1 when either side is null.
+        """
+        left, right = pairs[:, 0], pairs[:, 1]
+        column = df[spec.column]
+        if spec.kind == ABS_DIFFERENCE:
+            column = column.cast(pl.Float64, strict=False)
+        null = column.is_null().to_numpy()
+        # Dense codes make equality one integer comparison for any dtype
+        codes = column.rank("dense").fill_null(0).to_numpy()
+        levels = np.full(len(pairs), len(spec.thresholds) + 1, dtype=np.int64)
+
+        if spec.kind == LEVENSHTEIN:
+            values = column.cast(pl.String).to_numpy()
+            fuzzy = np.flatnonzero(~null[left] & ~null[right] & (codes[left] != codes[right]))
+            distances = levenshtein(
+                values[left[fuzzy]], values[right[fuzzy]], max_distance=int(spec.thresholds[-1])
+            )
+            fuzzy_levels = np.full(len(fuzzy), len(spec.thresholds) + 1, dtype=np.int64)
+            for level, threshold in reversed(list(enumerate(spec.thresholds, start=1))):
+                fuzzy_levels[distances <= threshold] = level
+            levels[fuzzy] = fuzzy_levels
+        elif spec.kind == ABS_DIFFERENCE:
+            values = column.fill_null(np.nan).to_numpy()
+            difference = np.abs(values[left] - values[right])
+            for level, threshold in reversed(list(enumerate(spec.thresholds, start=1))):
+                levels[difference <= threshold] = level
+
+        levels[codes[left] == codes[right]] = 0
+        levels[null[left] | null[right]] = -1
+        return levels
+
+    def match_probability(self, df: pl.DataFrame, pairs: np.ndarray) -> np.ndarray:
+        weight = np.full(len(pairs), self.prior_weight)
+        for spec, level_weights in zip(self.comparisons, self.level_weights):
+            levels = self._levels(spec, df, pairs)
+            # Null levels carry no evidence either way
+            weight += np.where(levels >= 0, level_weights[np.maximum(levels, 0)], 0.0)
+        odds = np.exp2(weight)
+        return odds / (1 + odds)
+
+    def cluster(self, blocked: pl.DataFrame, threshold: float) -> Tuple[pl.DataFrame, int, int]:
+        """
+        unique_id -> cluster_id for a frame with block key columns, labelled with the
+        smallest unique_id like Splink. Also returns the candidate and matched pair counts.
+        """
+        pairs = candidate_pairs(blocked)
+        matched = pairs[self.match_probability(blocked, pairs) >= threshold]
+        ids = blocked["unique_id"].to_list()
+        assignments = connected_components(
+            ids, ((ids[left], ids[right]) for left, right in matched.tolist())
+        )
+        frame = pl.DataFrame(
+            {
+                "unique_id": pl.Series(list(assignments), dtype=blocked.schema["unique_id"]),
+                "cluster_id": pl.Series(
+                    list(assignments.values()), dtype=blocked.schema["unique_id"]
+                ),
+            }
+        )
+        return frame, len(pairs), len(matched)
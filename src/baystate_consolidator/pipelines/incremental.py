@@ -0,0 +1,171 @@
+import os
+from typing import Dict, Hashable, Iterable, List, Optional, Tuple
+
+import polars as pl
+
+from baystate_consolidator.pipelines.blocking import (
+    BlockingKey,
+    block_key_expr,
+    derive_keys,
+    key_columns,
+)
+from baystate_consolidator.pipelines.clustering import UnionFind
+
+# Columns the comparisons and blocking rules need, kept for records clustered in earlier runs
+STORE_COLUMNS = ["unique_id", "sku", "name", "brand", "category", "weight", "price"]
+
+
+class ClusterStore:
+    """
+    Parquet-backed record of every source record clustered so far and its cluster_id.
+    Lets an incremental run score only the new records against the existing records
+    that share a block with them.
+    """
+
+    def __init__(self, path: str = "./clusters.parquet"):
+        self.path = path
+
+    def exists(self) -> bool:
+        return os.path.exists(self.path)
+
+    def load_blocks(self, new_df: pl.DataFrame, blocking_keys: List[BlockingKey]) -> pl.DataFrame:
+        """
+        Returns stored records that share at least one block with new_df.
+        Filters on plain columns are pushed down into the Parquet scan, so untouched
+        blocks are never read; composite and derived keys are computed during the scan.
+        """
+        if not self.exists():
+            return pl.DataFrame()
+
+        lazy = pl.scan_parquet(self.path)
+        schema = lazy.collect_schema()
+        derived = derive_keys(lazy, blocking_keys)
+        derived_schema = derived.collect_schema()
+        new_df = derive_keys(new_df, blocking_keys)
+        conditions = []
+        for key in blocking_keys:
+            columns = key_columns(key)
+            if not all(c in new_df.columns and c in derived_schema for c in columns):
+                continue
+            if isinstance(key, str) and key in schema:
+                values = new_df[key].drop_nulls().unique()
+                if len(values):
+                    conditions.append(pl.col(key).is_in(values.cast(schema[key]).to_list()))
+                continue
+            values = new_df.select(block_key_expr(key)).to_series().drop_nulls().unique()
+            if len(values):
+                conditions.append(block_key_expr(key).is_in(values.to_list()))
+        # Re-scraped records must come back too, to keep their cluster
+        conditions.append(pl.col("unique_id").is_in(new_df["unique_id"].cast(pl.String).to_list()))
+
+        predicate = conditions[0]
+        for condition in conditions[1:]:
+            predicate = predicate | condition
+        return derived.filter(predicate).select(schema.names()).collect()
+
+    def update(self, records: pl.DataFrame, merges: Dict[str, str]):
+        """
+        Writes new/re-scraped records with their cluster_id and re-labels merged clusters.
+        """
+        columns = [c for c in STORE_COLUMNS if c in records.columns] + ["cluster_id"]
+        records = records.select(columns).with_columns(
+            pl.col("unique_id").cast(pl.String), pl.col("cluster_id").cast(pl.String)
+        )
+
+        if self.exists():
+            existing = pl.scan_parquet(self.path).join(
+                records.lazy().select("unique_id"), on="unique_id", how="anti"
+            )
+            if merges:
+                existing = existing.with_columns(
+                    pl.col("cluster_id").replace(merges).alias("cluster_id")
+                )
+            combined = pl.concat([existing, records.lazy()], how="diagonal_relaxed")
+        else:
+            combined = records.lazy()
+
+        tmp_path = f"{self.path}.tmp"
+        combined.sink_parquet(tmp_path)
+        os.replace(tmp_path, self.path)
+
+
+def assign_incremental_clusters(
+    new_ids: Iterable[str],
+    existing: Dict[str, str],
+    edges: Iterable[Tuple[str, str]],
+) -> Tuple[Dict[str, str], Dict[str, str]]:
+    """
+    Attaches new records to existing clusters, or merges clusters they bridge.
+
+    existing maps previously clustered unique_id -> cluster_id; edges are scored matches.
+    Returns (assignments for every record in a touched component, merges old -> surviving id).
+    A component keeps its smallest existing cluster_id, so IDs stay stable across runs;
+    components made only of new records get their smallest unique_id, as Splink does.
+    """
+    forest = UnionFind()
+    new_ids = list(new_ids)
+    for unique_id in new_ids:
+        forest.add(("record", unique_id))
+    for unique_id, cluster_id in existing.items():
+        forest.union(("record", unique_id), ("cluster", cluster_id))
+    for left, right in edges:
+        forest.union(("record", left), ("record", right))
+
+    touched = {forest.find(("record", unique_id)) for unique_id in new_ids}
+    assignments: Dict[str, str] = {}
+    merges: Dict[str, str] = {}
+
+    for root, members in forest.groups().items():
+        if root not in touched:
+            continue
+        cluster_ids = [key for kind, key in members if kind == "cluster"]
+        record_ids = [key for kind, key in members if kind == "record"]
+        if cluster_ids:
+            cluster_id = min(cluster_ids)
+            for old_id in cluster_ids:
+                if old_id != cluster_id:
+                    merges[old_id] = cluster_id
+        else:
+            cluster_id = min(record_ids)
+        for unique_id in record_ids:
+            assignments[unique_id] = cluster_id
+
+    return assignments, merges
+
+
+def clusters_from_assignments(assignments: Dict[Hashable, Hashable]) -> List[Dict]:
+    clusters: Dict[Hashable, List[Hashable]] = {}
+    for unique_id, cluster_id in assignments.items():
+        clusters.setdefault(cluster_id, []).append(unique_id)
+    return [
+        {"cluster_id": cluster_id, "record_ids": record_ids}
+        for cluster_id, record_ids in clusters.items()
+    ]
+
+
+def incremental_blocking_rules(keys: List[BlockingKey], flag: str) -> List[str]:
+    """
+    Blocking rules that only generate pairs involving at least one new record.
+    """
+    rules = []
+    for key in keys:
+        condition = " AND ".join(f"l.{c} = r.{c}" for c in key_columns(key))
+        rules.append(f"{condition} AND (l.{flag} OR r.{flag})")
+    return rules
+
+
+def split_new_and_existing(
+    new_df: pl.DataFrame, existing_df: Optional[pl.DataFrame], flag: str
+) -> pl.DataFrame:
+    """
+    Stacks new records (flag = true) on top of the stored ones (flag = false).
+    Stored versions of re-scraped records are replaced by the new version.
+    """
+    new_df = new_df.with_columns(pl.col("unique_id").cast(pl.String), pl.lit(True).alias(flag))
+    if existing_df is None or existing_df.is_empty():
+        return new_df
+    existing_df = existing_df.with_columns(pl.col("unique_id").cast(pl.String)).join(
+        new_df.select("unique_id"), on="unique_id", how="anti"
+    )
+    existing_df = existing_df.drop("cluster_id").with_columns(pl.lit(False).alias(flag))
+    return pl.concat([new_df, existing_df], how="diagonal_relaxed")
@@ -0,0 +1,164 @@
+import logging
+import time
+from typing import Iterable, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+import polars as pl
+
+from baystate_consolidator.utils.hashing import pairs_from_buckets, shingle_hashes
+
+LSH_COLUMN_PREFIX = "lsh_band_"
+# Shingle hashes are folded to 32 bits before the multiply-add-shift permutations
+_MASK_32 = np.uint64(0xFFFFFFFF)
+_SHIFT_32 = np.uint64(32)
+# Upper bound on the (shingles x permutations) matrix materialized at once
+_CHUNK_ELEMENTS = 1 << 22
+
+logger = logging.getLogger(__name__)
+
+
+class MinHashLSH:
+    """
+    MinHash signatures over character shingles of product names, banded for
+    locality-sensitive hashing. Two names land in the same bucket of at least one band
+    with probability 1 - (1 - s^rows)^bands for Jaccard similarity s, so the bands/rows
+    pair sets the similarity threshold (roughly (1/bands)^(1/rows)) and the recall/pair trade-off.
+    """
+
+    def __init__(
+        self,
+        bands: int = 20,
+        rows: int = 5,
+        shingle_size: int = 4,
+        max_bucket_size: int = 500,
+        seed: int = 1,
+    ):
+        self.bands = bands
+        self.rows = rows
+        self.shingle_size = shingle_size
+        self.max_bucket_size = max_bucket_size
+        self.seed = seed
+        rng = np.random.default_rng(seed)
+        # Odd multipliers keep the multiply-add-shift family universal
+        self._a = rng.integers(1, 2**63, size=self.num_perm, dtype=np.uint64) | np.uint64(1)
+        self._b = rng.integers(0, 2**63, size=self.num_perm, dtype=np.uint64)
+
+    @property
+    def num_perm(self) -> int:
+        return self.bands * self.rows
+
+    @property
+    def threshold(self) -> float:
+        return (1 / self.bands) ** (1 / self.rows)
+
+    def signatures(self, texts: Sequence[Optional[str]]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Returns (signatures, has_shingles): a (len(texts), num_perm) uint32 matrix of
+        minimum hash values and a mask of the texts that had any shingle to hash.
+        """
+        hashes, owner = shingle_hashes(texts, self.shingle_size)
+        folded = (hashes ^ (hashes >> _SHIFT_32)) & _MASK_32
+        signatures = np.full((len(texts), self.num_perm), np.iinfo(np.uint32).max, np.uint32)
+        if not len(folded):
+            return signatures, np.zeros(len(texts), dtype=bool)
+
+        # Chunk on text boundaries so every chunk holds whole texts
+        boundaries = np.flatnonzero(np.diff(owner)) + 1
+        segment_starts = np.concatenate(([0], boundaries))
+        per_chunk = max(1, _CHUNK_ELEMENTS // self.num_perm)
+        chunk_start = 0
+        while chunk_start < len(segment_starts):
+            chunk_end = chunk_start + 1
+            limit = segment_starts[chunk_start] + per_chunk
+            while chunk_end < len(segment_starts) and segment_starts[chunk_end] <= limit:
+                chunk_end += 1
+            lo = segment_starts[chunk_start]
+            hi = segment_starts[chunk_end] if chunk_end < len(segment_starts) else len(folded)
+            with np.errstate(over="ignore"):
+                permuted = (folded[lo:hi, None] * self._a + self._b) >> _SHIFT_32
+            minima = np.minimum.reduceat(permuted, segment_starts[chunk_start:chunk_end] - lo)
+            signatures[owner[segment_starts[chunk_start:chunk_end]]] = minima.astype(np.uint32)
+            chunk_start = chunk_end
+
+        has_shingles = np.zeros(len(texts), dtype=bool)
+        has_shingles[owner[segment_starts]] = True
+        return signatures, has_shingles
+
+    def bucket_ids(self, texts: Sequence[Optional[str]]) -> np.ndarray:
+        """
+        (len(texts), bands) matrix of bucket ids, -1 where the text shares no bucket in
+        that band, has nothing to hash, or falls in a bucket over max_bucket_size.
+        """
+        signatures, has_shingles = self.signatures(texts)
+        buckets = np.full((len(texts), self.bands), -1, dtype=np.int64)
+        indices = np.flatnonzero(has_shingles)
+        oversized = 0
+        for band in range(self.bands):
+            rows = signatures[indices, band * self.rows : (band + 1) * self.rows]
+            keys = np.ascontiguousarray(rows).view(np.dtype((np.void, rows.itemsize * self.rows)))
+            _, inverse, counts = np.unique(keys.ravel(), return_inverse=True, return_counts=True)
+            sizes = counts[inverse]
+            keep = (sizes > 1) & (sizes <= self.max_bucket_size)
+            oversized += int((counts > self.max_bucket_size).sum())
+            buckets[indices[keep], band] = inverse[keep]
+        if oversized:
+            logger.warning(
+                f"MinHash LSH: dropped {oversized} buckets over {self.max_bucket_size} records"
+            )
+        return buckets
+
+    def band_keys(self, texts: Sequence[Optional[str]]) -> pl.DataFrame:
+        """
+        One nullable block key column per band, to be blocked on like any other key.
+        """
+        buckets = self.bucket_ids(texts)
+        return pl.DataFrame(
+            {
+                f"{LSH_COLUMN_PREFIX}{band}": pl.Series(buckets[:, band]).set(
+                    pl.Series(buckets[:, band] < 0), None
+                )
+                for band in range(self.bands)
+            }
+        )
+
+    def blocking_rules(self) -> List[str]:
+        return [f"l.{LSH_COLUMN_PREFIX}{b} = r.{LSH_COLUMN_PREFIX}{b}" for b in range(self.bands)]
+
+    def candidate_pairs(self, texts: Sequence[Optional[str]]) -> np.ndarray:
+        """
+        Distinct (i, j) index pairs, i < j, sharing a bucket in at least one band.
+        """
+        return pairs_from_buckets(self.bucket_ids(texts), len(texts))
+
+
+def benchmark_lsh(
+    texts: Sequence[Optional[str]],
+    true_pairs: Set[Tuple[int, int]],
+    params: Iterable[Tuple[int, int]],
+    shingle_size: int = 4,
+    seed: int = 1,
+) -> pl.DataFrame:
+    """
+    Recall of known duplicate pairs (i < j) against candidate pair count for each
+    (bands, rows) setting, to pick parameters before enabling LSH blocking.
+    """
+    total = len(texts) * (len(texts) - 1) // 2
+    results = []
+    for bands, rows in params:
+        started = time.perf_counter()
+        index = MinHashLSH(bands=bands, rows=rows, shingle_size=shingle_size, seed=seed)
+        pairs = index.candidate_pairs(texts)
+        seconds = time.perf_counter() - started
+        found = {(int(i), int(j)) for i, j in pairs} & true_pairs
+        results.append(
+            {
+                "bands": bands,
+                "rows": rows,
+                "threshold": round(index.threshold, 3),
+                "candidates": len(pairs),
+                "pair_fraction": len(pairs) / total if total else 0.0,
+                "recall": len(found) / len(true_pairs) if true_pairs else 1.0,
+                "seconds": round(seconds, 3),
+            }
+        )
+    return pl.DataFrame(results)
@@ -0,0 +1,461 @@
+import logging
+import math
+import os
+import threading
+import time
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    Union,
+)
+
+import numpy as np
+import polars as pl
+
+from baystate_consolidator.models.golden_record import GoldenRecord
+from baystate_consolidator.models.raw import RawScrapedProduct
+from baystate_consolidator.normalizers.text import normalize_text, normalize_weight
+from baystate_consolidator.pipelines.fast_match import ABS_DIFFERENCE, InProcessMatcher
+from baystate_consolidator.pipelines.model import ModelRegistry
+from baystate_consolidator.utils.metrics import REGISTRY, Sample
+
+logger = logging.getLogger(__name__)
+
+# Golden record fields the index keeps: the key and the compared fields
+INDEX_COLUMNS = ("sku", "name", "brand", "weight", "price")
+MATCH_COLUMNS: Dict[str, pl.DataType] = {
+    "name": pl.String,
+    "brand": pl.String,
+    "weight": pl.String,
+    "price": pl.Float64,
+}
+# (sku, name, brand, weight, price) as indexed
+_Entry = Tuple[str, Optional[str], Optional[str], Optional[str], Optional[float]]
+
+
+class MatchQuery(NamedTuple):
+    """
+    One product normalized like the name, brand, weight and price columns dedupe compares.
+    """
+
+    name: Optional[str]
+    brand: Optional[str] = None
+    weight: Optional[str] = None
+    price: Optional[float] = None
+
+    @classmethod
+    def from_product(cls, product: RawScrapedProduct) -> "MatchQuery":
+        """
+        title becomes the name; brand and weight come from the scraper's extra fields.
+        """
+        extra = product.model_extra or {}
+        weight = extra.get("weight")
+        return cls(
+            name=normalize_text(product.title) or None,
+            brand=normalize_text(extra.get("brand")) or None,
+            weight=normalize_weight(str(weight)) if weight else None,
+            price=product.price,
+        )
+
+
+class MatchCandidate(NamedTuple):
+    sku: str
+    name: Optional[str]
+    brand: Optional[str]
+    weight: Optional[str]
+    price: Optional[float]
+    match_probability: float
+
+
+class RefreshStats(NamedTuple):
+    added: int
+    updated: int
+    removed: int
+    seconds: float
+
+
+def trigrams(text: str) -> Set[str]:
+    """
+    Character trigrams of text padded like pg_trgm, so short names and word starts count.
+    """
+    padded = f"  {text} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+def _price_band(price: Optional[float], width: float) -> Optional[int]:
+    return None if price is None else int(price // width)
+
+
+class ProductIndex:
+    """
+    In-memory index of golden records for matching one product at a time, without a
+    batch dedupe run. Candidates come from an inverted trigram index on the normalized
+    name, and from exact brand and weight lookups narrowed to neighbouring price bands;
+    they are scored with InProcessMatcher, the comparisons dedupe uses.
+
+    Updates are incremental: changed rows are appended and their old rows tombstoned,
+    so matching keeps being served while a refresh is applied. Thread-safe.
+    """
+
+    def __init__(
+        self,
+        matcher: Optional[InProcessMatcher] = None,
+        max_candidates: int = 50,
+        min_overlap: float = 0.3,
+        common_fraction: float = 0.05,
+    ):
+        self.matcher = matcher or InProcessMatcher()
+        self.max_candidates = max_candidates
+        # Share of the query's trigrams a candidate must contain
+        self.min_overlap = min_overlap
+        # Trigrams in more than this share of the catalog ("foo", " do") only widen the
+        # candidate set; they are skipped while the query has rarer ones
+        self.common_fraction = common_fraction
+        # Neighbouring bands cover the widest price difference the matcher scores
+        self.price_band = max(
+            (
+                max(spec.thresholds)
+                for spec in self.matcher.comparisons
+                if spec.kind == ABS_DIFFERENCE
+            ),
+            default=5.0,
+        )
+        self.loaded_at: Optional[float] = None
+        self._lock = threading.RLock()
+        self._reset()
+
+    def _reset(self):
+        self._rows: Dict[str, int] = {}
+        self._values: List[_Entry] = []
+        self._alive = np.zeros(0, dtype=bool)
+        self._postings: Dict[str, List[int]] = {}
+        self._arrays: Dict[str, np.ndarray] = {}
+        self._by_brand_band: Dict[Tuple[str, int], Set[int]] = {}
+        self._by_brand: Dict[str, Set[int]] = {}
+        self._by_weight: Dict[str, Set[int]] = {}
+
+    @property
+    def ready(self) -> bool:
+        """
+        True once a full refresh has been applied.
+        """
+        return self.loaded_at is not None
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "records": len(self._rows),
+                "rows": len(self._values),
+                "trigrams": len(self._postings),
+            }
+
+    @staticmethod
+    def _entry(row: Union[GoldenRecord, Dict[str, Any]]) -> _Entry:
+        if isinstance(row, GoldenRecord):
+            row = {column: getattr(row, column) for column in INDEX_COLUMNS}
+        price = row.get("price")
+        return (
+            str(row["sku"]),
+            normalize_text(row.get("name")) or None,
+            normalize_text(row.get("brand")) or None,
+            row.get("weight") or None,
+            float(price) if price is not None else None,
+        )
+
+    def upsert(self, rows: Iterable[Union[GoldenRecord, Dict[str, Any]]]) -> Tuple[int, int]:
+        """
+        Adds or replaces golden records by sku; unchanged rows are skipped.
+        Returns (added, updated).
+        """
+        entries = [self._entry(row) for row in rows]
+        added = updated = 0
+        with self._lock:
+            touched: Set[str] = set()
+            for entry in entries:
+                row = self._rows.get(entry[0])
+                if row is not None:
+                    if self._values[row] == entry:
+                        continue
+                    self._drop(row)
+                    updated += 1
+                else:
+                    added += 1
+                touched.update(self._add(entry))
+            # Rebuilt here, once per batch, so no lookup pays for the conversion
+            for gram in touched:
+                self._arrays[gram] = np.array(self._postings[gram], dtype=np.int64)
+            self._compact_if_sparse()
+        return added, updated
+
+    def remove(self, skus: Iterable[str]) -> int:
+        removed = 0
+        with self._lock:
+            for sku in skus:
+                row = self._rows.get(sku)
+                if row is not None:
+                    self._drop(row)
+                    removed += 1
+            self._compact_if_sparse()
+        return removed
+
+    def refresh(self, pages: Iterable[Sequence[Dict[str, Any]]]) -> RefreshStats:
+        """
+        Brings the index in line with a full listing of golden records (see
+        iter_golden_record_pages): each page is applied as it arrives, and skus the
+        listing no longer has are removed at the end.
+        """
+        started = time.perf_counter()
+        added = updated = 0
+        seen: Set[str] = set()
+        for page in pages:
+            seen.update(str(row["sku"]) for row in page)
+            page_added, page_updated = self.upsert(page)
+            added += page_added
+            updated += page_updated
+        with self._lock:
+            removed = self.remove([sku for sku in self._rows if sku not in seen])
+            self.loaded_at = time.time()
+        stats = RefreshStats(added, updated, removed, round(time.perf_counter() - started, 3))
+        logger.info(f"Product index refreshed: {len(self):,} records, {stats}")
+        return stats
+
+    def _add(self, entry: _Entry) -> Set[str]:
+        sku, name, brand, weight, price = entry
+        row = len(self._values)
+        self._values.append(entry)
+        self._rows[sku] = row
+        if row >= len(self._alive):
+            self._alive = np.concatenate([self._alive, np.zeros(max(1024, row), dtype=bool)])
+        self._alive[row] = True
+        grams = trigrams(name) if name else set()
+        for gram in grams:
+            self._postings.setdefault(gram, []).append(row)
+        if brand is not None:
+            self._by_brand.setdefault(brand, set()).add(row)
+            band = _price_band(price, self.price_band)
+            if band is not None:
+                self._by_brand_band.setdefault((brand, band), set()).add(row)
+        if weight is not None:
+            self._by_weight.setdefault(weight, set()).add(row)
+        return grams
+
+    def _drop(self, row: int):
+        # Trigram postings keep the row; the alive mask filters it out
+        sku, _, brand, weight, price = self._values[row]
+        del self._rows[sku]
+        self._alive[row] = False
+        if brand is not None:
+            self._by_brand[brand].discard(row)
+            band = _price_band(price, self.price_band)
+            if band is not None:
+                self._by_brand_band[(brand, band)].discard(row)
+        if weight is not None:
+            self._by_weight[weight].discard(row)
+
+    def _compact_if_sparse(self):
+        if len(self._values) > 1024 and len(self._rows) < len(self._values) // 2:
+            live = [self._values[row] for row in sorted(self._rows.values())]
+            self._reset()
+            for entry in live:
+                self._add(entry)
+            self._arrays = {
+                gram: np.array(rows, dtype=np.int64) for gram, rows in self._postings.items()
+            }
+
+    def _name_candidates(self, name: str) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Rows sharing at least min_overlap of the query's trigrams, and the count shared.
+        """
+        postings = sorted(
+            (self._arrays[gram] for gram in trigrams(name) if gram in self._arrays), key=len
+        )
+        if not postings:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+        common = max(1000, self.common_fraction * len(self._rows))
+        rare = [posting for posting in postings if len(posting) <= common]
+        used = rare if len(rare) >= 3 else postings[:3]
+        counts = np.bincount(np.concatenate(used), minlength=len(self._alive))
+        counts[~self._alive] = 0
+        rows = np.flatnonzero(counts >= max(1, math.ceil(self.min_overlap * len(used))))
+        return rows, counts[rows]
+
+    def _field_candidates(self, query: MatchQuery) -> Set[int]:
+        """
+        Rows with the query's brand, and its weight if known, in the neighbouring price bands.
+        """
+        if query.brand is None:
+            return set()
+        band = _price_band(query.price, self.price_band)
+        if band is None:
+            rows = self._by_brand.get(query.brand, set())
+        else:
+            rows = set().union(
+                *(self._by_brand_band.get((query.brand, b), ()) for b in (band - 1, band, band + 1))
+            )
+        if query.weight is not None:
+            rows = rows & self._by_weight.get(query.weight, set())
+        return rows
+
+    def candidates(self, query: MatchQuery) -> List[int]:
+        """
+        Up to max_candidates rows: the best trigram matches, then exact field matches.
+        """
+        rows, shared = self._name_candidates(query.name) if query.name else ([], [])
+        if len(rows) > self.max_candidates:
+            best = np.argpartition(-shared, self.max_candidates - 1)[: self.max_candidates]
+            rows = rows[best]
+        candidates = dict.fromkeys(np.asarray(rows).tolist())
+        for row in self._field_candidates(query):
+            if len(candidates) >= 2 * self.max_candidates:
+                break
+            candidates.setdefault(row)
+        return list(candidates)
+
+    def match(
+        self, query: MatchQuery, limit: int = 10, min_probability: float = 0.0
+    ) -> List[MatchCandidate]:
+        """
+        Indexed golden records ranked by match probability against query.
+        """
+        with self._lock:
+            values = [self._values[row] for row in self.candidates(query)]
+        if not values:
+            return []
+        columns = list(zip(*values))
+        frame = pl.DataFrame(
+            {
+                column: [getattr(query, column), *columns[position]]
+                for position, column in enumerate(INDEX_COLUMNS)
+                if column in MATCH_COLUMNS
+            },
+            schema=MATCH_COLUMNS,
+        )
+        pairs = np.column_stack(
+            [np.zeros(len(values), dtype=np.int64), np.arange(1, len(values) + 1)]
+        )
+        probabilities = self.matcher.match_probability(frame, pairs)
+        order = np.argsort(-probabilities, kind="stable")
+        return [
+            MatchCandidate(*values[i], float(probabilities[i]))
+            for i in order[:limit]
+            if probabilities[i] >= min_probability
+        ]
+
+
+def iter_golden_record_pages(
+    client, table: str = "golden_records", page_size: int = 1000
+) -> Iterator[List[Dict[str, Any]]]:
+    """
+    Pages through the index columns of every golden record with keyset pagination on sku.
+    """
+    after_sku: Optional[str] = None
+    while True:
+        query = client.table(table).select(",".join(INDEX_COLUMNS))
+        if after_sku is not None:
+            query = query.gt("sku", after_sku)
+        rows = query.order("sku").limit(page_size).execute().data
+        if not rows:
+            return
+        yield rows
+        if len(rows) < page_size:
+            return
+        after_sku = rows[-1]["sku"]
+
+
+class IndexRefresher:
+    """
+    Background thread refreshing an index every interval seconds from fetch, which
+    returns a fresh iterator of golden record pages. A failed refresh is logged and the
+    index keeps serving what it has.
+    """
+
+    def __init__(
+        self,
+        index: ProductIndex,
+        fetch: Callable[[], Iterable[Sequence[Dict[str, Any]]]],
+        interval: float = 300.0,
+    ):
+        self.index = index
+        self.fetch = fetch
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="product-index", daemon=True)
+
+    def start(self) -> "IndexRefresher":
+        self._thread.start()
+        return self
+
+    def stop(self, timeout: Optional[float] = None):
+        self._stop.set()
+        self._thread.join(timeout)
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.index.refresh(self.fetch())
+            except Exception as e:
+                logger.warning(f"Product index refresh failed: {e}")
+            self._stop.wait(self.interval)
+
+
+_default_index: Optional[ProductIndex] = None
+_default_index_lock = threading.Lock()
+
+
+def get_product_index() -> ProductIndex:
+    """
+    Process-wide index, scored with the latest model in CONSOLIDATOR_MODEL_DIR when set
+    and reproducible in-process, else with the default comparison weights.
+    """
+    global _default_index
+    with _default_index_lock:
+        if _default_index is None:
+            matcher = None
+            model_dir = os.environ.get("CONSOLIDATOR_MODEL_DIR")
+            if model_dir:
+                matcher = InProcessMatcher.from_settings(ModelRegistry(model_dir).load())
+                if matcher is None:
+                    logger.warning(f"Model in {model_dir} not supported; using default weights")
+            _default_index = ProductIndex(matcher)
+        return _default_index
+
+
+def start_index_refresher() -> Optional[IndexRefresher]:
+    """
+    Keeps the process-wide index in sync with Supabase golden_records, every
+    CONSOLIDATOR_MATCH_REFRESH_SECONDS (default 300; 0 disables). Returns None when
+    disabled or Supabase is not configured.
+    """
+    interval = float(os.environ.get("CONSOLIDATOR_MATCH_REFRESH_SECONDS", 300))
+    if interval <= 0 or not os.environ.get("SUPABASE_URL") or not os.environ.get("SUPABASE_KEY"):
+        return None
+
+    def fetch():
+        from baystate_consolidator.utils.supabase_client import get_supabase_client
+
+        return iter_golden_record_pages(get_supabase_client())
+
+    return IndexRefresher(get_product_index(), fetch, interval).start()
+
+
+def _index_samples() -> List[Sample]:
+    if _default_index is None:
+        return []
+    return [("baystate_match_index_records", {}, len(_default_index))]
+
+
+REGISTRY.register_collector(
+    "baystate_match_index_records", "Golden records in the /match product index", _index_samples
+)
@@ -0,0 +1,64 @@
+import json
+import os
+import re
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+MODEL_PREFIX = "splink_model_v"
+_MODEL_FILE_RE = re.compile(rf"^{MODEL_PREFIX}(\d+)\.json$")
+
+
+class ModelRegistry:
+    """
+    Directory of trained Splink models saved as versioned JSON files
+    (splink_model_v0001.json, splink_model_v0002.json, ...), each with a
+    .meta.json sidecar holding training metadata and step timings.
+    """
+
+    def __init__(self, model_dir: str = "./models"):
+        self.model_dir = model_dir
+
+    def versions(self) -> List[int]:
+        if not os.path.isdir(self.model_dir):
+            return []
+        versions = []
+        for filename in os.listdir(self.model_dir):
+            match = _MODEL_FILE_RE.match(filename)
+            if match:
+                versions.append(int(match.group(1)))
+        return sorted(versions)
+
+    def path_for(self, version: int) -> str:
+        return os.path.join(self.model_dir, f"{MODEL_PREFIX}{version:04d}.json")
+
+    def latest_path(self) -> Optional[str]:
+        versions = self.versions()
+        return self.path_for(versions[-1]) if versions else None
+
+    def next_path(self) -> str:
+        versions = self.versions()
+        return self.path_for(versions[-1] + 1 if versions else 1)
+
+    def write_metadata(self, model_path: str, metadata: Dict[str, Any]):
+        metadata = {
+            "model": os.path.basename(model_path),
+            "saved_at": datetime.now().isoformat(),
+            **metadata,
+        }
+        with open(model_path[: -len(".json")] + ".meta.json", "w") as f:
+            json.dump(metadata, f, indent=2)
+
+    def load(self, version: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """
+        Returns the trained settings dict (with m/u probabilities) for a version,
+        or the latest one; None when nothing has been trained yet.
+        """
+        path = self.path_for(version) if version is not None else self.latest_path()
+        if path is None or not os.path.exists(path):
+            return None
+        return load_model(path)
+
+
+def load_model(path: str) -> Dict[str, Any]:
+    with open(path) as f:
+        return json.load(f)
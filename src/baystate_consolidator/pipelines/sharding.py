@@ -0,0 +1,181 @@
+import heapq
+import multiprocessing
+import os
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import TYPE_CHECKING, Dict, List, NamedTuple, Optional, Tuple
+
+import duckdb
+import polars as pl
+
+from baystate_consolidator.pipelines.blocking import (
+    BlockingKey,
+    block_key_expr,
+    derive_keys,
+    key_name,
+)
+from baystate_consolidator.pipelines.clustering import connected_components
+from baystate_consolidator.utils.metrics import CANDIDATE_PAIRS, MATCHED_PAIRS
+
+if TYPE_CHECKING:
+    from baystate_consolidator.pipelines.dedupe import DeduplicationPipeline
+
+SHARD_COLUMN = "__shard"
+
+
+class ShardReport(NamedTuple):
+    shard: int
+    # Distinct shard key values packed into this shard; 0 for the missing-key shard
+    partitions: int
+    records: int
+    clusters: int
+    seconds: float
+
+
+def assign_shards(
+    df: pl.DataFrame, shard_key: BlockingKey, num_shards: int
+) -> Tuple[pl.DataFrame, Dict[int, int]]:
+    """
+    Adds a __shard column. Every record with the same shard key value lands in the same
+    shard; values are packed largest-first onto the least loaded shard, which keeps
+    shards even unless one value alone outweighs the rest. Records missing any part of
+    the key get shard num_shards. Also returns the number of key values per shard.
+    """
+    key = derive_keys(df, [shard_key]).select(block_key_expr(shard_key).alias("key"))["key"]
+    sizes = key.drop_nulls().value_counts(name="records").sort(["records", "key"], descending=True)
+    loads = [(0, shard) for shard in range(num_shards)]
+    shards = []
+    for records in sizes["records"].to_list():
+        load, shard = heapq.heappop(loads)
+        shards.append(shard)
+        heapq.heappush(loads, (load + records, shard))
+    mapping = dict(zip(sizes["key"].to_list(), shards))
+    shard_ids = key.replace_strict(mapping, default=num_shards, return_dtype=pl.Int64)
+    return df.with_columns(shard_ids.alias(SHARD_COLUMN)), dict(Counter(shards))
+
+
+def _cluster_shard(
+    pipeline: "DeduplicationPipeline", shard: int, df: pl.DataFrame, threads: int
+) -> Tuple[int, pl.DataFrame, float, Tuple[float, float]]:
+    started = time.perf_counter()
+    pairs_before = CANDIDATE_PAIRS.value(), MATCHED_PAIRS.value()
+    if len(df) < 2:
+        assignments = df.select("unique_id", pl.col("unique_id").alias("cluster_id"))
+    else:
+        connection = duckdb.connect(config={"threads": threads})
+        try:
+            assignments = pipeline._cluster(df, connection).select("unique_id", "cluster_id")
+        finally:
+            connection.close()
+    # Pair counts this shard added, for the parent to fold into its own metrics
+    pair_counts = (
+        CANDIDATE_PAIRS.value() - pairs_before[0],
+        MATCHED_PAIRS.value() - pairs_before[1],
+    )
+    return shard, assignments, time.perf_counter() - started, pair_counts
+
+
+def run_sharded(
+    pipeline: "DeduplicationPipeline",
+    df: pl.DataFrame,
+    shard_key: BlockingKey,
+    max_workers: Optional[int] = None,
+    num_shards: Optional[int] = None,
+    broadcast_missing: bool = False,
+) -> Tuple[pl.DataFrame, List[ShardReport]]:
+    """
+    Partitions df (which must have a globally unique unique_id) by shard_key and runs
+    prediction and clustering per shard in a process pool. Pairs that straddle shards
+    are never compared, so the shard key should be implied by every blocking rule.
+
+    Splink labels a cluster with its smallest unique_id, so cluster IDs stay unique
+    across shards without renumbering. Missing-key records are linked among themselves;
+    with broadcast_missing they are also linked inside every shard, and the clusters
+    they bridge are merged afterwards.
+    """
+    max_workers = max_workers or os.cpu_count() or 1
+    num_shards = num_shards or max_workers * 2
+    df, partitions = assign_shards(df, shard_key, num_shards)
+
+    missing = df.filter(pl.col(SHARD_COLUMN) == num_shards).drop(SHARD_COLUMN)
+    tasks = []
+    for (shard,), part in df.partition_by(SHARD_COLUMN, as_dict=True).items():
+        part = part.drop(SHARD_COLUMN)
+        if broadcast_missing and shard != num_shards and not missing.is_empty():
+            part = pl.concat([part, missing], how="diagonal_relaxed")
+        tasks.append((shard, part))
+    # Biggest shards first, so the pool does not finish on a straggler
+    tasks.sort(key=lambda task: len(task[1]), reverse=True)
+
+    threads = max(1, (os.cpu_count() or 1) // max_workers)
+    if max_workers == 1 or len(tasks) == 1:
+        results = [_cluster_shard(pipeline, shard, part, threads) for shard, part in tasks]
+    else:
+        # spawn: DuckDB runs its own threads in this process, forking it is not safe
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=max_workers, mp_context=context) as executor:
+            futures = [
+                executor.submit(_cluster_shard, pipeline, shard, part, threads)
+                for shard, part in tasks
+            ]
+            results = [future.result() for future in futures]
+        for *_, (candidates, matched) in results:
+            CANDIDATE_PAIRS.inc(candidates)
+            MATCHED_PAIRS.inc(matched)
+
+    reports = []
+    frames = []
+    for shard, assignments, seconds, _ in sorted(results, key=lambda result: result[0]):
+        frames.append(assignments)
+        reports.append(
+            ShardReport(
+                shard=shard,
+                partitions=partitions.get(shard, 0),
+                records=len(assignments),
+                clusters=assignments["cluster_id"].n_unique(),
+                seconds=round(seconds, 3),
+            )
+        )
+    assignments = pl.concat(frames, how="vertical_relaxed")
+    if broadcast_missing and not missing.is_empty():
+        assignments = _merge_bridged(assignments)
+    clustered = df.drop(SHARD_COLUMN).join(
+        assignments, on="unique_id", how="left", maintain_order="left"
+    )
+    return clustered, reports
+
+
+def shard_skew(reports: List[ShardReport]) -> float:
+    """
+    Largest shard over the mean shard size; 1.0 is perfectly even.
+    """
+    records = [report.records for report in reports]
+    return max(records) * len(records) / sum(records) if sum(records) else 1.0
+
+
+def format_shard_report(shard_key: BlockingKey, reports: List[ShardReport]) -> str:
+    lines = [
+        f"Sharded on {key_name(shard_key)}: {len(reports)} shards, "
+        f"skew {shard_skew(reports):.2f}, slowest {max(r.seconds for r in reports):.2f}s"
+    ]
+    for report in reports:
+        lines.append(
+            f"shard {report.shard}: {report.records:,} records ({report.partitions:,} keys) "
+            f"-> {report.clusters:,} clusters in {report.seconds:.2f}s"
+        )
+    return "\n".join(lines)
+
+
+def _merge_bridged(assignments: pl.DataFrame) -> pl.DataFrame:
+    """
+    A broadcast record clustered in several shards joins those clusters into one.
+    """
+    components = connected_components(
+        assignments["unique_id"].to_list(),
+        zip(assignments["unique_id"].to_list(), assignments["cluster_id"].to_list()),
+    )
+    return pl.DataFrame(
+        {"unique_id": list(components.keys()), "cluster_id": list(components.values())},
+        schema=assignments.schema,
+    )
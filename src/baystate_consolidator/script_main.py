@@ -1,10 +1,41 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
+from baystate_consolidator.api.jobs import get_job_manager, shutdown_job_manager, warmup_enabled
 from baystate_consolidator.api.routes import router
+from baystate_consolidator.pipelines.match_index import start_index_refresher
+from baystate_consolidator.utils.metrics import REGISTRY
 
-app = FastAPI(title="BayStateConsolidator")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if warmup_enabled():
+        # Start and warm the job workers before the first request instead of during it
+        get_job_manager().prewarm()
+    # Loads the /match product index in the background, then keeps it current
+    refresher = start_index_refresher()
+    yield
+    if refresher is not None:
+        refresher.stop(timeout=5)
+    # Stop the job worker processes with the web process
+    shutdown_job_manager()
+    # Imported here: the client module loads httpx, which app startup does not need
+    from baystate_consolidator.utils.supabase_client import close_supabase_clients
+
+    # Close the pooled Supabase connections the web process opened
+    close_supabase_clients()
+
+
+app = FastAPI(title="BayStateConsolidator", lifespan=lifespan)
 
 app.include_router(router, prefix="/api/v1")
 
 @app.get("/health")
 def health():
     return {"status": "ok"}
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    # Prometheus text exposition format
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
@@ -1,47 +1,337 @@
+import asyncio
+import base64
+import hashlib
+import json
+import logging
 import os
-from typing import Dict, Any
-import openai
+import sqlite3
+import threading
+import time
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, NamedTuple, Optional
 
+from baystate_consolidator.utils.metrics import EXTERNAL_CALL_SECONDS, OCR_CACHE_HITS
 
-class OCRService:
-    def __init__(self):
-        self.client = openai.OpenAI(api_key=os.environ.get("OPENAI_API_KEY"))
+if TYPE_CHECKING:
+    import httpx
+    import openai
 
-    def extract_product_data(self, image_url: str) -> Dict[str, Any]:
-        prompt = """
+OCR_MODEL = "gpt-4o"
+OCR_PROMPT = """
         Extract the following information from the product image:
         - Ingredients list (full text)
         - Net Weight
         - Nutrition Facts (summary)
         Return as JSON.
         """
+# Packaging images rarely change; re-check a URL's content after a week, drop results after 90 days
+URL_TTL_SECONDS = 7 * 24 * 3600
+RESULT_TTL_SECONDS = 90 * 24 * 3600
+
+logger = logging.getLogger(__name__)
+
+
+class OCRError(Exception):
+    pass
+
+
+class OCRResult(NamedTuple):
+    url: str
+    data: Dict[str, Any]
+    error: Optional[str] = None
+    cached: bool = False
+
+
+def _messages(image_url: str) -> List[Dict[str, Any]]:
+    return [
+        {
+            "role": "user",
+            "content": [
+                {"type": "text", "text": OCR_PROMPT},
+                {"type": "image_url", "image_url": {"url": image_url}},
+            ],
+        }
+    ]
+
+
+def _parse_content(content: Optional[str]) -> Dict[str, Any]:
+    if not content:
+        raise OCRError("Model returned an empty response")
+    try:
+        return json.loads(content)
+    except json.JSONDecodeError as e:
+        raise OCRError(f"Model returned invalid JSON: {e}") from e
+
+
+def _observe_call(started: float, outcome: str):
+    EXTERNAL_CALL_SECONDS.observe(time.perf_counter() - started, service="ocr", outcome=outcome)
+
+
+class OCRService:
+    def __init__(self, client: Optional["openai.OpenAI"] = None):
+        # openai takes a while to import; only load it once OCR is actually used
+        import openai
+
+        self.client = client or openai.OpenAI(api_key=os.environ.get("OPENAI_API_KEY"))
+
+    def extract_product_data(self, image_url: str) -> Dict[str, Any]:
+        """
+        Single synchronous extraction; raises OCRError instead of returning {} on failure.
+        Use AsyncOCRService for batches.
+        """
+        import openai
 
+        started = time.perf_counter()
         try:
             response = self.client.chat.completions.create(
-                model="gpt-4o",
-                messages=[
-                    {
-                        "role": "user",
-                        "content": [
-                            {"type": "text", "text": prompt},
-                            {
-                                "type": "image_url",
-                                "image_url": {
-                                    "url": image_url,
-                                },
-                            },
-                        ],
-                    }
-                ],
+                model=OCR_MODEL,
+                messages=_messages(image_url),
                 response_format={"type": "json_object"},
             )
+        except openai.OpenAIError as e:
+            _observe_call(started, "error")
+            raise OCRError(f"OCR request failed for {image_url}: {e}") from e
+        _observe_call(started, "ok")
+        return _parse_content(response.choices[0].message.content)
+
+
+class OCRCache:
+    """
+    SQLite cache of OCR results keyed by the SHA-256 of the image bytes, with a URL index
+    so a URL seen within url_ttl is answered without downloading it again. The same
+    packaging image served from different scrapers' URLs shares one result.
+    Expired entries are ignored on read and removed by evict_expired().
+    """
+
+    def __init__(
+        self,
+        path: str,
+        url_ttl: float = URL_TTL_SECONDS,
+        result_ttl: float = RESULT_TTL_SECONDS,
+    ):
+        self.url_ttl = url_ttl
+        self.result_ttl = result_ttl
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS ocr_results (
+                content_hash TEXT PRIMARY KEY, result TEXT, created_at REAL
+            );
+            CREATE TABLE IF NOT EXISTS ocr_urls (
+                url TEXT PRIMARY KEY, content_hash TEXT, seen_at REAL
+            );
+            """)
+        self._db.commit()
+
+    def content_hash_for_url(self, url: str) -> Optional[str]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT content_hash FROM ocr_urls WHERE url = ? AND seen_at >= ?",
+                (url, time.time() - self.url_ttl),
+            ).fetchone()
+        return row[0] if row else None
+
+    def get(self, content_hash: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT result FROM ocr_results WHERE content_hash = ? AND created_at >= ?",
+                (content_hash, time.time() - self.result_ttl),
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def remember_url(self, url: str, content_hash: str):
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO ocr_urls (url, content_hash, seen_at) VALUES (?, ?, ?)",
+                (url, content_hash, time.time()),
+            )
+            self._db.commit()
 
-            content = response.choices[0].message.content
-            if content:
-                import json
+    def put(self, content_hash: str, result: Dict[str, Any]):
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO ocr_results (content_hash, result, created_at) "
+                "VALUES (?, ?, ?)",
+                (content_hash, json.dumps(result), time.time()),
+            )
+            self._db.commit()
+
+    def evict_expired(self) -> int:
+        now = time.time()
+        with self._lock:
+            removed = self._db.execute(
+                "DELETE FROM ocr_results WHERE created_at < ?", (now - self.result_ttl,)
+            ).rowcount
+            removed += self._db.execute(
+                "DELETE FROM ocr_urls WHERE seen_at < ?", (now - self.url_ttl,)
+            ).rowcount
+            self._db.commit()
+        return removed
+
+    def close(self):
+        self._db.close()
+
+
+class RateLimiter:
+    """
+    Spaces request starts at least 60 / requests_per_minute seconds apart.
+    """
+
+    def __init__(self, requests_per_minute: Optional[float]):
+        self.interval = 60.0 / requests_per_minute if requests_per_minute else 0.0
+        self._next_start = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self):
+        if not self.interval:
+            return
+        async with self._lock:
+            now = time.monotonic()
+            delay = self._next_start - now
+            self._next_start = max(now, self._next_start) + self.interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+class AsyncOCRService:
+    """
+    Batch OCR over many image URLs. Images are downloaded and hashed first; URLs or
+    contents seen before (in this batch or, with a cache, in earlier runs) never reach
+    the model. Model calls run under max_concurrency and requests_per_minute.
+    """
+
+    def __init__(
+        self,
+        client: Optional["openai.AsyncOpenAI"] = None,
+        cache: Optional[OCRCache] = None,
+        max_concurrency: int = 8,
+        requests_per_minute: Optional[float] = None,
+        http_client: Optional["httpx.AsyncClient"] = None,
+        model: str = OCR_MODEL,
+    ):
+        import openai
+
+        self.client = client or openai.AsyncOpenAI(api_key=os.environ.get("OPENAI_API_KEY"))
+        self.cache = cache
+        self.max_concurrency = max_concurrency
+        self.requests_per_minute = requests_per_minute
+        self.http_client = http_client
+        self.model = model
+        self.stats = {"requests": 0, "cache_hits": 0, "errors": 0}
+
+    async def extract_many(self, image_urls: Iterable[str]) -> Dict[str, OCRResult]:
+        """
+        Returns a result per distinct URL; failures are reported in OCRResult.error
+        rather than raised, so one bad image does not sink the batch.
+        """
+        urls = list(dict.fromkeys(image_urls))
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        limiter = RateLimiter(self.requests_per_minute)
+        # One model call per distinct image content, shared by every URL serving it
+        pending: Dict[str, asyncio.Future] = {}
 
-                return json.loads(content)
+        import httpx
+
+        http_client = self.http_client or httpx.AsyncClient(follow_redirects=True, timeout=30)
+        try:
+
+            async def extract(url: str) -> OCRResult:
+                try:
+                    return await self._extract(url, http_client, semaphore, limiter, pending)
+                except Exception as e:
+                    self.stats["errors"] += 1
+                    logger.warning(f"OCR failed for {url}: {e}")
+                    return OCRResult(url, {}, error=str(e))
+
+            results = await asyncio.gather(*(extract(url) for url in urls))
+        finally:
+            if self.http_client is None:
+                await http_client.aclose()
+        return {result.url: result for result in results}
+
+    def extract_batch(self, image_urls: Iterable[str]) -> Dict[str, OCRResult]:
+        return asyncio.run(self.extract_many(image_urls))
+
+    async def _extract(
+        self,
+        url: str,
+        http_client: "httpx.AsyncClient",
+        semaphore: asyncio.Semaphore,
+        limiter: RateLimiter,
+        pending: Dict[str, asyncio.Future],
+    ) -> OCRResult:
+        content_hash = self.cache.content_hash_for_url(url) if self.cache else None
+        image = None
+        if content_hash is None:
+            image = await self._download(url, http_client, semaphore)
+            content_hash = hashlib.sha256(image.content).hexdigest()
+            if self.cache:
+                self.cache.remember_url(url, content_hash)
+
+        if self.cache:
+            cached = self.cache.get(content_hash)
+            if cached is not None:
+                self.stats["cache_hits"] += 1
+                OCR_CACHE_HITS.inc()
+                return OCRResult(url, cached, cached=True)
+
+        if content_hash in pending:
+            self.stats["cache_hits"] += 1
+            OCR_CACHE_HITS.inc()
+            return OCRResult(url, await asyncio.shield(pending[content_hash]), cached=True)
+
+        future = asyncio.get_running_loop().create_future()
+        pending[content_hash] = future
+        try:
+            if image is None:
+                # The URL index was fresh but the result expired; the content is needed again
+                image = await self._download(url, http_client, semaphore)
+            data = await self._call_model(image, semaphore, limiter)
         except Exception as e:
-            print(f"OCR Error: {e}")
+            future.set_exception(e)
+            # Waiters (if any) re-raise it; mark it retrieved for the no-waiter case
+            future.exception()
+            raise
+        future.set_result(data)
+        if self.cache:
+            self.cache.put(content_hash, data)
+        return OCRResult(url, data)
+
+    async def _download(
+        self, url: str, http_client: "httpx.AsyncClient", semaphore: asyncio.Semaphore
+    ) -> "httpx.Response":
+        async with semaphore:
+            response = await http_client.get(url)
+        response.raise_for_status()
+        return response
+
+    async def _call_model(
+        self, image: "httpx.Response", semaphore: asyncio.Semaphore, limiter: RateLimiter
+    ) -> Dict[str, Any]:
+        import openai
+
+        content_type = image.headers.get("content-type", "image/jpeg").split(";")[0]
+        # Send the bytes that were hashed, so the cached result matches that exact content
+        data_url = f"data:{content_type};base64,{base64.b64encode(image.content).decode()}"
+        async with semaphore:
+            await limiter.wait()
+            self.stats["requests"] += 1
+            started = time.perf_counter()
+            try:
+                response = await self.client.chat.completions.create(
+                    model=self.model,
+                    messages=_messages(data_url),
+                    response_format={"type": "json_object"},
+                )
+            except openai.OpenAIError as e:
+                _observe_call(started, "error")
+                raise OCRError(f"OCR request failed: {e}") from e
+            _observe_call(started, "ok")
+        return _parse_content(response.choices[0].message.content)
+
 
-        return {}
+def get_ocr_cache() -> Optional[OCRCache]:
+    """
+    Shared result cache when OCR_CACHE_PATH is set.
+    """
+    path = os.environ.get("OCR_CACHE_PATH")
+    return OCRCache(path) if path else None
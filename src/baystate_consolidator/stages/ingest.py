@@ -0,0 +1,144 @@
+import json
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+import polars as pl
+
+# Always present, derived from the products_ingestion row rather than the payload
+IDENTITY_COLUMNS = ("sku", "scraper_name", "unique_id")
+# Every other payload field of a source record, serialized as one JSON object
+EXTRAS_COLUMN = "extras"
+
+# Payload fields kept as their own columns, with the type they should have; the
+# RawScrapedProduct fields plus those read by normalize, dedupe and survivorship
+SOURCE_FIELDS: Dict[str, pl.DataType] = {
+    "price": pl.Float64,
+    "title": pl.String,
+    "description": pl.String,
+    "images": pl.List(pl.String),
+    "availability": pl.String,
+    "ratings": pl.Float64,
+    "reviews_count": pl.Int64,
+    "url": pl.String,
+    "scraped_at": pl.Datetime("us"),
+    "brand": pl.String,
+    "category": pl.String,
+    "product_type": pl.String,
+    "weight": pl.String,
+    "excel_price": pl.Float64,
+}
+
+
+def _typed_series(name: str, values: List[Any], dtype: Optional[pl.DataType]) -> pl.Series:
+    """
+    values as dtype, or with the inferred type when they do not fit it (a "$10.00" price,
+    ISO timestamp strings), mixed types falling back to strings like records_to_frame.
+    """
+    if dtype is not None:
+        try:
+            return pl.Series(name, values, dtype=dtype, strict=True)
+        except (TypeError, ValueError, pl.exceptions.PolarsError):
+            pass
+    return pl.Series(name, values, strict=False)
+
+
+def flatten_sources(rows: Iterable[Dict[str, Any]], promote: Sequence[str] = ()) -> pl.DataFrame:
+    """
+    Columnar equivalent of DatabaseIngestor.flatten_rows: one row per source of each
+    products_ingestion row, built column by column straight from the sources payloads
+    instead of through a copied dict per source record.
+
+    SOURCE_FIELDS and the fields in promote (e.g. custom blocking key columns) become
+    columns; every other field goes into the extras JSON column, so scrapers sending
+    many extra fields cost one string per record rather than a sparse column each.
+    Fields no source sent are left out, as in records_to_frame.
+    """
+    fields = {**SOURCE_FIELDS, **{field: None for field in promote if field not in SOURCE_FIELDS}}
+    known = set(fields) | set(IDENTITY_COLUMNS)
+    skus: List[Any] = []
+    scrapers: List[str] = []
+    values: Dict[str, List[Any]] = {field: [] for field in fields}
+    extras: List[Optional[str]] = []
+    present = set()
+
+    for row in rows:
+        sku = row.get("sku")
+        for scraper_name, data in (row.get("sources") or {}).items():
+            skus.append(sku)
+            scrapers.append(scraper_name)
+            present.update(data.keys())
+            for field, column in values.items():
+                column.append(data.get(field))
+            extra = {key: value for key, value in data.items() if key not in known}
+            extras.append(json.dumps(extra, default=str) if extra else None)
+
+    columns = [
+        _typed_series("sku", skus, pl.String),
+        pl.Series("scraper_name", scrapers, dtype=pl.String),
+    ]
+    columns.extend(
+        _typed_series(field, values[field], dtype)
+        for field, dtype in fields.items()
+        if field in present
+    )
+    if any(extra is not None for extra in extras):
+        columns.append(pl.Series(EXTRAS_COLUMN, extras, dtype=pl.String))
+    records = pl.DataFrame(columns)
+    # Composite key for Splink, as in flatten_rows
+    unique_id = pl.concat_str(pl.col("sku").cast(pl.String), pl.lit("_"), pl.col("scraper_name"))
+    return records.insert_column(2, records.select(unique_id.alias("unique_id")).to_series())
+
+
+def conform_frame(records: pl.DataFrame, promote: Sequence[str] = ()) -> pl.DataFrame:
+    """
+    Gives an already columnar frame of flattened source records the layout of
+    flatten_sources: numeric and all-null SOURCE_FIELDS cast to their types, and
+    columns outside SOURCE_FIELDS, promote and the identity columns packed into extras.
+    """
+    fields = {**SOURCE_FIELDS, **{field: None for field in promote if field not in SOURCE_FIELDS}}
+    casts = []
+    for field, dtype in fields.items():
+        current = records.schema.get(field)
+        # Only widen numbers and type all-null columns; strings are left to normalize
+        if dtype is None or current is None or current == dtype:
+            continue
+        if current == pl.Null or (current.is_numeric() and dtype.is_numeric()):
+            try:
+                casts.append(records[field].cast(dtype, strict=True))
+            except (TypeError, ValueError, pl.exceptions.PolarsError):
+                continue
+    records = records.with_columns(casts)
+
+    extra_columns = [
+        column
+        for column in records.columns
+        if column not in fields and column not in IDENTITY_COLUMNS and column != EXTRAS_COLUMN
+    ]
+    if not extra_columns:
+        return records
+    return records.with_columns(
+        pl.struct(extra_columns).struct.json_encode().alias(EXTRAS_COLUMN)
+    ).drop(extra_columns)
+
+
+def concat_records(frames: List[pl.DataFrame]) -> pl.DataFrame:
+    """
+    Stacks per-page frames into one batch. A column typed differently across pages (naive
+    and UTC timestamps, say) becomes strings, which normalize and survivorship parse.
+    """
+    if len(frames) == 1:
+        return frames[0]
+    try:
+        return pl.concat(frames, how="diagonal_relaxed")
+    except pl.exceptions.PolarsError:
+        dtypes: Dict[str, set] = {}
+        for frame in frames:
+            for column, dtype in frame.schema.items():
+                dtypes.setdefault(column, set()).add(dtype)
+        mixed = [column for column, types in dtypes.items() if len(types) > 1]
+        return pl.concat(
+            [
+                frame.with_columns(pl.col(c).cast(pl.String) for c in mixed if c in frame.columns)
+                for frame in frames
+            ],
+            how="diagonal_relaxed",
+        )
@@ -0,0 +1,85 @@
+import json
+import os
+from datetime import timezone
+from typing import Any, Dict, List, Sequence
+
+import polars as pl
+
+from baystate_consolidator.models.golden_record import GoldenRecord
+from baystate_consolidator.stages.survivorship import METADATA_COLUMN
+
+# One row per golden record and field with a value. field and source are categoricals:
+# each distinct name is stored once and rows hold small integer codes, which Parquet
+# keeps as dictionary-encoded columns
+LINEAGE_SCHEMA: Dict[str, pl.DataType] = {
+    "sku": pl.String,
+    "field": pl.Categorical(),
+    # JSON-encoded, since fields differ in type (names, prices, image lists)
+    "value": pl.String,
+    "source": pl.Categorical(),
+    "confidence": pl.Float64,
+    "timestamp": pl.Datetime("us"),
+}
+
+
+def _json_value(value: pl.Expr) -> pl.Expr:
+    # json_encode only takes structs: encode {"v": value} and strip the wrapper
+    return pl.struct(value.alias("v")).struct.json_encode().str.slice(5).str.strip_suffix("}")
+
+
+def _naive_utc(timestamp: pl.Expr, entry_dtype: pl.Struct) -> pl.Expr:
+    dtype = next(f.dtype for f in entry_dtype.fields if f.name == "timestamp")
+    if isinstance(dtype, pl.Datetime) and dtype.time_zone is not None:
+        return timestamp.dt.convert_time_zone("UTC").dt.replace_time_zone(None)
+    return timestamp
+
+
+def lineage_frame(resolved: pl.DataFrame, key: str = "sku") -> pl.DataFrame:
+    """
+    Long lineage table from BatchSurvivorshipEngine.resolve output, built column by
+    column from its consolidation_metadata struct without going through GoldenRecords.
+    Timestamps are naive UTC; missing ones (e.g. Excel overrides) stay null.
+    """
+    frames = []
+    if not resolved.is_empty() and METADATA_COLUMN in resolved.columns:
+        for field in resolved.schema[METADATA_COLUMN].fields:
+            entry = pl.col(METADATA_COLUMN).struct.field(field.name)
+            frames.append(
+                resolved.filter(entry.struct.field("value").is_not_null()).select(
+                    pl.col(key).cast(pl.String).alias("sku"),
+                    pl.lit(field.name).alias("field"),
+                    _json_value(entry.struct.field("value")).alias("value"),
+                    entry.struct.field("source").alias("source"),
+                    entry.struct.field("confidence").cast(pl.Float64).alias("confidence"),
+                    _naive_utc(entry.struct.field("timestamp"), field.dtype).alias("timestamp"),
+                )
+            )
+    if not frames:
+        return pl.DataFrame(schema=LINEAGE_SCHEMA)
+    return pl.concat(frames, how="vertical_relaxed").cast(LINEAGE_SCHEMA)
+
+
+def lineage_from_records(records: Sequence[GoldenRecord]) -> pl.DataFrame:
+    """
+    The same table for GoldenRecords built elsewhere.
+    """
+    columns: Dict[str, List[Any]] = {name: [] for name in LINEAGE_SCHEMA}
+    for record in records:
+        for field, metadata in record.consolidation_metadata.items():
+            columns["sku"].append(record.sku)
+            columns["field"].append(field)
+            columns["value"].append(
+                json.dumps(metadata.value, ensure_ascii=False, separators=(",", ":"), default=str)
+            )
+            columns["source"].append(metadata.source)
+            columns["confidence"].append(metadata.confidence)
+            timestamp = metadata.timestamp
+            if timestamp.tzinfo is not None:
+                timestamp = timestamp.astimezone(timezone.utc).replace(tzinfo=None)
+            columns["timestamp"].append(timestamp)
+    return pl.DataFrame(columns, schema=LINEAGE_SCHEMA)
+
+
+def write_lineage(lineage: pl.DataFrame, path: str):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    lineage.write_parquet(path, compression="zstd")
@@ -0,0 +1,219 @@
+import logging
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    NamedTuple,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+from baystate_consolidator.models.golden_record import GoldenRecord, dump_records_json
+from baystate_consolidator.stages.survivorship import REQUIRED_DEFAULTS
+
+if TYPE_CHECKING:
+    from supabase import Client
+
+GOLDEN_RECORDS_TABLE = "golden_records"
+STATUS_TABLE = "products_ingestion"
+
+logger = logging.getLogger(__name__)
+
+
+def _minimal():
+    # postgrest comes with supabase; imported on first write rather than at startup
+    from postgrest.types import ReturnMethod
+
+    return ReturnMethod.minimal
+
+
+class LoadStats(NamedTuple):
+    rows: int
+    chunks: int
+    retries: int
+    seconds: float
+    # The on_conflict keys of the records upserted, in the order sent
+    keys: Tuple[Any, ...] = ()
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.seconds if self.seconds else 0.0
+
+
+def chunked(items: Sequence[Any], size: int) -> Iterator[Sequence[Any]]:
+    for start in range(0, len(items), size):
+        yield items[start : start + size]
+
+
+def unique_by_key(records: Sequence[Any], key: Callable[[Any], Any], on_conflict: str) -> List[Any]:
+    """
+    The last record per key. Records without a key, or with the placeholder survivorship
+    gives clusters that had none, are left out; both they and key collisions (clusters
+    resolving to the same key) are logged, since they mean consolidated products not written.
+    """
+    placeholder = REQUIRED_DEFAULTS.get(on_conflict)
+    by_key: Dict[Any, Any] = {}
+    missing = collisions = 0
+    for record in records:
+        value = key(record)
+        if value is None or (placeholder is not None and value == placeholder):
+            missing += 1
+            continue
+        collisions += value in by_key
+        by_key[value] = record
+    if missing:
+        logger.warning(f"Skipped {missing} record(s) without a {on_conflict}")
+    if collisions:
+        logger.warning(
+            f"{collisions} record(s) shared a {on_conflict} with another record in the batch; "
+            "only the last per key is written"
+        )
+    return list(by_key.values())
+
+
+class SupabaseLoader:
+    """
+    Writes golden records and pipeline status back to Supabase in chunks, with at most
+    max_in_flight chunks outstanding. Every write is idempotent (upsert on the sku key,
+    status set by sku), so a crashed run can simply be replayed. Failed chunks are retried
+    with exponential backoff and jitter before the error is raised.
+    """
+
+    def __init__(
+        self,
+        client: "Client",
+        table: str = GOLDEN_RECORDS_TABLE,
+        status_table: str = STATUS_TABLE,
+        chunk_size: int = 500,
+        status_chunk_size: int = 200,
+        max_in_flight: int = 4,
+        max_retries: int = 5,
+        backoff: float = 0.5,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self.supabase = client
+        self.table = table
+        self.status_table = status_table
+        self.chunk_size = chunk_size
+        # Status updates put the SKUs in the URL (sku=in.(...)), so they use smaller chunks
+        self.status_chunk_size = status_chunk_size
+        self.max_in_flight = max_in_flight
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self._sleep = sleep
+
+    def _with_retries(self, send: Callable[[], Any]) -> int:
+        """
+        Runs one chunk request; returns the number of retries it took.
+        """
+        for attempt in range(self.max_retries + 1):
+            try:
+                send()
+                return attempt
+            except Exception as e:
+                if attempt == self.max_retries:
+                    raise
+                delay = self.backoff * (2**attempt) * (0.5 + random.random())
+                logger.warning(f"Chunk write failed ({e}); retrying in {delay:.2f}s")
+                self._sleep(delay)
+        return self.max_retries
+
+    def _run_chunks(
+        self, label: str, chunks: List[Sequence[Any]], send: Callable[[Sequence[Any]], Any]
+    ) -> LoadStats:
+        started = time.perf_counter()
+        rows = sum(len(chunk) for chunk in chunks)
+        with ThreadPoolExecutor(max_workers=self.max_in_flight) as executor:
+            retries = sum(
+                executor.map(lambda chunk: self._with_retries(lambda: send(chunk)), chunks)
+            )
+        stats = LoadStats(rows, len(chunks), retries, time.perf_counter() - started)
+        logger.info(
+            f"{label}: {stats.rows} rows in {stats.chunks} chunks, {stats.retries} retries, "
+            f"{stats.rows_per_second:,.0f} rows/s"
+        )
+        return stats
+
+    def upsert_records(
+        self, records: Sequence[Union[GoldenRecord, Dict[str, Any]]], on_conflict: str = "sku"
+    ) -> LoadStats:
+        """
+        Upserts golden records keyed on on_conflict. Postgres rejects an upsert that
+        touches the same key twice, so only the last record per key is sent (see
+        unique_by_key); stats.keys lists the keys sent. A batch of only GoldenRecords takes
+        the fast path (see _post_records).
+        """
+        if records and all(isinstance(record, GoldenRecord) for record in records):
+            return self._upsert_golden_records(records, on_conflict)
+
+        rows = [
+            record.model_dump(mode="json") if isinstance(record, GoldenRecord) else record
+            for record in records
+        ]
+        payload = unique_by_key(rows, lambda row: row.get(on_conflict), on_conflict)
+
+        def send(chunk):
+            self.supabase.table(self.table).upsert(
+                list(chunk), on_conflict=on_conflict, returning=_minimal()
+            ).execute()
+
+        stats = self._run_chunks(
+            f"Upserted into {self.table}", list(chunked(payload, self.chunk_size)), send
+        )
+        return stats._replace(keys=tuple(row[on_conflict] for row in payload))
+
+    def _upsert_golden_records(
+        self, records: Sequence[GoldenRecord], on_conflict: str
+    ) -> LoadStats:
+        payload = unique_by_key(
+            records, lambda record: getattr(record, on_conflict, None), on_conflict
+        )
+        prefer = f"return={_minimal().value},resolution=merge-duplicates"
+
+        def send(chunk):
+            self._post_records(chunk, {"on_conflict": on_conflict}, prefer)
+
+        stats = self._run_chunks(
+            f"Upserted into {self.table}", list(chunked(payload, self.chunk_size)), send
+        )
+        return stats._replace(keys=tuple(getattr(record, on_conflict) for record in payload))
+
+    def _post_records(self, records: Sequence[GoldenRecord], params: Dict[str, str], prefer: str):
+        """
+        POSTs already validated records to the table's PostgREST endpoint as one JSON body
+        encoded by pydantic-core (dump_records_json), over the client's own connection
+        pool and headers. The query builder would go through model_dump and json.dumps,
+        which costs several times as much as the encoding itself.
+        """
+        postgrest = self.supabase.postgrest
+        response = postgrest.session.post(
+            str(postgrest.base_url.joinpath(self.table)),
+            content=dump_records_json(records),
+            params=params,
+            headers={**postgrest.headers, "Prefer": prefer, "Content-Type": "application/json"},
+        )
+        response.raise_for_status()
+
+    def update_status(self, skus: Sequence[str], status: str) -> LoadStats:
+        """
+        Sets pipeline_status for the given SKUs, one bounded in_ filter per chunk.
+        """
+        skus = sorted(set(skus))
+
+        def send(chunk):
+            self.supabase.table(self.status_table).update(
+                {"pipeline_status": status}, returning=_minimal()
+            ).in_("sku", list(chunk)).execute()
+
+        return self._run_chunks(
+            f"Set {self.status_table} status '{status}'",
+            list(chunked(skus, self.status_chunk_size)),
+            send,
+        )
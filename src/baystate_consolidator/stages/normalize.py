@@ -0,0 +1,100 @@
+from typing import Any, Callable, Dict, List, Optional, Union
+
+import polars as pl
+
+from baystate_consolidator.normalizers.price import normalize_price
+from baystate_consolidator.normalizers.text import normalize_weight
+
+
+def records_to_frame(records: List[Dict[str, Any]]) -> pl.DataFrame:
+    """
+    Builds a DataFrame from flattened source records.
+    Scans every record for the schema since scrapers disagree on which fields they send,
+    and falls back to strings when a column mixes types (e.g. "$10.00" and 10.0).
+    """
+    return pl.DataFrame(records, infer_schema_length=None, strict=False)
+
+
+def normalize_text_expr(column: str) -> pl.Expr:
+    """
+    Vectorized equivalent of normalizers.text.normalize_text.
+    """
+    return (
+        pl.col(column)
+        .cast(pl.String)
+        .str.to_lowercase()
+        .str.strip_chars()
+        .str.replace_all(r"\s+", " ")
+        .fill_null("")
+    )
+
+
+def _map_distinct(
+    series: pl.Series, func: Callable[[Any], Any], return_dtype: pl.DataType
+) -> pl.Series:
+    """
+    Applies a scalar normalizer once per distinct value instead of once per row.
+    """
+    uniques = series.drop_nulls().unique()
+    mapping = {value: func(value) for value in uniques.to_list()}
+    return series.replace_strict(mapping, default=None, return_dtype=return_dtype)
+
+
+def normalize_price_series(series: pl.Series) -> pl.Series:
+    """
+    Vectorized equivalent of normalizers.price.normalize_price.
+    Numeric columns are cast directly; string columns go through price-parser per distinct value.
+    """
+    if series.dtype.is_numeric():
+        return series.cast(pl.Float64)
+    if series.dtype == pl.Null:
+        return series.cast(pl.Float64)
+    return _map_distinct(series.cast(pl.String), normalize_price, pl.Float64)
+
+
+def normalize_weight_series(series: pl.Series) -> pl.Series:
+    """
+    Vectorized equivalent of normalizers.text.normalize_weight.
+    Unit parsing cannot be expressed as a Polars expression, so it runs per distinct value.
+    """
+    if series.dtype == pl.Null:
+        return series.cast(pl.String)
+    return _map_distinct(series.cast(pl.String), normalize_weight, pl.String)
+
+
+def normalize_frame(df: pl.DataFrame) -> pl.DataFrame:
+    """
+    Columnar normalization stage.
+    Produces the same values as running normalize_price, normalize_text and normalize_weight
+    on each record, but over whole columns:
+    - price -> Float64
+    - title -> name (lowercase, single-spaced)
+    - brand -> lowercase, single-spaced
+    - weight -> "X lb" / "Y oz" or null
+    """
+    exprs: List[pl.Expr] = []
+
+    if "price" in df.columns:
+        exprs.append(normalize_price_series(df["price"]).alias("price"))
+    if "title" in df.columns:
+        exprs.append(normalize_text_expr("title").alias("name"))
+    if "brand" in df.columns:
+        exprs.append(normalize_text_expr("brand").alias("brand"))
+    if "weight" in df.columns:
+        exprs.append(normalize_weight_series(df["weight"]).alias("weight"))
+
+    if not exprs:
+        return df
+    return df.with_columns(exprs)
+
+
+def normalize_records(records: Union[List[Dict[str, Any]], pl.DataFrame]) -> Optional[pl.DataFrame]:
+    """
+    Convenience wrapper: flattened source records (or a frame of them, see
+    stages.ingest.flatten_sources) in, normalized DataFrame out.
+    """
+    if isinstance(records, pl.DataFrame):
+        return normalize_frame(records) if not records.is_empty() else None
+    if not records:
+        return None
+    return normalize_frame(records_to_frame(records))
@@ -0,0 +1,263 @@
+from datetime import datetime
+from typing import Dict, List, NamedTuple, Optional, Sequence, Union
+
+import polars as pl
+
+from baystate_consolidator.models.golden_record import GoldenRecord
+
+SOURCE_PRIORITY = "source_priority"
+MOST_FREQUENT = "most_frequent"
+FRESHEST = "freshest"
+LONGEST = "longest"
+STRATEGIES = (SOURCE_PRIORITY, MOST_FREQUENT, FRESHEST, LONGEST)
+
+EXCEL_SOURCE = "excel"
+METADATA_COLUMN = "consolidation_metadata"
+
+
+class FieldRule(NamedTuple):
+    strategy: str
+    # Scraper names, best first; falls back to the engine-wide priority when None
+    source_priority: Optional[List[str]] = None
+
+
+DEFAULT_FIELD_RULES: Dict[str, FieldRule] = {
+    "sku": FieldRule(MOST_FREQUENT),
+    "name": FieldRule(MOST_FREQUENT),
+    "description": FieldRule(LONGEST),
+    "price": FieldRule(FRESHEST),
+    "brand": FieldRule(MOST_FREQUENT),
+    "category": FieldRule(MOST_FREQUENT),
+    "product_type": FieldRule(MOST_FREQUENT),
+    "weight": FieldRule(MOST_FREQUENT),
+    "images": FieldRule(LONGEST),
+}
+
+# Fields holding lists of values rather than one value
+LIST_FIELDS = ("images",)
+
+# Same fallbacks the per-cluster SurvivorshipEngine uses for required GoldenRecord fields
+REQUIRED_DEFAULTS = {"sku": "UNKNOWN", "name": "Unknown Product", "price": 0.0}
+
+
+class BatchSurvivorshipEngine:
+    """
+    Resolves every field of every cluster in one group_by pass over the clustered frame
+    (source records with a cluster_id), filling FieldMetadata lineage from the same pass.
+
+    Per field, candidates are the cluster's non-null values, ordered by the field's rule
+    (ties go to the freshest scraped_at). Lineage records the winning scraper, its
+    scraped_at, and as confidence the share of the cluster's values that agree with it.
+    """
+
+    def __init__(
+        self,
+        field_rules: Optional[Dict[str, FieldRule]] = None,
+        source_priority: Optional[Sequence[str]] = None,
+        cluster_column: str = "cluster_id",
+    ):
+        self.field_rules = {**DEFAULT_FIELD_RULES, **(field_rules or {})}
+        for field, rule in self.field_rules.items():
+            if rule.strategy not in STRATEGIES:
+                raise ValueError(f"Unknown survivorship strategy for {field}: {rule.strategy}")
+        self.source_priority = list(source_priority or [])
+        self.cluster_column = cluster_column
+
+    def checkpoint_config(self) -> Dict[str, object]:
+        return {
+            "field_rules": {field: list(rule) for field, rule in self.field_rules.items()},
+            "source_priority": self.source_priority,
+            "cluster_column": self.cluster_column,
+        }
+
+    def _prepare(self, df: pl.DataFrame, fields: List[str]) -> pl.DataFrame:
+        exprs = []
+        if "scraper_name" not in df.columns:
+            exprs.append(pl.lit(None, dtype=pl.String).alias("scraper_name"))
+        if "scraped_at" not in df.columns:
+            exprs.append(pl.lit(None, dtype=pl.Datetime("us")).alias("scraped_at"))
+        elif df.schema["scraped_at"] == pl.String:
+            exprs.append(pl.col("scraped_at").str.to_datetime(strict=False, time_unit="us"))
+        for field in fields:
+            # An all-null LONGEST field (no sources sent it) gets a type with a length
+            if self.field_rules[field].strategy == LONGEST and df.schema[field] == pl.Null:
+                dtype = pl.List(pl.String) if field in LIST_FIELDS else pl.String
+                exprs.append(pl.col(field).cast(dtype))
+            # How many records in the cluster carry the same value
+            exprs.append(pl.len().over(self.cluster_column, field).alias(f"__freq_{field}"))
+        df = df.with_columns(exprs)
+        # One global ordinal per field and record, so each cluster's winner is a single arg_max
+        # instead of a sort per cluster; non-null candidates always outrank null ones
+        return df.with_columns(
+            pl.struct(
+                key.alias(f"k{i}")
+                for i, key in enumerate(
+                    [pl.col(field).is_not_null(), *self._order(field, df.schema[field])]
+                )
+            )
+            .rank("ordinal")
+            .alias(f"__rank_{field}")
+            for field in fields
+        )
+
+    def _order(self, field: str, dtype: pl.DataType) -> List[pl.Expr]:
+        rule = self.field_rules[field]
+        freshest = pl.col("scraped_at").dt.epoch("us").fill_null(0)
+        if rule.strategy == SOURCE_PRIORITY:
+            priority = rule.source_priority or self.source_priority
+            rank = pl.col("scraper_name").replace_strict(
+                {name: -i for i, name in enumerate(priority)}, default=-len(priority)
+            )
+            return [rank, freshest]
+        if rule.strategy == MOST_FREQUENT:
+            return [pl.col(f"__freq_{field}"), freshest]
+        if rule.strategy == LONGEST:
+            value = pl.col(field)
+            length = value.list.len() if isinstance(dtype, pl.List) else value.str.len_chars()
+            return [length, freshest]
+        return [freshest]
+
+    def _field_aggs(self, field: str) -> List[pl.Expr]:
+        winner = pl.col(f"__rank_{field}").arg_max()
+        present = pl.col(field).is_not_null().sum()
+
+        def best(column: str) -> pl.Expr:
+            return pl.col(column).get(winner)
+
+        confidence = pl.when(present > 0).then(best(f"__freq_{field}") / present)
+        return [
+            best(field).alias(field),
+            pl.struct(
+                best(field).alias("value"),
+                pl.concat_str(pl.lit("scraper:"), best("scraper_name")).alias("source"),
+                confidence.cast(pl.Float64).alias("confidence"),
+                best("scraped_at").alias("timestamp"),
+            ).alias(f"__meta_{field}"),
+        ]
+
+    def resolve(
+        self,
+        clustered: pl.DataFrame,
+        excel_prices: Optional[Union[Dict[str, float], pl.DataFrame]] = None,
+    ) -> pl.DataFrame:
+        """
+        One row per cluster: cluster_id, record_ids, each resolved field, excel_price and
+        a consolidation_metadata struct of {value, source, confidence, timestamp} per field.
+        excel_prices maps cluster_id -> price (or is a frame with those two columns) and,
+        like an excel_price column on the records, overrides the resolved price.
+        """
+        fields = [f for f in self.field_rules if f in clustered.columns]
+        df = self._prepare(clustered, fields)
+
+        aggs = [pl.col("unique_id").alias("record_ids")] if "unique_id" in df.columns else []
+        for field in fields:
+            aggs.extend(self._field_aggs(field))
+        if "excel_price" in df.columns:
+            aggs.append(pl.col("excel_price").drop_nulls().first().cast(pl.Float64))
+
+        resolved = df.group_by(self.cluster_column, maintain_order=True).agg(aggs)
+        resolved = self._apply_excel_prices(resolved, excel_prices)
+
+        fills = [
+            pl.col(field).fill_null(default)
+            for field, default in REQUIRED_DEFAULTS.items()
+            if field in resolved.columns
+        ]
+        fills += [
+            pl.lit(default).alias(field)
+            for field, default in REQUIRED_DEFAULTS.items()
+            if field not in resolved.columns
+        ]
+        meta_columns = [f"__meta_{field}" for field in fields]
+        return resolved.with_columns(
+            *fills,
+            pl.struct([pl.col(c).name.map(lambda c: c[7:]) for c in meta_columns]).alias(
+                METADATA_COLUMN
+            ),
+        ).drop(meta_columns)
+
+    def _apply_excel_prices(
+        self,
+        resolved: pl.DataFrame,
+        excel_prices: Optional[Union[Dict[str, float], pl.DataFrame]],
+    ) -> pl.DataFrame:
+        if excel_prices is not None:
+            if isinstance(excel_prices, dict):
+                excel_prices = pl.DataFrame(
+                    {
+                        self.cluster_column: list(excel_prices.keys()),
+                        "excel_price": list(excel_prices.values()),
+                    },
+                    schema={
+                        self.cluster_column: resolved.schema[self.cluster_column],
+                        "excel_price": pl.Float64,
+                    },
+                )
+            override = excel_prices.select(
+                self.cluster_column, pl.col("excel_price").alias("__excel_override")
+            )
+            resolved = resolved.join(override, on=self.cluster_column, how="left")
+            if "excel_price" in resolved.columns:
+                resolved = resolved.with_columns(
+                    pl.coalesce("__excel_override", "excel_price").alias("excel_price")
+                ).drop("__excel_override")
+            else:
+                resolved = resolved.rename({"__excel_override": "excel_price"})
+
+        if "excel_price" not in resolved.columns:
+            return resolved.with_columns(pl.lit(None, dtype=pl.Float64).alias("excel_price"))
+
+        excel = pl.col("excel_price").is_not_null()
+        price = pl.col("price") if "price" in resolved.columns else pl.lit(None, dtype=pl.Float64)
+        exprs = [pl.when(excel).then(pl.col("excel_price")).otherwise(price).alias("price")]
+        if "__meta_price" in resolved.columns:
+            exprs.append(
+                pl.when(excel)
+                .then(
+                    pl.struct(
+                        pl.col("excel_price").alias("value"),
+                        pl.lit(EXCEL_SOURCE).alias("source"),
+                        pl.lit(1.0).alias("confidence"),
+                        pl.lit(None, dtype=pl.Datetime("us")).alias("timestamp"),
+                    )
+                )
+                .otherwise(pl.col("__meta_price"))
+                .alias("__meta_price")
+            )
+        return resolved.with_columns(exprs)
+
+    def to_golden_records(self, resolved: pl.DataFrame) -> List[GoldenRecord]:
+        """
+        Validates resolved rows into GoldenRecords; the only place Pydantic runs.
+        Rows are handed over as JSON so pydantic-core parses them without building
+        intermediate Python dicts; lineage entries without a value are left out.
+        """
+        if resolved.is_empty():
+            return []
+        now = datetime.now()
+        entries = []
+        for field in resolved.schema[METADATA_COLUMN].fields:
+            entry = pl.col(METADATA_COLUMN).struct.field(field.name)
+            entries.append(
+                pl.when(entry.struct.field("value").is_not_null()).then(
+                    pl.concat_str(
+                        pl.lit(f'"{field.name}":'),
+                        entry.struct.with_fields(
+                            pl.field("source").fill_null("unknown"),
+                            pl.field("timestamp").fill_null(now),
+                        ).struct.json_encode(),
+                    )
+                )
+            )
+        metadata = pl.concat_str(entries, separator=",", ignore_nulls=True)
+        if "images" in resolved.columns:
+            resolved = resolved.with_columns(pl.col("images").fill_null([]))
+        payload = resolved.select(
+            pl.concat_str(
+                pl.struct(pl.exclude(METADATA_COLUMN)).struct.json_encode().str.strip_suffix("}"),
+                pl.lit(f',"{METADATA_COLUMN}":{{'),
+                metadata,
+                pl.lit("}}"),
+            )
+        ).to_series()
+        return [GoldenRecord.model_validate_json(line) for line in payload]
@@ -0,0 +1,390 @@
+import gc
+import io
+import json
+import logging
+import os
+import random
+import resource
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Sequence
+
+import polars as pl
+
+from baystate_consolidator.models.golden_record import GoldenRecord, dump_records_json
+from baystate_consolidator.models.raw import RawScrapedProduct
+from baystate_consolidator.normalizers.price import normalize_price
+from baystate_consolidator.pipelines.dedupe import DeduplicationPipeline
+from baystate_consolidator.pipelines.match_index import MatchQuery, ProductIndex
+from baystate_consolidator.stages.ingest import flatten_sources
+from baystate_consolidator.stages.lineage import lineage_frame, lineage_from_records
+from baystate_consolidator.stages.normalize import normalize_records
+from baystate_consolidator.stages.survivorship import BatchSurvivorshipEngine
+from baystate_consolidator.utils.synthetic import CatalogGenerator
+
+STAGES = ("ingest", "normalize", "dedupe", "survivorship")
+DEFAULT_SIZES = (10_000, 100_000, 1_000_000)
+# Blocks on brand plus the first name token, so block sizes stay flat as the catalog grows
+BENCHMARK_BLOCKING_KEYS = [["brand", "name_token"], ["brand", "size_bucket"]]
+
+logger = logging.getLogger(__name__)
+
+
+class StageResult(NamedTuple):
+    size: int
+    stage: str
+    seconds: float
+    # Highest resident set size seen while the stage ran
+    peak_rss_mb: float
+    rows_out: int
+
+
+class BenchmarkRun(NamedTuple):
+    results: List[StageResult]
+    # Pairwise precision/recall of the dedupe stage against the generator's truth, per size
+    quality: Dict[int, Dict[str, float]]
+
+
+class SerializationResult(NamedTuple):
+    method: str
+    records: int
+    seconds: float
+    size_bytes: int
+
+
+class MatchLatency(NamedTuple):
+    # Golden records in the index
+    catalog_size: int
+    queries: int
+    build_seconds: float
+    p50_ms: float
+    p99_ms: float
+    # Share of queries with a listing of the same product among the top matches
+    recall: float
+
+
+def _current_rss_mb() -> float:
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except OSError:
+        # No procfs: fall back to the process-lifetime peak (KiB on Linux)
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+@contextmanager
+def _peak_rss(interval: float = 0.01) -> Iterator[List[float]]:
+    """
+    Samples RSS on a background thread; native Polars/DuckDB allocations are included,
+    which tracemalloc would miss. Yields a one-item list holding the peak in MiB.
+    """
+    peak = [_current_rss_mb()]
+    done = threading.Event()
+
+    def sample():
+        while not done.wait(interval):
+            peak[0] = max(peak[0], _current_rss_mb())
+
+    sampler = threading.Thread(target=sample, daemon=True)
+    sampler.start()
+    try:
+        yield peak
+    finally:
+        done.set()
+        sampler.join()
+        peak[0] = max(peak[0], _current_rss_mb())
+
+
+def pairwise_quality(clustered: pl.DataFrame, truth: Dict[str, int]) -> Dict[str, float]:
+    """
+    Pairwise precision and recall of cluster assignments, counted per group rather than
+    by enumerating pairs, so it stays cheap at a million records.
+    """
+    labels = clustered.select("unique_id", "cluster_id").with_columns(
+        pl.col("unique_id").replace_strict(truth, return_dtype=pl.Int64).alias("product_id")
+    )
+
+    def pairs(*keys: str) -> int:
+        sizes = labels.group_by(keys).len()["len"]
+        return int((sizes * (sizes - 1) // 2).sum())
+
+    true_positive = pairs("cluster_id", "product_id")
+    predicted, actual = pairs("cluster_id"), pairs("product_id")
+    return {
+        "precision": true_positive / predicted if predicted else 1.0,
+        "recall": true_positive / actual if actual else 1.0,
+    }
+
+
+def _timed(size: int, stage: str, results: List[StageResult], func, *args) -> Any:
+    """
+    Runs one stage, appending its wall time, peak RSS and output rows to results.
+    """
+    with _peak_rss() as peak:
+        started = time.perf_counter()
+        output = func(*args)
+        seconds = time.perf_counter() - started
+    result = StageResult(size, stage, round(seconds, 3), round(peak[0], 1), len(output))
+    logger.info(
+        f"{size:,} records / {stage}: {result.seconds:.2f}s, "
+        f"peak RSS {result.peak_rss_mb:,.0f} MiB"
+    )
+    results.append(result)
+    return output
+
+
+def run_benchmark(
+    sizes: Sequence[int] = DEFAULT_SIZES,
+    pipeline: Optional[DeduplicationPipeline] = None,
+    generator: Optional[CatalogGenerator] = None,
+) -> BenchmarkRun:
+    """
+    Times ingest (flattening products_ingestion rows), normalize, dedupe and
+    survivorship (resolve plus GoldenRecord validation) on synthetic catalogs of each
+    size. Nothing touches the network; data generation is not timed.
+    """
+    pipeline = pipeline or DeduplicationPipeline(
+        blocking_columns=BENCHMARK_BLOCKING_KEYS, max_block_comparisons=50_000
+    )
+    generator = generator or CatalogGenerator()
+    survivorship = BatchSurvivorshipEngine()
+    results: List[StageResult] = []
+    quality: Dict[int, Dict[str, float]] = {}
+
+    for size in sizes:
+        catalog = generator.generate(size)
+        gc.collect()
+
+        records = _timed(size, "ingest", results, flatten_sources, catalog.rows)
+        normalized = _timed(size, "normalize", results, normalize_records, records)
+        clustered = _timed(size, "dedupe", results, pipeline.run, normalized)
+        _timed(
+            size,
+            "survivorship",
+            results,
+            lambda frame: survivorship.to_golden_records(survivorship.resolve(frame)),
+            clustered,
+        )
+        quality[size] = pairwise_quality(clustered, catalog.truth)
+        del catalog, records, normalized, clustered
+
+    return BenchmarkRun(results, quality)
+
+
+def load_baseline(path: str) -> Dict[str, Dict[str, Dict[str, float]]]:
+    """
+    Baseline file layout: {size: {stage: {"seconds": ..., "peak_rss_mb": ...}}}.
+    """
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_baseline(path: str, results: Sequence[StageResult]):
+    """
+    Merges results into the baseline file, keeping entries for sizes not re-run.
+    """
+    baseline = load_baseline(path)
+    for result in results:
+        baseline.setdefault(str(result.size), {})[result.stage] = {
+            "seconds": result.seconds,
+            "peak_rss_mb": result.peak_rss_mb,
+        }
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(baseline, f, indent=2, sort_keys=True)
+
+
+def compare_to_baseline(
+    results: Sequence[StageResult],
+    baseline: Dict[str, Dict[str, Dict[str, float]]],
+    tolerance: float = 0.25,
+    memory_tolerance: float = 0.25,
+    min_seconds: float = 0.5,
+) -> List[str]:
+    """
+    One message per stage that got slower than baseline * (1 + tolerance) or used more
+    memory than baseline * (1 + memory_tolerance). Stages whose baseline is under
+    min_seconds only fail on memory; timer noise dominates at that scale.
+    """
+    regressions = []
+    for result in results:
+        expected = baseline.get(str(result.size), {}).get(result.stage)
+        if not expected:
+            continue
+        limit = expected["seconds"] * (1 + tolerance)
+        if expected["seconds"] >= min_seconds and result.seconds > limit:
+            regressions.append(
+                f"{result.size:,}/{result.stage}: {result.seconds:.2f}s "
+                f"vs baseline {expected['seconds']:.2f}s (limit {limit:.2f}s)"
+            )
+        memory_limit = expected["peak_rss_mb"] * (1 + memory_tolerance)
+        if result.peak_rss_mb > memory_limit:
+            regressions.append(
+                f"{result.size:,}/{result.stage}: peak RSS {result.peak_rss_mb:,.0f} MiB "
+                f"vs baseline {expected['peak_rss_mb']:,.0f} MiB (limit {memory_limit:,.0f} MiB)"
+            )
+    return regressions
+
+
+def format_results(run: BenchmarkRun) -> str:
+    lines = [f"{'records':>10}  {'stage':<13}{'seconds':>9}{'rows/s':>12}{'peak MiB':>10}"]
+    for result in run.results:
+        rate = result.size / result.seconds if result.seconds else 0.0
+        lines.append(
+            f"{result.size:>10,}  {result.stage:<13}{result.seconds:>9.2f}{rate:>12,.0f}"
+            f"{result.peak_rss_mb:>10,.0f}"
+        )
+    for size, scores in run.quality.items():
+        lines.append(
+            f"{size:>10,}  dedupe quality: precision {scores['precision']:.3f}, "
+            f"recall {scores['recall']:.3f}"
+        )
+    return "\n".join(lines)
+
+
+def _parquet(frame: pl.DataFrame) -> bytes:
+    buffer = io.BytesIO()
+    frame.write_parquet(buffer, compression="zstd")
+    return buffer.getvalue()
+
+
+# Serializations of the same golden records: how they were pushed before, the fast path
+# SupabaseLoader now takes, and lineage alone as JSON versus the columnar table
+SERIALIZATIONS = {
+    "model_dump_json": lambda records: b"[%s]"
+    % b",".join(record.model_dump_json().encode() for record in records),
+    "model_dump+json.dumps": lambda records: json.dumps(
+        [record.model_dump(mode="json") for record in records]
+    ).encode(),
+    "dump_records_json": dump_records_json,
+    "lineage_json": lambda records: b"[%s]"
+    % b",".join(
+        record.model_dump_json(include={"sku", "consolidation_metadata"}).encode()
+        for record in records
+    ),
+    "lineage_parquet": lambda records: _parquet(lineage_from_records(records)),
+}
+
+
+def benchmark_serialization(
+    records: Sequence[GoldenRecord], resolved: Optional[pl.DataFrame] = None
+) -> List[SerializationResult]:
+    """
+    Time and output size of each serialization. With the resolved frame the records came
+    from, also times the lineage table built straight from it, as run_consolidation does.
+    """
+    serializations = dict(SERIALIZATIONS)
+    if resolved is not None:
+        serializations["lineage_parquet_columnar"] = lambda _: _parquet(lineage_frame(resolved))
+    results = []
+    for method, serialize in serializations.items():
+        gc.collect()
+        started = time.perf_counter()
+        payload = serialize(records)
+        seconds = time.perf_counter() - started
+        results.append(SerializationResult(method, len(records), round(seconds, 4), len(payload)))
+    return results
+
+
+def run_serialization_benchmark(
+    sizes: Sequence[int], generator: Optional[CatalogGenerator] = None
+) -> List[SerializationResult]:
+    """
+    Serializes the golden records of synthetic catalogs of each size, one cluster per
+    SKU so every record carries full lineage from several scrapers.
+    """
+    generator = generator or CatalogGenerator()
+    survivorship = BatchSurvivorshipEngine()
+    results = []
+    for size in sizes:
+        normalized = normalize_records(flatten_sources(generator.generate(size).rows))
+        resolved = survivorship.resolve(normalized.with_columns(pl.col("sku").alias("cluster_id")))
+        records = survivorship.to_golden_records(resolved)
+        results.extend(benchmark_serialization(records, resolved))
+    return results
+
+
+def format_serialization(results: Sequence[SerializationResult]) -> str:
+    lines = [f"{'records':>10}  {'method':<26}{'seconds':>9}{'records/s':>12}{'MiB':>9}"]
+    for result in results:
+        rate = result.records / result.seconds if result.seconds else 0.0
+        lines.append(
+            f"{result.records:>10,}  {result.method:<26}{result.seconds:>9.3f}{rate:>12,.0f}"
+            f"{result.size_bytes / 2**20:>9.1f}"
+        )
+    return "\n".join(lines)
+
+
+def _percentile(values: Sequence[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def run_match_benchmark(
+    sizes: Sequence[int],
+    queries: int = 1000,
+    generator: Optional[CatalogGenerator] = None,
+    top: int = 5,
+) -> List[MatchLatency]:
+    """
+    Indexes a catalog of each size in golden records (one per synthetic listing) and
+    times single-product matches, normalization included, for scraped source records
+    drawn from it, as the /match endpoint serves them.
+    """
+    generator = generator or CatalogGenerator()
+    survivorship = BatchSurvivorshipEngine()
+    results = []
+    for size in sizes:
+        # Listings average about 2.5 sources, so this holds at least size listings
+        catalog = generator.generate(size * 3)
+        rows = catalog.rows[:size]
+        normalized = normalize_records(flatten_sources(rows))
+        resolved = survivorship.resolve(normalized.with_columns(pl.col("sku").alias("cluster_id")))
+        golden = resolved.select(
+            pl.col("cluster_id").alias("sku"), "name", "brand", "weight", "price"
+        ).to_dicts()
+        del normalized, resolved
+        product_of = {unique_id.split("_", 1)[0]: pid for unique_id, pid in catalog.truth.items()}
+
+        index = ProductIndex()
+        started = time.perf_counter()
+        index.refresh([golden])
+        build_seconds = time.perf_counter() - started
+
+        rng = random.Random(generator.seed)
+        timings, hits = [], 0
+        for row in rng.choices(rows, k=queries):
+            scraper, payload = rng.choice(list(row["sources"].items()))
+            product = RawScrapedProduct(
+                **{**payload, "price": normalize_price(payload.get("price"))},
+                scraper_name=scraper,
+            )
+            started = time.perf_counter()
+            matches = index.match(MatchQuery.from_product(product), limit=top)
+            timings.append(time.perf_counter() - started)
+            hits += any(product_of[match.sku] == product_of[row["sku"]] for match in matches)
+
+        result = MatchLatency(
+            len(index),
+            queries,
+            round(build_seconds, 3),
+            round(_percentile(timings, 0.5) * 1000, 3),
+            round(_percentile(timings, 0.99) * 1000, 3),
+            round(hits / queries, 4),
+        )
+        logger.info(f"{len(index):,} golden records / match: {result}")
+        results.append(result)
+    return results
+
+
+def format_match(results: Sequence[MatchLatency]) -> str:
+    lines = [f"{'catalog':>10}{'queries':>9}{'build s':>9}{'p50 ms':>9}{'p99 ms':>9}{'recall':>8}"]
+    for result in results:
+        lines.append(
+            f"{result.catalog_size:>10,}{result.queries:>9,}{result.build_seconds:>9.2f}"
+            f"{result.p50_ms:>9.2f}{result.p99_ms:>9.2f}{result.recall:>8.3f}"
+        )
+    return "\n".join(lines)
@@ -1,38 +1,45 @@
-import os
-from typing import List, Dict, Any
-from supabase import create_client, Client
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, List, Dict, Any, AsyncIterator, Iterator, Optional, Sequence
+
+import polars as pl
+
+from baystate_consolidator.stages.ingest import concat_records, flatten_sources
+from baystate_consolidator.stages.load import LoadStats, SupabaseLoader
+
+if TYPE_CHECKING:
+    from supabase import Client
 
 
 class DatabaseIngestor:
-    def __init__(self, url: str = None, key: str = None):
-        self.url = url or os.getenv("SUPABASE_URL")
-        self.key = key or os.getenv("SUPABASE_KEY")
-        if not self.url or not self.key:
-            raise ValueError("Supabase URL and Key must be provided or set in env vars.")
-        self.supabase: Client = create_client(self.url, self.key)
+    def __init__(self, url: str = None, key: str = None, client: Optional["Client"] = None):
+        if client is not None:
+            self.url = url
+            self.key = key
+            self.supabase: "Client" = client
+            return
+        from baystate_consolidator.utils.supabase_client import get_supabase_provider
 
-    def fetch_pending_products(self, limit: int = 100) -> List[Dict[str, Any]]:
+        # Every ingestor in the process shares one pooled client per project
+        provider = get_supabase_provider(url, key)
+        self.url = provider.url
+        self.key = provider.key
+        self.supabase: "Client" = provider.client()
+
+    @staticmethod
+    def flatten_rows(rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """
-        Fetches products with status 'scraped' and flattens their sources.
+        Flattens products_ingestion rows: each source becomes a record for deduplication.
         """
-        response = (
-            self.supabase.table("products_ingestion")
-            .select("sku, sources")
-            .eq("pipeline_status", "scraped")
-            .limit(limit)
-            .execute()
-        )
-
         flattened_records = []
 
-        for row in response.data:
+        for row in rows:
             sku = row.get("sku")
             sources = row.get("sources", {})
 
             if not sources:
                 continue
 
-            # Flatten sources: each source becomes a record for deduplication
             for scraper_name, data in sources.items():
                 # Merge sku and scraper_name into the data payload
                 record = data.copy()
@@ -46,16 +53,139 @@ class DatabaseIngestor:
 
         return flattened_records
 
-    def update_status(self, skus: List[str], status: str):
+    def fetch_pending_products(self, limit: int = 100) -> List[Dict[str, Any]]:
         """
-        Updates the pipeline_status for a batch of SKUs.
+        Fetches products with status 'scraped' and flattens their sources.
         """
-        if not skus:
-            return
-
-        (
+        response = (
             self.supabase.table("products_ingestion")
-            .update({"pipeline_status": status})
-            .in_("sku", skus)
+            .select("sku, sources")
+            .eq("pipeline_status", "scraped")
+            .limit(limit)
             .execute()
         )
+
+        return self.flatten_rows(response.data)
+
+    def _fetch_page(self, after_sku: Optional[str], page_size: int) -> List[Dict[str, Any]]:
+        query = (
+            self.supabase.table("products_ingestion")
+            .select("sku, sources")
+            .eq("pipeline_status", "scraped")
+        )
+        if after_sku is not None:
+            query = query.gt("sku", after_sku)
+        return query.order("sku").limit(page_size).execute().data
+
+    def iter_pending_pages(
+        self, page_size: int = 500, max_rows: Optional[int] = None, prefetch: bool = True
+    ) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Pages through pending products_ingestion rows with keyset pagination on sku.
+        With prefetch, the next page is requested while the caller processes the current one.
+        """
+        fetched = 0
+        after_sku: Optional[str] = None
+        executor = ThreadPoolExecutor(max_workers=1) if prefetch else None
+
+        def request(after: Optional[str]):
+            size = page_size if max_rows is None else min(page_size, max_rows - fetched)
+            if executor is not None:
+                return executor.submit(self._fetch_page, after, size)
+            return self._fetch_page(after, size)
+
+        try:
+            pending = request(after_sku)
+            while True:
+                rows = pending.result() if executor is not None else pending
+                if not rows:
+                    return
+                fetched += len(rows)
+                after_sku = rows[-1]["sku"]
+                last_page = len(rows) < page_size or (max_rows is not None and fetched >= max_rows)
+                if not last_page:
+                    pending = request(after_sku)
+                yield rows
+                if last_page:
+                    return
+        finally:
+            if executor is not None:
+                executor.shutdown(wait=False, cancel_futures=True)
+
+    def iter_pending_batches(
+        self,
+        batch_size: int = 5000,
+        page_size: int = 500,
+        max_rows: Optional[int] = None,
+        prefetch: bool = True,
+    ) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Streams flattened source records in batches of roughly batch_size records.
+        All sources of a sku land in the same batch, so memory stays bounded by the batch size
+        instead of the size of the backlog.
+        """
+        batch: List[Dict[str, Any]] = []
+        for rows in self.iter_pending_pages(page_size, max_rows=max_rows, prefetch=prefetch):
+            for row in rows:
+                batch.extend(self.flatten_rows([row]))
+                if len(batch) >= batch_size:
+                    yield batch
+                    batch = []
+        if batch:
+            yield batch
+
+    def iter_pending_frames(
+        self,
+        batch_size: int = 5000,
+        page_size: int = 500,
+        max_rows: Optional[int] = None,
+        prefetch: bool = True,
+        promote: Sequence[str] = (),
+    ) -> Iterator[pl.DataFrame]:
+        """
+        Like iter_pending_batches, but each batch is one frame built column by column from
+        the sources payloads (see stages.ingest.flatten_sources) instead of a dict per
+        source record. Pages are flattened as they arrive, so only one page of raw rows is
+        held at a time; batches end on page boundaries.
+        """
+        frames: List[pl.DataFrame] = []
+        records = 0
+        for rows in self.iter_pending_pages(page_size, max_rows=max_rows, prefetch=prefetch):
+            frame = flatten_sources(rows, promote)
+            if frame.is_empty():
+                continue
+            frames.append(frame)
+            records += frame.height
+            if records >= batch_size:
+                yield concat_records(frames)
+                frames, records = [], 0
+        if frames:
+            yield concat_records(frames)
+
+    async def aiter_pending_batches(
+        self,
+        batch_size: int = 5000,
+        page_size: int = 500,
+        max_rows: Optional[int] = None,
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        """
+        Async variant of iter_pending_batches; page requests run in a worker thread.
+        """
+        batches = self.iter_pending_batches(batch_size, page_size, max_rows=max_rows)
+        sentinel = object()
+        try:
+            while True:
+                batch = await asyncio.to_thread(next, batches, sentinel)
+                if batch is sentinel:
+                    return
+                yield batch
+        finally:
+            batches.close()
+
+    def update_status(self, skus: List[str], status: str, chunk_size: int = 200) -> LoadStats:
+        """
+        Updates the pipeline_status for a batch of SKUs, in bounded concurrent chunks.
+        """
+        return SupabaseLoader(self.supabase, status_chunk_size=chunk_size).update_status(
+            skus, status
+        )
@@ -0,0 +1,213 @@
+import json
+import os
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+import polars as pl
+
+from baystate_consolidator.stages.ingest import concat_records, conform_frame, flatten_sources
+from baystate_consolidator.utils.database import DatabaseIngestor
+
+FILE_SCHEME = "file://"
+PARQUET_SUFFIXES = (".parquet", ".pq")
+NDJSON_SUFFIXES = (".ndjson", ".jsonl")
+JSON_SUFFIXES = (".json",)
+SUPPORTED_SUFFIXES = PARQUET_SUFFIXES + NDJSON_SUFFIXES + JSON_SUFFIXES
+
+
+def source_path(source: str) -> Optional[str]:
+    """
+    The path of a file:// source, or None for any other source.
+    """
+    return source[len(FILE_SCHEME) :] if source.startswith(FILE_SCHEME) else None
+
+
+def list_source_files(path: str) -> List[str]:
+    """
+    path itself, or every supported file under the directory path, in name order.
+    """
+    if os.path.isfile(path):
+        return [path]
+    if not os.path.isdir(path):
+        raise FileNotFoundError(f"No such file or directory: {path}")
+    files = []
+    for root, dirs, names in os.walk(path):
+        dirs[:] = sorted(d for d in dirs if not d.startswith((".", "_")))
+        files.extend(
+            os.path.join(root, name)
+            for name in names
+            if name.lower().endswith(SUPPORTED_SUFFIXES) and not name.startswith((".", "_"))
+        )
+    return sorted(files)
+
+
+def scan_file(path: str, infer_schema_length: Optional[int] = None) -> pl.LazyFrame:
+    """
+    LazyFrame over one dump file. Parquet is memory-mapped and NDJSON is read in chunks,
+    so projections, filters and row limits are pushed into the scan. A JSON array
+    cannot be scanned and is read whole.
+    """
+    suffix = os.path.splitext(path)[1].lower()
+    if suffix in PARQUET_SUFFIXES:
+        return pl.scan_parquet(path)
+    if suffix in NDJSON_SUFFIXES:
+        # Scrapers vary per row, so by default the whole file is read to infer sources
+        return pl.scan_ndjson(path, infer_schema_length=infer_schema_length, low_memory=True)
+    if suffix in JSON_SUFFIXES:
+        return pl.read_json(path, infer_schema_length=infer_schema_length).lazy()
+    raise ValueError(f"Unsupported file type {suffix!r}; expected one of {SUPPORTED_SUFFIXES}")
+
+
+def flatten_frame(rows: pl.DataFrame) -> List[Dict[str, Any]]:
+    """
+    Columnar equivalent of DatabaseIngestor.flatten_rows for a frame of
+    products_ingestion rows. Dumps of already flattened records pass through.
+    """
+    if "sources" not in rows.columns:
+        return _with_unique_id(rows).to_dicts()
+    if not isinstance(rows.schema["sources"], pl.Struct):
+        return DatabaseIngestor.flatten_rows(_parse_sources(rows))
+    unnested = _unnest_sources(rows)
+    return unnested.to_dicts() if unnested is not None else []
+
+
+def records_frame(rows: pl.DataFrame, promote: Sequence[str] = ()) -> pl.DataFrame:
+    """
+    Like flatten_frame, but keeps the records columnar in the layout of
+    stages.ingest.flatten_sources (typed known fields, the rest in extras).
+    """
+    if "sources" not in rows.columns:
+        return conform_frame(_with_unique_id(rows), promote)
+    if not isinstance(rows.schema["sources"], pl.Struct):
+        return flatten_sources(_parse_sources(rows), promote)
+    unnested = _unnest_sources(rows)
+    if unnested is None:
+        return flatten_sources([], promote)
+    return conform_frame(unnested, promote)
+
+
+def _with_unique_id(records: pl.DataFrame) -> pl.DataFrame:
+    if "unique_id" in records.columns:
+        return records
+    return records.with_columns(
+        pl.concat_str("sku", "scraper_name", separator="_").alias("unique_id")
+    )
+
+
+def _parse_sources(rows: pl.DataFrame) -> List[Dict[str, Any]]:
+    """
+    Rows whose sources jsonb was exported as text.
+    """
+    return [
+        {"sku": sku, "sources": json.loads(payload) if payload else {}}
+        for sku, payload in zip(rows["sku"].to_list(), rows["sources"].to_list())
+    ]
+
+
+def _unnest_sources(rows: pl.DataFrame) -> Optional[pl.DataFrame]:
+    frames = []
+    for field in rows.schema["sources"].fields:
+        scraper = field.name
+        payload = pl.col("sources").struct.field(scraper)
+        frame = rows.filter(payload.is_not_null()).select(
+            payload.struct.unnest(),
+            pl.col("sku"),
+            pl.lit(scraper).alias("scraper_name"),
+            pl.concat_str(pl.col("sku"), pl.lit(f"_{scraper}")).alias("unique_id"),
+        )
+        frames.append(frame)
+    if not frames:
+        return None
+    return pl.concat(frames, how="diagonal_relaxed")
+
+
+class FileIngestor:
+    """
+    Reads BayStateScraper dumps (products_ingestion rows as JSON, NDJSON or Parquet,
+    one file or a directory of them) with the same batch interface as
+    DatabaseIngestor, so runs can be replayed offline.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        status: Optional[str] = "scraped",
+        infer_schema_length: Optional[int] = None,
+    ):
+        self.path = path
+        self.files = list_source_files(path)
+        # Only rows with this pipeline_status are read; None reads every row
+        self.status = status
+        self.infer_schema_length = infer_schema_length
+
+    def _scan(self, path: str, columns: Sequence[str]) -> pl.LazyFrame:
+        frame = scan_file(path, self.infer_schema_length)
+        schema = frame.collect_schema()
+        if self.status is not None and "pipeline_status" in schema:
+            frame = frame.filter(pl.col("pipeline_status") == self.status)
+        if "sources" in schema:
+            frame = frame.select([column for column in columns if column in schema])
+        return frame
+
+    def iter_pending_pages(
+        self, page_size: int = 500, max_rows: Optional[int] = None
+    ) -> Iterator[pl.DataFrame]:
+        """
+        Frames of up to page_size products_ingestion rows, across every file in order.
+        """
+        remaining = max_rows
+        for path in self.files:
+            if remaining is not None and remaining <= 0:
+                return
+            frame = self._scan(path, ["sku", "sources"])
+            if remaining is not None:
+                frame = frame.head(remaining)
+            for rows in frame.collect_batches(chunk_size=page_size):
+                if rows.is_empty():
+                    continue
+                if remaining is not None:
+                    remaining -= rows.height
+                yield rows
+
+    def iter_pending_batches(
+        self,
+        batch_size: int = 5000,
+        page_size: int = 500,
+        max_rows: Optional[int] = None,
+    ) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Streams flattened source records in batches of roughly batch_size records; only
+        one page of rows and one batch of records are held in memory at a time.
+        """
+        batch: List[Dict[str, Any]] = []
+        for rows in self.iter_pending_pages(page_size, max_rows=max_rows):
+            batch.extend(flatten_frame(rows))
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def iter_pending_frames(
+        self,
+        batch_size: int = 5000,
+        page_size: int = 500,
+        max_rows: Optional[int] = None,
+        promote: Sequence[str] = (),
+    ) -> Iterator[pl.DataFrame]:
+        """
+        Like iter_pending_batches, but each batch is one frame of source records (see
+        records_frame); promote names extra fields to keep as columns.
+        """
+        frames: List[pl.DataFrame] = []
+        records = 0
+        for rows in self.iter_pending_pages(page_size, max_rows=max_rows):
+            frame = records_frame(rows, promote)
+            if frame.is_empty():
+                continue
+            frames.append(frame)
+            records += frame.height
+            if records >= batch_size:
+                yield concat_records(frames)
+                frames, records = [], 0
+        if frames:
+            yield concat_records(frames)
@@ -0,0 +1,69 @@
+from typing import Iterable, List, Optional, Tuple
+
+import numpy as np
+
+# 64-bit FNV-1a parameters
+FNV_OFFSET = np.uint64(0xCBF29CE484222325)
+FNV_PRIME = np.uint64(0x100000001B3)
+
+
+def _prepare_texts(texts: Iterable[Optional[str]], shingle_size: int) -> List[bytes]:
+    prepared = []
+    for text in texts:
+        text = " ".join(text.lower().split()) if text else ""
+        # Short names still get one shingle; empty ones get none
+        prepared.append(text.ljust(shingle_size).encode() if text else b"")
+    return prepared
+
+
+def shingle_hashes(
+    texts: Iterable[Optional[str]], shingle_size: int = 4
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Hashes every character k-shingle of every text in one vectorized pass over the
+    concatenated UTF-8 bytes. Returns (hashes, owner) where owner[i] is the index of the
+    text that shingle i came from; owners are non-decreasing.
+    """
+    encoded = _prepare_texts(texts, shingle_size)
+    lengths = np.fromiter((len(b) for b in encoded), dtype=np.int64, count=len(encoded))
+    buffer = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+    starts = np.concatenate(([0], np.cumsum(lengths)[:-1])) if len(lengths) else lengths
+
+    owner = np.repeat(np.arange(len(encoded)), lengths)
+    position = np.arange(len(buffer)) - starts[owner]
+    valid = position <= lengths[owner] - shingle_size
+    first = np.nonzero(valid)[0]
+
+    # FNV-1a over the k bytes of each shingle
+    hashes = np.full(len(first), FNV_OFFSET, dtype=np.uint64)
+    with np.errstate(over="ignore"):
+        for offset in range(shingle_size):
+            hashes ^= buffer[first + offset].astype(np.uint64)
+            hashes *= FNV_PRIME
+    return hashes, owner[first]
+
+
+def pairs_from_buckets(buckets: np.ndarray, n: int) -> np.ndarray:
+    """
+    Distinct (i, j) index pairs, i < j, of the n rows sharing a bucket id in at least one
+    column of buckets; negative ids mean no bucket.
+    """
+    encoded = []
+    for band in range(buckets.shape[1]):
+        members = np.flatnonzero(buckets[:, band] >= 0)
+        order = members[np.argsort(buckets[members, band], kind="stable")]
+        ids = buckets[order, band]
+        if not len(ids):
+            continue
+        run_starts = np.flatnonzero(np.r_[True, ids[1:] != ids[:-1]])
+        run_sizes = np.diff(np.r_[run_starts, len(ids)])
+        # Buckets of equal size expand to pairs together via one triu_indices
+        for size in np.unique(run_sizes):
+            groups = order[run_starts[run_sizes == size][:, None] + np.arange(size)]
+            left, right = np.triu_indices(size, 1)
+            a, b = groups[:, left].ravel(), groups[:, right].ravel()
+            encoded.append(np.minimum(a, b) * n + np.maximum(a, b))
+    if not encoded:
+        return np.empty((0, 2), dtype=np.int64)
+    unique = np.unique(np.concatenate(encoded))
+    return np.stack([unique // n, unique % n], axis=1)
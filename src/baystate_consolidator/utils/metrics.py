@@ -0,0 +1,368 @@
+import bisect
+import copy
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Sequence, Tuple
+
+# Label values in declaration order; the empty tuple for unlabelled metrics
+LabelValues = Tuple[str, ...]
+# (metric name, labels, value) samples a collector reports at scrape time
+Sample = Tuple[str, Dict[str, str], float]
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300)
+# For in-process lookups answered in milliseconds
+FAST_LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1)
+SIZE_BUCKETS = (1, 2, 3, 4, 5, 8, 13, 21, 50, 100, 500)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{_escape(str(value))}"' for name, value in zip(names, values))
+    return f"{{{pairs}}}"
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, Any]) -> LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels: Any):
+        if amount < 0:
+            raise ValueError("Counters only go up")
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: Any) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        return self._header() + [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in values
+        ]
+
+    def summary(self) -> Dict[str, float]:
+        with self._lock:
+            return {",".join(key) or "total": value for key, value in sorted(self._values.items())}
+
+    @staticmethod
+    def _subtract(after: float, before: Any) -> float:
+        return after - (before or 0.0)
+
+    def _add(self, key: LabelValues, amount: float):
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: [per-bucket counts (last one is +Inf), sum, max]
+        self._values: Dict[LabelValues, List[Any]] = {}
+
+    def observe(self, value: float, **labels: Any):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.setdefault(key, [[0] * (len(self.buckets) + 1), 0.0, value])
+            state[0][index] += 1
+            state[1] += value
+            state[2] = max(state[2], value)
+
+    def observe_many(self, values: Iterable[float], **labels: Any):
+        for value in values:
+            self.observe(value, **labels)
+
+    @contextmanager
+    def time(self, **labels: Any) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def count(self, **labels: Any) -> int:
+        with self._lock:
+            state = self._values.get(self._key(labels))
+            return sum(state[0]) if state else 0
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = sorted((key, [list(s[0]), s[1]]) for key, s in self._values.items())
+        lines = self._header()
+        names = self.labelnames + ("le",)
+        for key, (counts, total) in values:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                labels = _format_labels(names, key + (_format_value(bound),))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            values = sorted(self._values.items())
+        result = {}
+        for key, (counts, total, largest) in values:
+            count = sum(counts)
+            result[",".join(key) or "total"] = {
+                "count": count,
+                "sum": round(total, 6),
+                "mean": round(total / count, 6) if count else 0.0,
+                "max": round(largest, 6),
+            }
+        return result
+
+    @staticmethod
+    def _subtract(after: List[Any], before: Any) -> List[Any]:
+        if before is None:
+            return after
+        # The max cannot be subtracted; the later one bounds the new observations
+        return [[a - b for a, b in zip(after[0], before[0])], after[1] - before[1], after[2]]
+
+    def _add(self, key: LabelValues, state: List[Any]):
+        with self._lock:
+            current = self._values.get(key)
+            if current is None:
+                self._values[key] = [list(state[0]), state[1], state[2]]
+            else:
+                current[0] = [a + b for a, b in zip(current[0], state[0])]
+                current[1] += state[1]
+                current[2] = max(current[2], state[2])
+
+
+class MetricsRegistry:
+    """
+    Process-local metrics, rendered in the Prometheus text exposition format.
+    Collectors report values owned elsewhere (e.g. cache statistics) at render time.
+    Another process's metrics are folded in with changes_since() there and merge() here.
+    """
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: List[Tuple[str, str, str, Callable[[], Iterable[Sample]]]] = []
+        # Counter collector samples merged from other processes, by (collector, name, labels)
+        self._merged: Dict[Tuple[str, str, Tuple[Tuple[str, str], ...]], float] = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name: str, *args, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, *args, **kwargs)
+            elif not isinstance(metric, cls):
+                raise ValueError(f"{name} is already registered as a {metric.kind}")
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._get_or_create(Counter, name, documentation, labelnames)
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ) -> Histogram:
+        return self._get_or_create(Histogram, name, documentation, labelnames, buckets)
+
+    def register_collector(
+        self, name: str, documentation: str, collect: Callable[[], Iterable[Sample]], kind="gauge"
+    ):
+        with self._lock:
+            self._collectors.append((name, documentation, kind, collect))
+
+    def _collected(self) -> Iterator[Tuple[str, str, str, List[Sample]]]:
+        with self._lock:
+            collectors = list(self._collectors)
+        for name, documentation, kind, collect in collectors:
+            samples = list(collect())
+            with self._lock:
+                merged = {
+                    (sample, labels): value
+                    for (collector, sample, labels), value in self._merged.items()
+                    if collector == name
+                }
+            if merged:
+                for sample, labels, value in samples:
+                    key = (sample, tuple(labels.items()))
+                    merged[key] = merged.get(key, 0.0) + value
+                samples = [
+                    (sample, dict(labels), value) for (sample, labels), value in merged.items()
+                ]
+            yield name, documentation, kind, samples
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Picklable copy of every metric value and counter collector sample. Gauge collectors
+        describe this process only and are left out.
+        """
+        with self._lock:
+            metrics = list(self._metrics.values())
+        values = {}
+        for metric in metrics:
+            with metric._lock:
+                values[metric.name] = copy.deepcopy(metric._values)
+        collected = {
+            (name, sample, tuple(labels.items())): value
+            for name, _, kind, samples in self._collected()
+            if kind == "counter"
+            for sample, labels, value in samples
+        }
+        return {"metrics": values, "collected": collected}
+
+    def changes_since(self, before: Dict[str, Any]) -> Dict[str, Any]:
+        """What was recorded since the snapshot before, in the form merge() takes."""
+        after = self.snapshot()
+        with self._lock:
+            kinds = {name: type(metric) for name, metric in self._metrics.items()}
+        metrics = {}
+        for name, values in after["metrics"].items():
+            previous = before["metrics"].get(name, {})
+            changed = {
+                key: kinds[name]._subtract(value, previous.get(key))
+                for key, value in values.items()
+                if value != previous.get(key)
+            }
+            if changed:
+                metrics[name] = changed
+        collected = {
+            key: value - before["collected"].get(key, 0.0)
+            for key, value in after["collected"].items()
+            if value != before["collected"].get(key, 0.0)
+        }
+        return {"metrics": metrics, "collected": collected}
+
+    def merge(self, changes: Dict[str, Any]):
+        """Adds changes_since() output from another process; unknown metrics are skipped."""
+        for name, values in changes.get("metrics", {}).items():
+            with self._lock:
+                metric = self._metrics.get(name)
+            if metric is None:
+                continue
+            for key, value in values.items():
+                metric._add(key, value)
+        with self._lock:
+            for key, value in changes.get("collected", {}).items():
+                self._merged[key] = self._merged.get(key, 0.0) + value
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda metric: metric.name)
+        lines: List[str] = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        for name, documentation, kind, samples in self._collected():
+            lines += [f"# HELP {name} {documentation}", f"# TYPE {name} {kind}"]
+            for sample_name, labels, value in samples:
+                formatted = _format_labels(list(labels), list(labels.values()))
+                lines.append(f"{sample_name}{formatted} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        Plain-dict view of every metric, for a structured log line at the end of a run.
+        """
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda metric: metric.name)
+        result: Dict[str, Any] = {metric.name: metric.summary() for metric in metrics}
+        for name, _, _, samples in self._collected():
+            result[name] = {
+                ",".join(labels.values()) or "total": value for _, labels, value in samples
+            }
+        return {name: values for name, values in result.items() if values}
+
+    def clear(self):
+        with self._lock:
+            metrics = list(self._metrics.values())
+        for metric in metrics:
+            with metric._lock:
+                metric._values.clear()
+        with self._lock:
+            self._merged.clear()
+
+
+REGISTRY = MetricsRegistry()
+
+STAGE_RECORDS = REGISTRY.counter(
+    "baystate_stage_records_total", "Records that left each pipeline stage", ["stage"]
+)
+STAGE_SECONDS = REGISTRY.histogram(
+    "baystate_stage_duration_seconds", "Wall time per pipeline stage run", ["stage"]
+)
+CANDIDATE_PAIRS = REGISTRY.counter(
+    "baystate_candidate_pairs_total",
+    "Record pairs generated by blocking, summed over blocking rules",
+)
+MATCHED_PAIRS = REGISTRY.counter(
+    "baystate_matched_pairs_total", "Candidate pairs scored at or above the match threshold"
+)
+CLUSTER_SIZE = REGISTRY.histogram(
+    "baystate_cluster_size_records", "Source records per cluster", buckets=SIZE_BUCKETS
+)
+EXTERNAL_CALL_SECONDS = REGISTRY.histogram(
+    "baystate_external_call_duration_seconds",
+    "Latency of OCR/LLM and other external service calls",
+    ["service", "outcome"],
+)
+OCR_CACHE_HITS = REGISTRY.counter(
+    "baystate_ocr_cache_hits_total", "OCR results served without a model call"
+)
+CHECKPOINT_HITS = REGISTRY.counter(
+    "baystate_checkpoint_hits_total", "Stage outputs loaded from a checkpoint", ["stage"]
+)
+JOBS = REGISTRY.counter("baystate_jobs_total", "Finished consolidation jobs", ["status"])
+MATCH_SECONDS = REGISTRY.histogram(
+    "baystate_match_duration_seconds",
+    "Latency of single-product /match lookups",
+    buckets=FAST_LATENCY_BUCKETS,
+)
@@ -0,0 +1,237 @@
+import os
+import threading
+import time
+from typing import TYPE_CHECKING, Dict, List, NamedTuple, Optional, Tuple
+
+import httpx
+
+from baystate_consolidator.utils.metrics import EXTERNAL_CALL_SECONDS, REGISTRY, Sample
+
+if TYPE_CHECKING:
+    from supabase import Client
+
+
+class PoolSettings(NamedTuple):
+    # Connections to Supabase, busy or idle; requests beyond it wait up to `timeout`
+    max_connections: int = 10
+    # Idle connections are closed after this many seconds
+    keepalive_expiry: float = 30.0
+    connect_timeout: float = 5.0
+    # Read, write and pool-wait timeout
+    timeout: float = 30.0
+
+    @classmethod
+    def from_env(cls) -> "PoolSettings":
+        """
+        SUPABASE_POOL_SIZE, SUPABASE_KEEPALIVE_SECONDS, SUPABASE_CONNECT_TIMEOUT and
+        SUPABASE_TIMEOUT override the defaults.
+        """
+        defaults = cls()
+        return cls(
+            max_connections=int(os.environ.get("SUPABASE_POOL_SIZE", defaults.max_connections)),
+            keepalive_expiry=float(
+                os.environ.get("SUPABASE_KEEPALIVE_SECONDS", defaults.keepalive_expiry)
+            ),
+            connect_timeout=float(
+                os.environ.get("SUPABASE_CONNECT_TIMEOUT", defaults.connect_timeout)
+            ),
+            timeout=float(os.environ.get("SUPABASE_TIMEOUT", defaults.timeout)),
+        )
+
+    def limits(self) -> httpx.Limits:
+        return httpx.Limits(
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_connections,
+            keepalive_expiry=self.keepalive_expiry,
+        )
+
+    def timeouts(self) -> httpx.Timeout:
+        return httpx.Timeout(self.timeout, connect=self.connect_timeout)
+
+
+def _outcome(status_code: int) -> str:
+    return "ok" if status_code < 400 else f"http_{status_code // 100}xx"
+
+
+class _Tracked:
+    """
+    Requests currently in flight through one transport.
+    """
+
+    def __init__(self):
+        self.in_flight = 0
+        self._lock = threading.Lock()
+
+    def enter(self):
+        with self._lock:
+            self.in_flight += 1
+
+    def exit(self, started: float, outcome: str):
+        with self._lock:
+            self.in_flight -= 1
+        EXTERNAL_CALL_SECONDS.observe(
+            time.perf_counter() - started, service="supabase", outcome=outcome
+        )
+
+
+class _InstrumentedTransport(httpx.HTTPTransport):
+    def __init__(self, tracked: _Tracked, **kwargs):
+        super().__init__(**kwargs)
+        self.tracked = tracked
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        started = time.perf_counter()
+        self.tracked.enter()
+        outcome = "error"
+        try:
+            response = super().handle_request(request)
+            outcome = _outcome(response.status_code)
+            return response
+        finally:
+            self.tracked.exit(started, outcome)
+
+
+class SupabaseProvider:
+    """
+    One Supabase client per process and project, on a keep-alive connection pool shared
+    by every caller (ingestor, loader, taxonomy, API jobs), instead of a new client and
+    new connections per service instance. The client is thread-safe.
+    """
+
+    def __init__(self, url: str, key: str, settings: Optional[PoolSettings] = None):
+        self.url = url
+        self.key = key
+        self.settings = settings or PoolSettings.from_env()
+        self._lock = threading.Lock()
+        self._client: Optional["Client"] = None
+        self._transports: Dict[str, httpx.BaseTransport] = {}
+        self._tracked = {"sync": _Tracked()}
+
+    def client(self) -> "Client":
+        with self._lock:
+            if self._client is None:
+                from supabase import ClientOptions, create_client
+
+                transport = _InstrumentedTransport(
+                    self._tracked["sync"], limits=self.settings.limits()
+                )
+                self._transports["sync"] = transport
+                http = httpx.Client(
+                    transport=transport, timeout=self.settings.timeouts(), follow_redirects=True
+                )
+                self._client = create_client(
+                    self.url, self.key, options=ClientOptions(httpx_client=http)
+                )
+            return self._client
+
+    def pool_stats(self) -> Dict[str, Dict[str, int]]:
+        """
+        Per client kind in use: open connections by state, requests in flight, pool size.
+        """
+        stats = {}
+        for kind, transport in list(self._transports.items()):
+            # httpx keeps its httpcore connection pool private
+            connections = list(getattr(getattr(transport, "_pool", None), "connections", []))
+            idle = sum(1 for connection in connections if connection.is_idle())
+            stats[kind] = {
+                "active": len(connections) - idle,
+                "idle": idle,
+                "in_flight": self._tracked[kind].in_flight,
+                "max": self.settings.max_connections,
+            }
+        return stats
+
+    def close(self):
+        with self._lock:
+            transport = self._transports.pop("sync", None)
+            self._client = None
+        if transport is not None:
+            transport.close()
+
+
+_providers: Dict[Tuple[str, str], SupabaseProvider] = {}
+_providers_lock = threading.Lock()
+
+
+def get_supabase_provider(url: Optional[str] = None, key: Optional[str] = None) -> SupabaseProvider:
+    """
+    Process-wide provider for a project, SUPABASE_URL and SUPABASE_KEY by default.
+    """
+    url = url or os.getenv("SUPABASE_URL")
+    key = key or os.getenv("SUPABASE_KEY")
+    if not url or not key:
+        raise ValueError("Supabase URL and Key must be provided or set in env vars.")
+    with _providers_lock:
+        provider = _providers.get((url, key))
+        if provider is None:
+            provider = _providers[(url, key)] = SupabaseProvider(url, key)
+        return provider
+
+
+def get_supabase_client(url: Optional[str] = None, key: Optional[str] = None) -> "Client":
+    return get_supabase_provider(url, key).client()
+
+
+def close_supabase_clients():
+    """
+    Closes every pooled client; the next get_supabase_client call opens a new pool.
+    """
+    with _providers_lock:
+        providers = list(_providers.values())
+        _providers.clear()
+    for provider in providers:
+        provider.close()
+
+
+def _pool_stats() -> Dict[str, Dict[str, int]]:
+    """
+    pool_stats summed over every provider in the process.
+    """
+    with _providers_lock:
+        providers = list(_providers.values())
+    totals: Dict[str, Dict[str, int]] = {}
+    for provider in providers:
+        for kind, stats in provider.pool_stats().items():
+            total = totals.setdefault(kind, dict.fromkeys(stats, 0))
+            for name, value in stats.items():
+                total[name] += value
+    return totals
+
+
+def _pool_samples() -> List[Sample]:
+    return [
+        ("baystate_supabase_pool_connections", {"client": kind, "state": state}, stats[state])
+        for kind, stats in _pool_stats().items()
+        for state in ("active", "idle")
+    ]
+
+
+def _in_flight_samples() -> List[Sample]:
+    return [
+        ("baystate_supabase_requests_in_flight", {"client": kind}, stats["in_flight"])
+        for kind, stats in _pool_stats().items()
+    ]
+
+
+def _limit_samples() -> List[Sample]:
+    return [
+        ("baystate_supabase_pool_max_connections", {"client": kind}, stats["max"])
+        for kind, stats in _pool_stats().items()
+    ]
+
+
+REGISTRY.register_collector(
+    "baystate_supabase_pool_connections",
+    "Open Supabase connections by state (active or idle keep-alive)",
+    _pool_samples,
+)
+REGISTRY.register_collector(
+    "baystate_supabase_requests_in_flight",
+    "Supabase requests currently in flight",
+    _in_flight_samples,
+)
+REGISTRY.register_collector(
+    "baystate_supabase_pool_max_connections",
+    "Configured Supabase connection pool size",
+    _limit_samples,
+)
@@ -0,0 +1,212 @@
+import random
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence
+
+SCRAPERS = ("amazon", "chewy", "petco", "petsmart", "tractor_supply", "walmart")
+CATEGORIES = (
+    "Dog Food",
+    "Cat Food",
+    "Dog Treats",
+    "Cat Litter",
+    "Bird Seed",
+    "Small Animal Bedding",
+    "Fish Food",
+    "Horse Feed",
+    "Dog Toys",
+    "Cat Toys",
+)
+PRODUCT_LINES = (
+    "Adult",
+    "Puppy",
+    "Kitten",
+    "Senior",
+    "Grain Free",
+    "Indoor",
+    "Weight Control",
+    "Large Breed",
+    "Small Breed",
+    "Wild Blend",
+    "Complete",
+    "Original",
+)
+VARIANTS = (
+    "Chicken Recipe",
+    "Salmon Recipe",
+    "Lamb & Rice",
+    "Beef Formula",
+    "Turkey Dinner",
+    "Ocean Fish",
+    "Duck & Pea",
+    "Clumping",
+    "Unscented",
+    "Classic",
+)
+WEIGHTS_LB = (0.5, 1, 2, 3.5, 4, 5, 7, 10, 12, 15, 18, 20, 25, 30, 40, 50)
+_SYLLABLES = ("ka", "ro", "ve", "lu", "mi", "na", "to", "pa", "zi", "do", "be", "sa", "ri", "co")
+# Fixed reference point so a seed always produces the same scraped_at values
+_EPOCH = datetime(2024, 6, 1)
+
+
+class SyntheticCatalog(NamedTuple):
+    # products_ingestion rows: {"sku", "pipeline_status", "sources": {scraper: payload}}
+    rows: List[Dict[str, Any]]
+    # unique_id (f"{sku}_{scraper}", as flatten_rows builds it) -> true product id
+    truth: Dict[str, int]
+
+    @property
+    def num_records(self) -> int:
+        return len(self.truth)
+
+    @property
+    def num_products(self) -> int:
+        return len(set(self.truth.values()))
+
+
+class _Product(NamedTuple):
+    brand: str
+    category: str
+    title: str
+    weight_lb: float
+    price: float
+
+
+class CatalogGenerator:
+    """
+    Produces realistic products_ingestion rows for tests and benchmarks, fully offline.
+
+    Each product is listed under one SKU with 1-4 scraper sources. duplicate_rate is the
+    share of products that are listed a second time under another SKU, which is what
+    deduplication has to find. noise is the per-field probability of a scraper mangling
+    a value: typos and casing in titles, other units and spellings for weights, and
+    currency formatting or small price differences.
+    """
+
+    def __init__(
+        self,
+        duplicate_rate: float = 0.2,
+        noise: float = 0.3,
+        num_brands: Optional[int] = None,
+        scrapers: Sequence[str] = SCRAPERS,
+        seed: int = 0,
+    ):
+        self.duplicate_rate = duplicate_rate
+        self.noise = noise
+        self.num_brands = num_brands
+        self.scrapers = list(scrapers)
+        self.seed = seed
+
+    def generate(self, num_records: int) -> SyntheticCatalog:
+        """
+        Rows holding exactly num_records source records.
+        """
+        rng = random.Random(self.seed)
+        # About 100 source records per brand keeps brand blocks realistic at every scale
+        brands = self._brands(rng, self.num_brands or max(10, num_records // 100))
+        rows: List[Dict[str, Any]] = []
+        truth: Dict[str, int] = {}
+        product_id = 0
+        while len(truth) < num_records:
+            product = self._product(rng, brands)
+            listings = 2 if rng.random() < self.duplicate_rate else 1
+            for _ in range(listings):
+                sku = f"BS-{len(rows):08d}"
+                count = min(rng.randint(1, min(4, len(self.scrapers))), num_records - len(truth))
+                if count <= 0:
+                    break
+                sources = {
+                    scraper: self._source(rng, product, sku, scraper)
+                    for scraper in rng.sample(self.scrapers, count)
+                }
+                rows.append({"sku": sku, "pipeline_status": "scraped", "sources": sources})
+                for scraper in sources:
+                    truth[f"{sku}_{scraper}"] = product_id
+            product_id += 1
+        return SyntheticCatalog(rows, truth)
+
+    def _brands(self, rng: random.Random, count: int) -> List[str]:
+        brands = set()
+        while len(brands) < count:
+            word = "".join(rng.choice(_SYLLABLES) for _ in range(rng.randint(2, 4)))
+            brands.add(word.capitalize() + rng.choice(("", "", " Pet", " Naturals", " Farms")))
+        return sorted(brands)
+
+    def _product(self, rng: random.Random, brands: List[str]) -> _Product:
+        brand = rng.choice(brands)
+        category = rng.choice(CATEGORIES)
+        weight = rng.choice(WEIGHTS_LB)
+        title = f"{brand} {rng.choice(PRODUCT_LINES)} {rng.choice(VARIANTS)} {category}"
+        price = round(rng.uniform(3, 15) * weight**0.6, 2)
+        return _Product(brand, category, title, weight, price)
+
+    def _source(
+        self, rng: random.Random, product: _Product, sku: str, scraper: str
+    ) -> Dict[str, Any]:
+        weight = self._weight(rng, product.weight_lb)
+        scraped_at = _EPOCH - timedelta(minutes=rng.randint(0, 90 * 24 * 60))
+        return {
+            "title": self._title(rng, product, weight),
+            "brand": product.brand.upper() if self._noisy(rng) else product.brand,
+            "category": product.category,
+            "weight": weight,
+            "price": self._price(rng, product.price),
+            "description": f"{product.title}. Sold by {scraper}.",
+            "images": [
+                f"https://img.{scraper}.example/{sku}/{i}.jpg" for i in range(rng.randint(0, 3))
+            ],
+            "url": f"https://www.{scraper}.example/p/{sku.lower()}",
+            "scraped_at": scraped_at.isoformat(),
+        }
+
+    def _noisy(self, rng: random.Random) -> bool:
+        return rng.random() < self.noise
+
+    def _title(self, rng: random.Random, product: _Product, weight: Optional[str]) -> str:
+        title = product.title
+        if weight and not self._noisy(rng):
+            title = f"{title}, {weight}"
+        if self._noisy(rng):
+            title = _typo(rng, title)
+        if self._noisy(rng):
+            title = rng.choice(
+                (title.upper(), title.lower(), f"  {title}  ", title.replace(" ", "  "))
+            )
+        return title
+
+    def _weight(self, rng: random.Random, pounds: float) -> Optional[str]:
+        if not self._noisy(rng):
+            return f"{pounds:g} lb"
+        return rng.choice(
+            (
+                f"{pounds:g} LB",
+                f"{pounds:g}lbs",
+                f"{pounds:g} pounds",
+                f"{pounds * 16:g} oz",
+                None,
+            )
+        )
+
+    def _price(self, rng: random.Random, price: float) -> Any:
+        if not self._noisy(rng):
+            return price
+        varied = round(price * rng.uniform(0.95, 1.05), 2)
+        return rng.choice((f"${varied:.2f}", f"{varied:.2f} USD", varied, None))
+
+
+def _typo(rng: random.Random, text: str) -> str:
+    if len(text) < 4:
+        return text
+    i = rng.randrange(1, len(text) - 2)
+    kind = rng.random()
+    if kind < 0.4:
+        return text[:i] + text[i + 1] + text[i] + text[i + 2 :]
+    if kind < 0.7:
+        return text[:i] + text[i + 1 :]
+    return text[:i] + text[i] + text[i:]
+
+
+def generate_catalog(
+    num_records: int, duplicate_rate: float = 0.2, noise: float = 0.3, seed: int = 0
+) -> SyntheticCatalog:
+    return CatalogGenerator(duplicate_rate=duplicate_rate, noise=noise, seed=seed).generate(
+        num_records
+    )
@@ -0,0 +1,52 @@
+import logging
+import time
+from typing import Callable, Dict, Sequence
+
+logger = logging.getLogger(__name__)
+
+
+def _warm_weights():
+    from baystate_consolidator.normalizers.weight import parse_weight_quantulum
+
+    # The first quantulum3 parse loads its unit and entity data
+    parse_weight_quantulum("5 1/2 pounds")
+
+
+def _warm_splink():
+    import polars as pl
+
+    from baystate_consolidator.pipelines.dedupe import DeduplicationPipeline
+
+    # One tiny linker run imports Splink and compiles its SQL templates in DuckDB
+    records = pl.DataFrame(
+        {
+            "unique_id": ["warmup-1", "warmup-2"],
+            "name": ["warm up", "warm up"],
+            "brand": ["warmup", "warmup"],
+            "category": ["warmup", "warmup"],
+            "weight": ["1.0 lb", "1.0 lb"],
+            "price": [1.0, 1.0],
+        }
+    )
+    DeduplicationPipeline(fast_path_max_records=None).run(records)
+
+
+WARMUPS: Dict[str, Callable[[], None]] = {"weights": _warm_weights, "splink": _warm_splink}
+
+
+def warm_up(targets: Sequence[str] = tuple(WARMUPS)) -> Dict[str, float]:
+    """
+    Loads the state that makes a cold process's first job slow: quantulum3's unit data
+    and Splink with its DuckDB linker. Meant as a worker process initializer. Failures are
+    logged, not raised; the job then pays the cost itself. Returns seconds per target.
+    """
+    timings = {}
+    for target in targets:
+        started = time.perf_counter()
+        try:
+            WARMUPS[target]()
+        except Exception as e:
+            logger.warning(f"Warm-up of {target} failed: {e}")
+        timings[target] = round(time.perf_counter() - started, 3)
+    logger.info(f"Warm-up finished: {timings}")
+    return timings
@@ -0,0 +1,76 @@
+import polars as pl
+
+from baystate_consolidator.pipelines.dedupe import DeduplicationPipeline
+from baystate_consolidator.utils.benchmark import (
+    SERIALIZATIONS,
+    STAGES,
+    StageResult,
+    compare_to_baseline,
+    format_results,
+    format_serialization,
+    load_baseline,
+    pairwise_quality,
+    run_benchmark,
+    run_serialization_benchmark,
+    save_baseline,
+)
+from baystate_consolidator.utils.synthetic import CatalogGenerator
+
+
+def test_run_benchmark_times_every_stage():
+    run = run_benchmark(
+        [300],
+        pipeline=DeduplicationPipeline(blocking_columns=[["brand", "name_token"]]),
+        generator=CatalogGenerator(seed=4),
+    )
+
+    assert [result.stage for result in run.results] == list(STAGES)
+    assert all(result.size == 300 and result.peak_rss_mb > 0 for result in run.results)
+    assert run.results[0].rows_out == 300
+    assert 0 < run.quality[300]["recall"] <= 1
+    assert "dedupe quality" in format_results(run)
+
+
+def test_pairwise_quality():
+    clustered = pl.DataFrame(
+        {"unique_id": ["a", "b", "c", "d"], "cluster_id": ["a", "a", "a", "d"]}
+    )
+    truth = {"a": 1, "b": 1, "c": 2, "d": 2}
+
+    # Predicted pairs ab, ac, bc; true pairs ab, cd
+    assert pairwise_quality(clustered, truth) == {"precision": 1 / 3, "recall": 0.5}
+
+
+def test_baseline_round_trip_and_regressions(tmp_path):
+    path = str(tmp_path / "bench" / "baseline.json")
+    save_baseline(path, [StageResult(1000, "dedupe", 2.0, 500.0, 1000)])
+    save_baseline(path, [StageResult(10, "dedupe", 0.1, 100.0, 10)])
+    baseline = load_baseline(path)
+    assert set(baseline) == {"1000", "10"}
+
+    results = [
+        StageResult(1000, "dedupe", 2.4, 600.0, 1000),
+        StageResult(10, "dedupe", 0.5, 100.0, 10),
+        StageResult(1000, "normalize", 9.0, 900.0, 1000),
+    ]
+    assert compare_to_baseline(results, baseline) == []
+
+    slower = [StageResult(1000, "dedupe", 2.6, 700.0, 1000)]
+    regressions = compare_to_baseline(slower, baseline)
+    assert len(regressions) == 2
+    assert regressions[0].startswith("1,000/dedupe: 2.60s vs baseline 2.00s")
+
+
+def test_missing_baseline_file(tmp_path):
+    assert load_baseline(str(tmp_path / "missing.json")) == {}
+
+
+def test_serialization_benchmark_covers_every_method():
+    results = run_serialization_benchmark([100], generator=CatalogGenerator(seed=2))
+
+    assert [result.method for result in results] == [
+        *SERIALIZATIONS,
+        "lineage_parquet_columnar",
+    ]
+    assert all(result.records > 0 and result.size_bytes > 0 for result in results)
+    assert "dump_records_json" in format_serialization(results)
@@ -0,0 +1,123 @@
+import logging
+
+import polars as pl
+from baystate_consolidator.pipelines.blocking import (
+    analyze_blocking,
+    apply_comparison_budget,
+    derive_keys,
+    parse_blocking_keys,
+)
+from baystate_consolidator.pipelines.dedupe import DeduplicationPipeline
+from baystate_consolidator.pipelines.incremental import ClusterStore
+
+
+def _records():
+    return pl.DataFrame(
+        {
+            "unique_id": ["1", "2", "3", "4", "5", "6"],
+            "name": [
+                "Acana Puppy Recipe",
+                "Acana Puppy Recipe",
+                "Acana Adult Recipe",
+                "Acana Adult Recipe",
+                "Acana Senior Recipe",
+                "Kong Classic",
+            ],
+            "brand": ["acana"] * 5 + ["kong"],
+            "category": ["dog food"] * 6,
+            "weight": ["4.0 lb", "64.0 oz", "25.0 lb", "25.0 lb", None, "1.0 lb"],
+            "price": [19.99, 19.99, 54.99, 54.99, 49.99, 9.99],
+        }
+    )
+
+
+def test_parse_blocking_keys():
+    assert parse_blocking_keys("brand+weight, category") == [["brand", "weight"], "category"]
+
+
+def test_derived_keys():
+    df = derive_keys(_records(), ["name_token", ["brand", "size_bucket"]])
+    assert df["name_token"].to_list() == ["puppy", "puppy", "adult", "adult", "senior", "classic"]
+    # 4 lb and 64 oz share a size bucket
+    assert df["size_bucket"][0] == df["size_bucket"][1]
+    assert df["size_bucket"][4] is None
+
+
+def test_analyze_blocking_reports_comparisons_and_largest_blocks():
+    reports = analyze_blocking(_records(), ["brand", ["brand", "name_token"]], top_n=1)
+    assert [r.key for r in reports] == ["brand", "brand+name_token"]
+    assert reports[0].comparisons == 10
+    assert reports[0].largest_blocks == [("acana", 5)]
+    assert reports[1].comparisons == 2
+    assert reports[1].blocks == 4
+
+
+def test_oversized_block_is_split(caplog):
+    with caplog.at_level(logging.INFO):
+        df, rules = apply_comparison_budget(_records(), ["brand"], max_block_comparisons=1)
+    assert rules == ["l.block_key_0 = r.block_key_0"]
+    assert df["block_key_0"].to_list() == [
+        "acana|puppy",
+        "acana|puppy",
+        "acana|adult",
+        "acana|adult",
+        "acana|senior",
+        "kong",
+    ]
+    assert "split oversized block 'acana' on name_token" in caplog.text
+
+
+def test_records_missing_the_split_key_stay_blocked():
+    df, _ = apply_comparison_budget(
+        _records(), ["brand"], max_block_comparisons=1, split_keys=["weight"]
+    )
+    assert df["block_key_0"].to_list() == [
+        "acana|4.0 lb",
+        "acana|64.0 oz",
+        "acana|25.0 lb",
+        "acana|25.0 lb",
+        "acana|",
+        "kong",
+    ]
+
+
+def test_unsplittable_block_is_skipped(caplog):
+    with caplog.at_level(logging.WARNING):
+        df, _ = apply_comparison_budget(
+            _records(), ["category"], max_block_comparisons=1, split_keys=[]
+        )
+    assert df["block_key_0"].null_count() == 6
+    assert "skipped block 'dog food' with 6 records" in caplog.text
+
+
+def test_total_budget_skips_largest_blocks_of_later_rules(caplog):
+    with caplog.at_level(logging.WARNING):
+        df, rules = apply_comparison_budget(
+            _records(), [["brand", "name_token"], "category"], max_comparisons=2
+        )
+    assert len(rules) == 2
+    assert df["block_key_0"].null_count() == 0
+    assert df["block_key_1"].null_count() == 6
+    assert "comparison budget spent" in caplog.text
+
+
+def test_run_with_composite_keys_and_budget():
+    pipeline = DeduplicationPipeline(
+        blocking_columns=[["brand", "name_token"], "size_bucket"], max_block_comparisons=1
+    )
+    clustered = pipeline.run(_records())
+    assert clustered.columns == _records().columns + ["cluster_id"]
+    cluster_of = dict(zip(clustered["unique_id"], clustered["cluster_id"]))
+    assert cluster_of["3"] == cluster_of["4"]
+    assert cluster_of["1"] != cluster_of["3"]
+
+
+def test_load_blocks_with_composite_key(tmp_path):
+    store = ClusterStore(str(tmp_path / "clusters.parquet"))
+    stored = _records().with_columns(pl.col("unique_id").alias("cluster_id"))
+    store.update(stored, {})
+
+    new = _records().head(1).with_columns(pl.lit("7").alias("unique_id"))
+    loaded = store.load_blocks(new, [["brand", "name_token"]])
+    assert sorted(loaded["unique_id"].to_list()) == ["1", "2"]
+    assert "name_token" not in loaded.columns
@@ -0,0 +1,139 @@
+import asyncio
+
+import polars as pl
+from baystate_consolidator.utils.database import DatabaseIngestor
+
+
+class FakeResponse:
+    def __init__(self, data):
+        self.data = data
+
+
+class FakeQuery:
+    def __init__(self, rows, log):
+        self.rows = rows
+        self.log = log
+        self.filters = []
+        self.order_by = None
+        self.max_rows = None
+
+    def select(self, columns):
+        return self
+
+    def eq(self, column, value):
+        self.filters.append(lambda row: row[column] == value)
+        return self
+
+    def gt(self, column, value):
+        self.filters.append(lambda row: row[column] > value)
+        return self
+
+    def order(self, column):
+        self.order_by = column
+        return self
+
+    def limit(self, count):
+        self.max_rows = count
+        return self
+
+    def execute(self):
+        rows = [row for row in self.rows if all(check(row) for check in self.filters)]
+        if self.order_by:
+            rows.sort(key=lambda row: row[self.order_by])
+        rows = rows[: self.max_rows]
+        self.log.append(len(rows))
+        return FakeResponse(rows)
+
+
+class FakeClient:
+    def __init__(self, rows):
+        self.rows = rows
+        self.pages = []
+
+    def table(self, name):
+        assert name == "products_ingestion"
+        return FakeQuery(self.rows, self.pages)
+
+
+def _rows(count):
+    return [
+        {
+            "sku": f"SKU{i:04d}",
+            "pipeline_status": "scraped" if i % 5 else "consolidated",
+            "sources": {"amazon": {"title": f"Item {i}"}, "chewy": {"title": f"item {i}"}},
+        }
+        for i in range(count)
+    ]
+
+
+def test_keyset_pages_cover_all_pending_rows():
+    client = FakeClient(_rows(53))
+    ingestor = DatabaseIngestor(client=client)
+
+    pages = list(ingestor.iter_pending_pages(page_size=10))
+    skus = [row["sku"] for page in pages for row in page]
+
+    assert skus == sorted(row["sku"] for row in client.rows if row["pipeline_status"] == "scraped")
+    assert len(set(skus)) == len(skus)
+    assert [len(page) for page in pages] == [10, 10, 10, 10, 2]
+
+
+def test_batches_keep_sources_of_a_sku_together():
+    ingestor = DatabaseIngestor(client=FakeClient(_rows(53)))
+
+    batches = list(ingestor.iter_pending_batches(batch_size=7, page_size=10, prefetch=False))
+
+    assert all(len(batch) == 8 for batch in batches[:-1])
+    records = [record for batch in batches for record in batch]
+    assert len(records) == 84
+    assert records[0] == {
+        "title": "Item 1",
+        "sku": "SKU0001",
+        "scraper_name": "amazon",
+        "unique_id": "SKU0001_amazon",
+    }
+
+
+def test_frames_match_batches():
+    ingestor = DatabaseIngestor(client=FakeClient(_rows(53)))
+
+    frames = list(ingestor.iter_pending_frames(batch_size=30, page_size=10, prefetch=False))
+
+    assert [frame.height for frame in frames] == [40, 40, 4]
+    records = [
+        record for batch in ingestor.iter_pending_batches(prefetch=False) for record in batch
+    ]
+    assert pl.concat(frames).to_dicts() == records
+
+
+def test_max_rows_limits_requests():
+    client = FakeClient(_rows(100))
+    ingestor = DatabaseIngestor(client=client)
+
+    records = [
+        r for batch in ingestor.iter_pending_batches(page_size=10, max_rows=25) for r in batch
+    ]
+
+    assert len(records) == 50
+    assert client.pages == [10, 10, 5]
+
+
+def test_async_batches():
+    ingestor = DatabaseIngestor(client=FakeClient(_rows(20)))
+
+    async def collect():
+        return [batch async for batch in ingestor.aiter_pending_batches(batch_size=10)]
+
+    batches = asyncio.run(collect())
+    assert sum(len(batch) for batch in batches) == 32
+
+
+def test_fetch_pending_products_flattens():
+    ingestor = DatabaseIngestor(client=FakeClient(_rows(3)))
+    records = ingestor.fetch_pending_products(limit=10)
+    assert [r["unique_id"] for r in records] == [
+        "SKU0001_amazon",
+        "SKU0001_chewy",
+        "SKU0002_amazon",
+        "SKU0002_chewy",
+    ]
@@ -0,0 +1,52 @@
+import polars as pl
+import pyarrow as pa
+import pytest
+from baystate_consolidator.pipelines.dedupe import DeduplicationPipeline, group_clusters
+
+
+def _records():
+    rows = [
+        ("1", "Acana Puppy Recipe 25 lb", "acana", 79.99),
+        ("2", "Acana Puppy Recipe 25 lb", "acana", 79.99),
+        ("3", "Kong Classic Large", "kong", 14.99),
+        ("4", "Purina Cat Chow 16 lb", "purina", 21.5),
+    ]
+    return pl.DataFrame(
+        {
+            "unique_id": [r[0] for r in rows],
+            "name": [r[1] for r in rows],
+            "brand": [r[2] for r in rows],
+            "category": ["pet"] * len(rows),
+            "weight": ["25 LB", "25 LB", None, "16 LB"],
+            "price": [r[3] for r in rows],
+        }
+    )
+
+
+@pytest.mark.parametrize("as_arrow", [False, True])
+def test_run_returns_source_records_with_cluster_id(as_arrow):
+    df = _records()
+    data = df.to_arrow() if as_arrow else df
+
+    clustered = DeduplicationPipeline(blocking_columns=["brand"]).run(data)
+
+    assert isinstance(clustered, pl.DataFrame)
+    assert clustered.columns == df.columns + ["cluster_id"]
+    assert clustered.select(df.columns).equals(df)
+    cluster_of = dict(zip(clustered["unique_id"], clustered["cluster_id"]))
+    assert cluster_of["1"] == cluster_of["2"] == "1"
+    assert len({cluster_of["1"], cluster_of["3"], cluster_of["4"]}) == 3
+
+
+def test_group_clusters():
+    clustered = pl.DataFrame({"unique_id": ["1", "2", "3"], "cluster_id": ["1", "1", "3"]})
+    assert group_clusters(clustered).to_dicts() == [
+        {"cluster_id": "1", "record_ids": ["1", "2"]},
+        {"cluster_id": "3", "record_ids": ["3"]},
+    ]
+    assert group_clusters(pl.DataFrame()).is_empty()
+
+
+def test_run_empty_input():
+    assert DeduplicationPipeline().run([]).is_empty()
+    assert DeduplicationPipeline().run(pa.table({"unique_id": []})).is_empty()
@@ -0,0 +1,106 @@
+import math
+import random
+
+import duckdb
+import numpy as np
+import pytest
+from splink.comparison_level import _default_m_values, _default_u_values
+
+from baystate_consolidator.pipelines.dedupe import DeduplicationPipeline
+from baystate_consolidator.pipelines.fast_match import (
+    InProcessMatcher,
+    default_level_weights,
+    levenshtein,
+)
+from baystate_consolidator.pipelines.lsh import MinHashLSH
+from baystate_consolidator.stages.normalize import normalize_records
+from baystate_consolidator.utils.database import DatabaseIngestor
+from baystate_consolidator.utils.synthetic import CatalogGenerator
+
+
+def test_levenshtein_matches_duckdb():
+    rng = random.Random(0)
+    alphabet = "abcdé "
+    left = ["".join(rng.choices(alphabet, k=rng.randint(0, 10))) for _ in range(500)]
+    right = ["".join(rng.choices(alphabet, k=rng.randint(0, 10))) for _ in range(500)]
+    connection = duckdb.connect()
+    expected = np.array(
+        [
+            connection.execute("SELECT levenshtein(?, ?)", [a, b]).fetchone()[0]
+            for a, b in zip(left, right)
+        ]
+    )
+
+    assert (levenshtein(left, right) == expected).all()
+    assert (levenshtein(left, right, max_distance=2) == np.minimum(expected, 3)).all()
+    assert levenshtein([], []).tolist() == []
+
+
+@pytest.mark.parametrize("num_levels", [2, 3, 4])
+def test_default_weights_match_splink_defaults(num_levels):
+    m, u = _default_m_values(num_levels), _default_u_values(num_levels)
+    splink_weights = [math.log2(mi / ui) for mi, ui in zip(m, u)][::-1]
+    assert np.allclose(default_level_weights(num_levels), splink_weights)
+
+
+def _catalog(seed):
+    generator = CatalogGenerator(duplicate_rate=0.4, noise=0.5, num_brands=8, seed=seed)
+    return normalize_records(DatabaseIngestor.flatten_rows(generator.generate(200).rows))
+
+
+@pytest.mark.parametrize(
+    "options",
+    [
+        {"blocking_columns": ["brand"]},
+        {"blocking_columns": [["brand", "name_token"], "category"], "match_threshold": 0.5},
+        {"blocking_columns": ["brand"], "lsh": MinHashLSH(bands=10, rows=3)},
+        {"blocking_columns": ["brand"], "max_block_comparisons": 100},
+    ],
+)
+def test_fast_path_matches_splink_clusters(options):
+    df = _catalog(seed=len(options))
+    fast = DeduplicationPipeline(**options).run(df)
+    splink = DeduplicationPipeline(fast_path_max_records=None, **options).run(df)
+
+    assert fast.columns == splink.columns
+    assert dict(zip(fast["unique_id"], fast["cluster_id"])) == dict(
+        zip(splink["unique_id"], splink["cluster_id"])
+    )
+    assert fast["cluster_id"].n_unique() < len(df)
+
+
+def test_fast_path_only_for_small_batches(monkeypatch):
+    df = _catalog(seed=0)
+    pipeline = DeduplicationPipeline(blocking_columns=["brand"], fast_path_max_records=len(df) - 1)
+    calls = []
+    monkeypatch.setattr(pipeline, "_cluster_in_process", lambda frame: calls.append(frame))
+    monkeypatch.setattr(pipeline, "_cluster", lambda frame: "splink")
+
+    assert pipeline.run(df) == "splink"
+    pipeline.run(df.head(10))
+    assert len(calls) == 1
+    # Comparisons on columns the batch lacks are left to Splink
+    assert pipeline.run(df.head(10).drop("weight")) == "splink"
+
+
+def test_from_settings_reads_trained_weights():
+    def levels(*weights):
+        null = {"sql_condition": "x IS NULL", "is_null_level": True}
+        return [null] + [{"m_probability": 2.0**w * 0.01, "u_probability": 0.01} for w in weights]
+
+    settings = {
+        "probability_two_random_records_match": 0.01,
+        "comparisons": [
+            {"output_column_name": "name", "comparison_levels": levels(8, 4, 1, -3)},
+            {"output_column_name": "brand", "comparison_levels": levels(6, -2)},
+            {"output_column_name": "weight", "comparison_levels": levels(5, -1)},
+            {"output_column_name": "price", "comparison_levels": levels(7, 3, 0, -4)},
+        ],
+    }
+    matcher = InProcessMatcher.from_settings(settings)
+    assert np.allclose(matcher.level_weights[0], [8, 4, 1, -3])
+    assert matcher.prior_weight == pytest.approx(math.log2(0.01 / 0.99))
+
+    settings["comparisons"][1]["comparison_levels"][1]["tf_adjustment_column"] = "brand"
+    assert InProcessMatcher.from_settings(settings) is None
+    assert InProcessMatcher.from_settings({"comparisons": []}) is None
@@ -0,0 +1,145 @@
+import json
+
+import polars as pl
+import pytest
+
+from baystate_consolidator.main import run_consolidation
+from baystate_consolidator.stages.ingest import EXTRAS_COLUMN
+from baystate_consolidator.utils.database import DatabaseIngestor
+from baystate_consolidator.utils.file_source import (
+    FileIngestor,
+    flatten_frame,
+    list_source_files,
+    source_path,
+)
+from baystate_consolidator.utils.metrics import REGISTRY, STAGE_RECORDS
+from baystate_consolidator.utils.synthetic import generate_catalog
+
+
+@pytest.fixture
+def catalog():
+    return generate_catalog(40, seed=3)
+
+
+def _write_ndjson(path, rows):
+    with open(path, "w") as f:
+        for row in rows:
+            f.write(json.dumps(row) + "\n")
+
+
+def _ids(batches):
+    return sorted(record["unique_id"] for batch in batches for record in batch)
+
+
+@pytest.mark.parametrize("suffix", ["ndjson", "json", "parquet"])
+def test_reads_every_format_like_flatten_rows(tmp_path, catalog, suffix):
+    path = tmp_path / f"dump.{suffix}"
+    if suffix == "ndjson":
+        _write_ndjson(path, catalog.rows)
+    elif suffix == "json":
+        path.write_text(json.dumps(catalog.rows))
+    else:
+        pl.DataFrame(catalog.rows).write_parquet(path)
+
+    batches = list(FileIngestor(str(path)).iter_pending_batches(batch_size=10, page_size=4))
+
+    expected = DatabaseIngestor.flatten_rows(catalog.rows)
+    assert _ids(batches) == sorted(record["unique_id"] for record in expected)
+    assert all(len(batch) < 10 + 4 * 4 for batch in batches)
+    by_id = {record["unique_id"]: record for batch in batches for record in batch}
+    for record in expected:
+        assert by_id[record["unique_id"]]["title"] == record["title"]
+        assert by_id[record["unique_id"]]["scraper_name"] == record["scraper_name"]
+
+
+def test_frames_keep_extras_in_one_column(tmp_path, catalog):
+    rows = [dict(row) for row in catalog.rows]
+    for row in rows:
+        row["sources"] = {
+            scraper: {**payload, "upc": f"{row['sku']}-upc"}
+            for scraper, payload in row["sources"].items()
+        }
+    pl.DataFrame(rows).write_parquet(tmp_path / "dump.parquet")
+    ingestor = FileIngestor(str(tmp_path / "dump.parquet"))
+
+    frames = list(ingestor.iter_pending_frames(batch_size=30, page_size=8))
+    records = pl.concat(frames, how="diagonal_relaxed")
+
+    assert sorted(records["unique_id"]) == sorted(catalog.truth)
+    assert "upc" not in records.columns
+    assert all(json.loads(extras)["upc"] for extras in records[EXTRAS_COLUMN])
+    promoted = next(ingestor.iter_pending_frames(promote=["upc"]))
+    assert promoted["upc"].str.ends_with("-upc").all()
+
+
+def test_filters_status_and_limits_rows(tmp_path, catalog):
+    rows = [dict(row) for row in catalog.rows]
+    rows[0]["pipeline_status"] = "consolidated"
+    _write_ndjson(tmp_path / "dump.ndjson", rows)
+    ingestor = FileIngestor(str(tmp_path / "dump.ndjson"))
+
+    skus = {record["sku"] for batch in ingestor.iter_pending_batches() for record in batch}
+    assert rows[0]["sku"] not in skus
+    assert len(skus) == len(rows) - 1
+
+    limited = {
+        record["sku"]
+        for batch in ingestor.iter_pending_batches(page_size=2, max_rows=3)
+        for record in batch
+    }
+    assert limited == {row["sku"] for row in rows[1:4]}
+
+
+def test_directory_spans_files_and_formats(tmp_path, catalog):
+    (tmp_path / "nested").mkdir()
+    _write_ndjson(tmp_path / "a.ndjson", catalog.rows[:5])
+    pl.DataFrame(catalog.rows[5:]).write_parquet(tmp_path / "nested" / "b.parquet")
+    (tmp_path / "notes.txt").write_text("ignored")
+
+    assert [p.rsplit("/", 1)[-1] for p in list_source_files(str(tmp_path))] == [
+        "a.ndjson",
+        "b.parquet",
+    ]
+    ingestor = FileIngestor(str(tmp_path))
+    assert _ids(ingestor.iter_pending_batches()) == sorted(catalog.truth)
+    limited = list(ingestor.iter_pending_batches(max_rows=7))
+    assert len({record["sku"] for batch in limited for record in batch}) == 7
+
+
+def test_flatten_frame_handles_text_sources_and_flat_dumps():
+    rows = pl.DataFrame({"sku": ["A"], "sources": [json.dumps({"chewy": {"title": "Kong"}})]})
+    assert flatten_frame(rows) == [
+        {"title": "Kong", "sku": "A", "scraper_name": "chewy", "unique_id": "A_chewy"}
+    ]
+    flat = pl.DataFrame({"sku": ["A"], "scraper_name": ["petco"], "title": ["Kong"]})
+    assert flatten_frame(flat)[0]["unique_id"] == "A_petco"
+
+
+def test_source_path():
+    assert source_path("file:///data/dumps") == "/data/dumps"
+    assert source_path("file://dumps") == "dumps"
+    assert source_path("supabase") is None
+    with pytest.raises(FileNotFoundError):
+        FileIngestor("/does/not/exist")
+
+
+def test_run_consolidation_from_file_source(tmp_path, catalog):
+    _write_ndjson(tmp_path / "dump.ndjson", catalog.rows)
+    REGISTRY.clear()
+
+    run_consolidation(
+        limit=None, source=f"file://{tmp_path}", batch_size=1000, blocking_keys=["brand"]
+    )
+
+    assert STAGE_RECORDS.value(stage="ingest") == catalog.num_records
+    assert STAGE_RECORDS.value(stage="survivorship") > 0
+    REGISTRY.clear()
+
+
+def test_write_back_rejected_for_incremental_runs(tmp_path):
+    with pytest.raises(ValueError, match="cluster_store"):
+        run_consolidation(
+            source=f"file://{tmp_path}",
+            cluster_store=str(tmp_path / "clusters.parquet"),
+            write_back=True,
+        )
@@ -0,0 +1,81 @@
+import polars as pl
+from baystate_consolidator.pipelines.clustering import connected_components
+from baystate_consolidator.pipelines.dedupe import DeduplicationPipeline
+from baystate_consolidator.pipelines.incremental import ClusterStore, assign_incremental_clusters
+
+
+def test_connected_components_use_smallest_id():
+    assignments = connected_components(["a", "b", "c", "d"], [("b", "c"), ("c", "a")])
+    assert assignments == {"a": "a", "b": "a", "c": "a", "d": "d"}
+
+
+def test_new_record_attaches_to_existing_cluster():
+    assignments, merges = assign_incremental_clusters(
+        ["n1"], {"e1": "e1", "e2": "e1"}, [("n1", "e2")]
+    )
+    assert assignments == {"n1": "e1", "e1": "e1", "e2": "e1"}
+    assert merges == {}
+
+
+def test_bridging_record_merges_clusters_keeping_smallest_id():
+    assignments, merges = assign_incremental_clusters(
+        ["n1"], {"e1": "c1", "e2": "c2"}, [("n1", "e1"), ("n1", "e2")]
+    )
+    assert set(assignments.values()) == {"c1"}
+    assert merges == {"c2": "c1"}
+
+
+def test_new_only_cluster_and_untouched_existing():
+    assignments, merges = assign_incremental_clusters(["n2", "n1"], {"e1": "c1"}, [("n1", "n2")])
+    assert assignments == {"n1": "n1", "n2": "n1"}
+    assert merges == {}
+
+
+def _records(rows):
+    return pl.DataFrame(
+        [
+            {"unique_id": uid, "name": name, "brand": brand, "category": "dog food", "price": 1.0}
+            for uid, name, brand in rows
+        ]
+    )
+
+
+def test_run_incremental_keeps_ids_stable(tmp_path, monkeypatch):
+    store = ClusterStore(str(tmp_path / "clusters.parquet"))
+    pipeline = DeduplicationPipeline(blocking_columns=["brand"])
+    scored = []
+
+    def fake_predict(df, settings):
+        scored.append(sorted(df["unique_id"].to_list()))
+        by_name = {}
+        for uid, name in zip(df["unique_id"], df["name"]):
+            by_name.setdefault(name, []).append(uid)
+        pairs = [(ids[0], other) for ids in by_name.values() for other in ids[1:]]
+        return pl.DataFrame(
+            {
+                "unique_id_l": [p[0] for p in pairs],
+                "unique_id_r": [p[1] for p in pairs],
+                "match_probability": [1.0] * len(pairs),
+            },
+            schema={
+                "unique_id_l": pl.String,
+                "unique_id_r": pl.String,
+                "match_probability": pl.Float64,
+            },
+        )
+
+    monkeypatch.setattr(pipeline, "_predict_pairs", fake_predict)
+
+    first = pipeline.run_incremental(
+        _records([("a1", "kibble", "acana"), ("a2", "kibble", "acana"), ("p1", "chow", "purina")]),
+        store,
+    )
+    assert sorted(c["cluster_id"] for c in first) == ["a1", "p1"]
+
+    second = pipeline.run_incremental(_records([("a3", "kibble", "acana")]), store)
+    assert second == [{"cluster_id": "a1", "record_ids": ["a3", "a1", "a2"]}]
+    # Only the acana block was loaded from the store
+    assert scored[-1] == ["a1", "a2", "a3"]
+
+    stored = pl.read_parquet(store.path).sort("unique_id")
+    assert stored["cluster_id"].to_list() == ["a1", "a1", "a1", "p1"]
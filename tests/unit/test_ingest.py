@@ -0,0 +1,113 @@
+import json
+from datetime import datetime
+
+import polars as pl
+from polars.testing import assert_frame_equal
+
+from baystate_consolidator.main import process_batch
+from baystate_consolidator.models.raw import RawScrapedProduct
+from baystate_consolidator.pipelines.dedupe import DeduplicationPipeline
+from baystate_consolidator.stages.ingest import (
+    EXTRAS_COLUMN,
+    SOURCE_FIELDS,
+    concat_records,
+    conform_frame,
+    flatten_sources,
+)
+from baystate_consolidator.stages.normalize import normalize_records
+from baystate_consolidator.utils.database import DatabaseIngestor
+from baystate_consolidator.utils.synthetic import generate_catalog
+
+
+def test_source_fields_cover_raw_scraped_product():
+    assert set(RawScrapedProduct.model_fields) - {"scraper_name"} <= set(SOURCE_FIELDS)
+
+
+def test_normalizes_like_flattened_dicts():
+    rows = generate_catalog(300, seed=2).rows
+
+    columnar = normalize_records(flatten_sources(rows))
+    expected = normalize_records(DatabaseIngestor.flatten_rows(rows))
+
+    # Timestamps are typed at ingest; the dict path leaves them as strings
+    columns = [column for column in expected.columns if column != "scraped_at"]
+    assert_frame_equal(columnar.select(columns), expected.select(columns))
+    assert columnar.schema["scraped_at"] == pl.Datetime("us")
+
+
+def test_known_fields_are_typed_and_extras_packed():
+    rows = [
+        {
+            "sku": "A",
+            "sources": {
+                "chewy": {"title": "Kong", "price": 10, "upc": "123", "seller": {"id": 7}},
+                "petco": {"title": "KONG", "price": 12.5, "scraped_at": datetime(2024, 1, 1)},
+            },
+        },
+        {"sku": "B", "sources": {}},
+    ]
+
+    records = flatten_sources(rows, promote=["upc"])
+
+    assert records.columns[:3] == ["sku", "scraper_name", "unique_id"]
+    assert records["unique_id"].to_list() == ["A_chewy", "A_petco"]
+    assert records.schema["price"] == pl.Float64
+    assert records.schema["scraped_at"] == pl.Datetime("us")
+    assert records["upc"].to_list() == ["123", None]
+    assert [json.loads(e) if e else None for e in records[EXTRAS_COLUMN]] == [
+        {"seller": {"id": 7}},
+        None,
+    ]
+    # Fields no source sent are left out
+    assert "description" not in records.columns
+
+
+def test_mixed_types_fall_back_like_records_to_frame():
+    rows = [{"sku": "A", "sources": {"chewy": {"price": 10.0}, "petco": {"price": "$12.00"}}}]
+
+    records = flatten_sources(rows)
+
+    assert records.schema["price"] == pl.String
+    assert normalize_records(records)["price"].to_list() == [10.0, 12.0]
+
+
+def test_conform_frame_casts_and_packs_extras():
+    records = pl.DataFrame(
+        {
+            "sku": ["A"],
+            "scraper_name": ["chewy"],
+            "unique_id": ["A_chewy"],
+            "ratings": [4],
+            "price": [None],
+            "upc": ["123"],
+        }
+    )
+
+    conformed = conform_frame(records)
+
+    assert conformed.schema["price"] == pl.Float64
+    assert conformed.schema["ratings"] == pl.Float64
+    assert "upc" not in conformed.columns
+    assert json.loads(conformed[EXTRAS_COLUMN][0]) == {"upc": "123"}
+
+
+def test_concat_records_falls_back_to_strings_for_conflicting_types():
+    naive = flatten_sources([{"sku": "A", "sources": {"chewy": {"scraped_at": "2024-01-01"}}}])
+    aware = flatten_sources(
+        [{"sku": "B", "sources": {"chewy": {"scraped_at": "2024-01-01T00:00:00+00:00"}}}]
+    )
+
+    batch = concat_records([naive, aware])
+
+    assert batch.height == 2
+    assert batch.schema["scraped_at"] == pl.String
+
+
+def test_process_batch_accepts_frames():
+    rows = generate_catalog(80, seed=4).rows
+    pipeline = DeduplicationPipeline(blocking_columns=["brand"])
+
+    columnar = process_batch(flatten_sources(rows), pipeline)
+    expected = process_batch(DatabaseIngestor.flatten_rows(rows), pipeline)
+
+    assert_frame_equal(columnar, expected, check_column_order=False)
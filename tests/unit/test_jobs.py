@@ -0,0 +1,188 @@
+import time
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from baystate_consolidator.api import jobs
+from baystate_consolidator.api.jobs import (
+    CANCELLED,
+    FAILED,
+    SUCCEEDED,
+    JobManager,
+    QueueFullError,
+)
+from baystate_consolidator.api.routes import router
+from baystate_consolidator.utils.metrics import CLUSTER_SIZE, MATCHED_PAIRS, STAGE_SECONDS
+
+
+# Job bodies live at module level so spawned workers can import them
+def quick_job(job_id, progress):
+    with progress.stage("fetch"):
+        progress.set(0.5, "fetched")
+    with progress.stage("process"):
+        progress.set(1.0, "done")
+
+
+def failing_job(job_id, progress):
+    with progress.stage("fetch"):
+        raise RuntimeError(f"no rows for {job_id}")
+
+
+def slow_job(job_id, progress):
+    for step in range(100):
+        with progress.stage(f"step-{step}"):
+            time.sleep(0.05)
+
+
+def metrics_job(job_id, progress):
+    with progress.stage("metrics-job"):
+        MATCHED_PAIRS.inc(7)
+        CLUSTER_SIZE.observe(3)
+
+
+WARMED = False
+
+
+def mark_warmed():
+    global WARMED
+    WARMED = True
+
+
+def report_warmed_job(job_id, progress):
+    progress.set(1.0, f"warmed={WARMED}")
+
+
+def wait_for(manager, job_id, statuses, timeout=30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = manager.get(job_id)
+        if job["status"] in statuses:
+            return job
+        time.sleep(0.05)
+    raise AssertionError(f"{job_id} stuck in {manager.get(job_id)['status']}")
+
+
+@pytest.fixture
+def manager_factory():
+    managers = []
+
+    def make(job_func, **kwargs):
+        manager = JobManager(job_func, **kwargs)
+        managers.append(manager)
+        return manager
+
+    yield make
+    for manager in managers:
+        manager.shutdown(wait=False)
+
+
+def test_job_succeeds_with_progress_and_stage_timings(manager_factory):
+    manager = manager_factory(quick_job)
+    manager.submit("job-1")
+    job = wait_for(manager, "job-1", (SUCCEEDED, FAILED))
+
+    assert job["status"] == SUCCEEDED
+    assert job["progress"] == 1.0
+    assert job["message"] == "done"
+    assert set(job["stage_timings"]) == {"fetch", "process"}
+    assert job["started_at"] is not None and job["finished_at"] >= job["started_at"]
+
+
+def test_failed_job_records_error(manager_factory):
+    manager = manager_factory(failing_job)
+    manager.submit("job-1")
+    job = wait_for(manager, "job-1", (SUCCEEDED, FAILED))
+
+    assert job["status"] == FAILED
+    assert job["error"] == "RuntimeError: no rows for job-1"
+    assert "fetch" in job["stage_timings"]
+
+
+def test_initializer_runs_in_prewarmed_workers(manager_factory):
+    manager = manager_factory(report_warmed_job, max_parallel_jobs=2, initializer=mark_warmed)
+    ready = manager.prewarm()
+    assert len(ready) == 2
+    assert all(future.result(timeout=30) for future in ready)
+
+    manager.submit("job-1")
+    job = wait_for(manager, "job-1", (SUCCEEDED, FAILED))
+    assert job["message"] == "warmed=True"
+
+
+def test_duplicate_submission_returns_existing_job(manager_factory):
+    manager = manager_factory(slow_job, max_parallel_jobs=1)
+    first = manager.submit("job-1")
+    second = manager.submit("job-1")
+
+    assert second["submitted_at"] == first["submitted_at"]
+    assert len(manager.list()) == 1
+
+
+def test_cancel_running_and_queued_jobs(manager_factory):
+    manager = manager_factory(slow_job, max_parallel_jobs=1)
+    manager.submit("running")
+    manager.submit("queued")
+    wait_for(manager, "running", ("running",))
+
+    manager.cancel("queued")
+    manager.cancel("running")
+
+    assert wait_for(manager, "running", (CANCELLED, SUCCEEDED, FAILED))["status"] == CANCELLED
+    queued = wait_for(manager, "queued", (CANCELLED, SUCCEEDED, FAILED))
+    assert queued["status"] == CANCELLED
+    assert queued["started_at"] is None
+
+
+def test_full_queue_rejects_submissions(manager_factory):
+    manager = manager_factory(slow_job, max_parallel_jobs=1, max_queued=1)
+    manager.submit("job-1")
+    manager.submit("job-2")
+
+    with pytest.raises(QueueFullError):
+        manager.submit("job-3")
+
+
+def test_only_recent_finished_jobs_are_kept(manager_factory):
+    manager = manager_factory(quick_job, max_parallel_jobs=1, max_finished=2)
+    for job_id in ("job-1", "job-2", "job-3"):
+        manager.submit(job_id)
+        wait_for(manager, job_id, (SUCCEEDED, FAILED))
+
+    assert [job["job_id"] for job in manager.list()] == ["job-2", "job-3"]
+    assert manager.get("job-1") is None
+    assert "job-1" not in manager._shared and "job-1" not in manager._futures
+    # A forgotten job_id runs again
+    assert manager.submit("job-1")["status"] in ("queued", "running")
+
+
+def test_worker_metrics_reach_the_web_process(manager_factory):
+    manager = manager_factory(metrics_job, max_parallel_jobs=1)
+    matched = MATCHED_PAIRS.value()
+    clusters = CLUSTER_SIZE.count()
+    manager.submit("job-1")
+    wait_for(manager, "job-1", (SUCCEEDED, FAILED))
+
+    assert MATCHED_PAIRS.value() == matched + 7
+    assert CLUSTER_SIZE.count() == clusters + 1
+    assert STAGE_SECONDS.count(stage="metrics-job") >= 1
+
+
+def test_routes(manager_factory, monkeypatch):
+    manager = manager_factory(slow_job, max_parallel_jobs=1, max_queued=0)
+    monkeypatch.setattr(jobs, "_default_manager", manager)
+    app = FastAPI()
+    app.include_router(router, prefix="/api/v1")
+    client = TestClient(app)
+
+    response = client.post("/api/v1/consolidate", json={"job_id": "job-1"})
+    assert response.status_code == 200
+    assert response.json()["job_id"] == "job-1"
+
+    assert client.post("/api/v1/consolidate", json={"job_id": "job-2"}).status_code == 429
+    assert client.get("/api/v1/jobs/job-1").json()["job_id"] == "job-1"
+    assert [job["job_id"] for job in client.get("/api/v1/jobs").json()] == ["job-1"]
+    assert client.get("/api/v1/jobs/missing").status_code == 404
+
+    client.post("/api/v1/jobs/job-1/cancel")
+    assert wait_for(manager, "job-1", (CANCELLED, SUCCEEDED, FAILED))["status"] == CANCELLED
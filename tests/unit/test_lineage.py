@@ -0,0 +1,64 @@
+import json
+
+import polars as pl
+
+from baystate_consolidator.models.golden_record import FieldMetadata, dump_records_json
+from baystate_consolidator.stages.ingest import flatten_sources
+from baystate_consolidator.stages.lineage import (
+    LINEAGE_SCHEMA,
+    lineage_frame,
+    lineage_from_records,
+    write_lineage,
+)
+from baystate_consolidator.stages.normalize import normalize_records
+from baystate_consolidator.stages.survivorship import BatchSurvivorshipEngine
+from baystate_consolidator.utils.synthetic import CatalogGenerator
+
+
+def _resolved(size=200):
+    rows = CatalogGenerator(seed=3).generate(size).rows
+    normalized = normalize_records(flatten_sources(rows))
+    return BatchSurvivorshipEngine().resolve(
+        normalized.with_columns(pl.col("sku").alias("cluster_id")), excel_prices={"unknown": 1.0}
+    )
+
+
+def _sorted(frame):
+    return frame.with_columns(pl.col("field", "source").cast(pl.String)).sort("sku", "field")
+
+
+def test_lineage_frame_matches_golden_records():
+    resolved = _resolved()
+    records = BatchSurvivorshipEngine().to_golden_records(resolved)
+    lineage = lineage_frame(resolved)
+
+    assert lineage.schema == pl.Schema(LINEAGE_SCHEMA)
+    assert lineage.height == sum(len(r.consolidation_metadata) for r in records)
+    assert _sorted(lineage).equals(_sorted(lineage_from_records(records)))
+    value = lineage.filter(pl.col("field") == "images")["value"][0]
+    assert isinstance(json.loads(value), list)
+
+
+def test_lineage_parquet_round_trip(tmp_path):
+    lineage = lineage_frame(_resolved())
+    path = str(tmp_path / "lineage" / "batch.parquet")
+    write_lineage(lineage, path)
+
+    assert pl.read_parquet(path).equals(lineage)
+    assert lineage_frame(pl.DataFrame()).schema == pl.Schema(LINEAGE_SCHEMA)
+
+
+def test_dump_records_json_matches_model_dump_json():
+    engine = BatchSurvivorshipEngine()
+    records = engine.to_golden_records(_resolved(50))
+
+    dumped = json.loads(dump_records_json(records))
+    assert dumped == [json.loads(record.model_dump_json()) for record in records]
+
+
+def test_sources_are_interned():
+    source = "".join(["che", "wy"])
+    a = FieldMetadata(value=1, source=source)
+    b = FieldMetadata(value=2, source="".join(["che", "wy"]))
+
+    assert a.source is b.source
@@ -0,0 +1,197 @@
+import json
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import httpx
+import polars as pl
+import pytest
+from postgrest.exceptions import APIError
+from supabase import create_client
+
+from baystate_consolidator.main import consolidated_skus
+from baystate_consolidator.models.golden_record import GoldenRecord
+from baystate_consolidator.stages.load import SupabaseLoader
+from baystate_consolidator.utils.database import DatabaseIngestor
+
+
+class FakeRest:
+    """
+    Minimal stand-in for the Supabase REST (PostgREST) endpoint: upsert via POST and
+    filtered PATCH, keyed on sku. fail_next makes the next N requests return 503.
+    """
+
+    def __init__(self):
+        self.tables = {"golden_records": {}, "products_ingestion": {}}
+        self.requests = []
+        self.fail_next = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+
+    def handle(self, handler, method):
+        url = urlparse(handler.path)
+        table = url.path.rsplit("/", 1)[-1]
+        body = json.loads(handler.rfile.read(int(handler.headers["Content-Length"])))
+        with self.lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            self.requests.append((method, table, parse_qs(url.query), handler.headers))
+            failing = self.fail_next > 0
+            self.fail_next -= failing
+        try:
+            if failing:
+                return 503
+            rows = self.tables[table]
+            with self.lock:
+                if method == "POST":
+                    for row in body:
+                        rows[row["sku"]] = {**rows.get(row["sku"], {}), **row}
+                else:
+                    skus = parse_qs(url.query)["sku"][0][len("in.(") : -1].split(",")
+                    for sku in skus:
+                        rows.setdefault(sku, {"sku": sku}).update(body)
+            return 204
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+
+
+@pytest.fixture
+def rest():
+    fake = FakeRest()
+
+    class Handler(BaseHTTPRequestHandler):
+        def _reply(self, method):
+            self.send_response(fake.handle(self, method))
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+        def do_POST(self):
+            self._reply("POST")
+
+        def do_PATCH(self):
+            self._reply("PATCH")
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    fake.client = create_client(f"http://127.0.0.1:{server.server_port}", "test-key")
+    yield fake
+    server.shutdown()
+
+
+def _records(count):
+    return [
+        GoldenRecord(sku=f"sku-{i:04d}", name=f"Product {i}", price=float(i)) for i in range(count)
+    ]
+
+
+def test_upsert_in_bounded_concurrent_chunks(rest):
+    loader = SupabaseLoader(rest.client, chunk_size=10, max_in_flight=3)
+    stats = loader.upsert_records(_records(95))
+
+    assert (stats.rows, stats.chunks, stats.retries) == (95, 10, 0)
+    assert stats.rows_per_second > 0
+    assert len(rest.tables["golden_records"]) == 95
+    assert rest.max_in_flight <= 3
+    method, _, query, headers = rest.requests[0]
+    assert method == "POST"
+    assert query["on_conflict"] == ["sku"]
+    assert "resolution=merge-duplicates" in headers["Prefer"]
+
+
+def test_replay_is_idempotent(rest):
+    loader = SupabaseLoader(rest.client, chunk_size=25)
+    loader.upsert_records(_records(50))
+    loader.upsert_records(_records(50))
+    assert len(rest.tables["golden_records"]) == 50
+
+    # Duplicate keys in one call collapse to the last record
+    stats = loader.upsert_records([{"sku": "x", "price": 1.0}, {"sku": "x", "price": 2.0}])
+    assert stats.rows == 1
+    assert rest.tables["golden_records"]["x"]["price"] == 2.0
+
+
+def test_unkeyed_and_colliding_records_are_reported(rest, caplog):
+    loader = SupabaseLoader(rest.client)
+    records = _records(2) + [
+        GoldenRecord(sku="sku-0001", name="Other cluster", price=3.0),
+        GoldenRecord(sku="UNKNOWN", name="No sku", price=4.0),
+        GoldenRecord(sku="UNKNOWN", name="No sku either", price=5.0),
+    ]
+
+    with caplog.at_level(logging.WARNING):
+        stats = loader.upsert_records(records)
+
+    assert stats.rows == 2
+    assert set(rest.tables["golden_records"]) == {"sku-0000", "sku-0001"}
+    assert "Skipped 2 record(s) without a sku" in caplog.text
+    assert "1 record(s) shared a sku" in caplog.text
+
+
+def test_only_written_clusters_mark_their_skus_consolidated(rest):
+    raw = pl.DataFrame(
+        {
+            "sku": ["a", "a", "b", "c", "d"],
+            "unique_id": ["a_amazon", "a_chewy", "b_chewy", "c_petco", "d_petco"],
+        }
+    )
+    # a's sources split across two clusters that both resolve to sku "a"; d has no sku
+    resolved = pl.DataFrame(
+        {
+            "sku": ["a", "b", "a", "UNKNOWN"],
+            "record_ids": [["a_amazon"], ["b_chewy"], ["a_chewy", "c_petco"], ["d_petco"]],
+            "name": ["A", "B", "A2", "D"],
+            "price": [1.0, 2.0, 3.0, 4.0],
+        }
+    )
+    records = [GoldenRecord(**row) for row in resolved.drop("record_ids").to_dicts()]
+
+    stats = SupabaseLoader(rest.client).upsert_records(records)
+
+    assert stats.keys == ("a", "b")
+    # The second "a" cluster won; a's amazon record went into the one dropped
+    assert consolidated_skus(raw, resolved, stats.keys) == ["b", "c"]
+
+
+def test_failed_chunks_are_retried_with_backoff(rest):
+    delays = []
+    loader = SupabaseLoader(rest.client, chunk_size=10, max_in_flight=1, sleep=delays.append)
+    rest.fail_next = 2
+
+    stats = loader.upsert_records(_records(30))
+
+    assert stats.retries == 2
+    assert len(rest.tables["golden_records"]) == 30
+    assert delays[1] > delays[0] * 0.5
+
+
+def test_gives_up_after_max_retries(rest):
+    loader = SupabaseLoader(rest.client, max_retries=1, sleep=lambda _: None)
+    rest.fail_next = 5
+    with pytest.raises(httpx.HTTPStatusError) as error:
+        loader.upsert_records(_records(3))
+    assert error.value.response.status_code == 503
+    assert len(rest.requests) == loader.max_retries + 1
+
+    # Plain dict rows go through the query builder, which raises its own error
+    with pytest.raises(APIError):
+        loader.upsert_records([{"sku": "x", "price": 1.0}])
+    assert len(rest.requests) == 2 * (loader.max_retries + 1)
+
+
+def test_update_status_is_chunked(rest):
+    ingestor = DatabaseIngestor(client=rest.client)
+    skus = [f"sku-{i:04d}" for i in range(45)] * 2
+
+    stats = ingestor.update_status(skus, "consolidated", chunk_size=20)
+
+    assert (stats.rows, stats.chunks) == (45, 3)
+    statuses = {row["pipeline_status"] for row in rest.tables["products_ingestion"].values()}
+    assert statuses == {"consolidated"}
+    assert len(rest.tables["products_ingestion"]) == 45
@@ -0,0 +1,84 @@
+import random
+
+import polars as pl
+from baystate_consolidator.pipelines.dedupe import DeduplicationPipeline
+from baystate_consolidator.pipelines.lsh import MinHashLSH, benchmark_lsh
+from baystate_consolidator.utils.hashing import shingle_hashes
+
+WORDS = ["chicken", "salmon", "grain", "free", "puppy", "adult", "senior", "recipe", "formula"]
+WORDS += ["dry", "small", "breed", "large", "indoor", "lamb", "rice", "turkey", "duck", "chew"]
+
+
+def _corpus(n=2000, seed=0):
+    rng = random.Random(seed)
+    names, truth = [], set()
+    for _ in range(n):
+        name = f"{' '.join(rng.sample(WORDS, 5))} {rng.randint(1, 40)} lb"
+        names.append(name)
+        if rng.random() < 0.2:
+            chars = list(name)
+            chars[rng.randrange(len(chars))] = rng.choice("xyz")
+            names.append("".join(chars))
+            truth.add((len(names) - 2, len(names) - 1))
+    return names, truth
+
+
+def test_shingles_are_grouped_by_text():
+    hashes, owner = shingle_hashes(["Abc", None, "abcde"], shingle_size=3)
+    # "abc" once, nothing for None, then abc/bcd/cde
+    assert owner.tolist() == [0, 2, 2, 2]
+    assert hashes[0] == hashes[1]
+    assert len(set(hashes[1:].tolist())) == 3
+
+
+def test_signature_similarity_tracks_jaccard():
+    index = MinHashLSH(bands=32, rows=4)
+    signatures, has_shingles = index.signatures(
+        ["acana puppy recipe 25 lb", "acana puppy recipe 25 lbs", "kong classic toy", ""]
+    )
+    assert has_shingles.tolist() == [True, True, True, False]
+    assert (signatures[0] == signatures[1]).mean() > 0.7
+    assert (signatures[0] == signatures[2]).mean() < 0.1
+
+
+def test_candidate_pairs_recall_and_reduction():
+    names, truth = _corpus()
+    pairs = MinHashLSH(bands=20, rows=5).candidate_pairs(names)
+    assert (pairs[:, 0] < pairs[:, 1]).all()
+    found = {(int(i), int(j)) for i, j in pairs} & truth
+    assert len(found) / len(truth) > 0.95
+    assert len(pairs) < len(names) * (len(names) - 1) // 2 / 100
+
+
+def test_oversized_buckets_are_dropped():
+    buckets = MinHashLSH(bands=4, rows=2, max_bucket_size=3).bucket_ids(["same name"] * 5)
+    assert (buckets == -1).all()
+
+
+def test_benchmark_tradeoff():
+    names, truth = _corpus(800)
+    results = benchmark_lsh(names, truth, [(10, 10), (32, 4)])
+    loose, strict = results.row(1, named=True), results.row(0, named=True)
+    assert loose["candidates"] > strict["candidates"]
+    assert loose["recall"] >= strict["recall"]
+
+
+def test_pipeline_links_records_with_missing_brand():
+    df = pl.DataFrame(
+        {
+            "unique_id": ["1", "2", "3"],
+            "name": ["Acana Puppy Recipe 25 lb", "Acana Puppy Recipe 25 Lb", "Kong Classic Toy"],
+            "brand": ["acana", None, "kong"],
+            "category": ["dog food", None, "toys"],
+            "weight": ["25.0 lb", "25.0 lb", None],
+            "price": [79.99, 79.99, 14.99],
+        }
+    )
+    without_lsh = DeduplicationPipeline(blocking_columns=["brand"]).run(df)
+    assert without_lsh["cluster_id"].n_unique() == 3
+
+    with_lsh = DeduplicationPipeline(
+        blocking_columns=["brand"], lsh=MinHashLSH(bands=20, rows=5)
+    ).run(df)
+    assert with_lsh.columns == df.columns + ["cluster_id"]
+    assert with_lsh["cluster_id"].to_list()[:2] == ["1", "1"]
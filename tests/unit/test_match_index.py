@@ -0,0 +1,140 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from baystate_consolidator.api.routes import router
+from baystate_consolidator.models.raw import RawScrapedProduct
+from baystate_consolidator.pipelines import match_index
+from baystate_consolidator.pipelines.match_index import (
+    MatchQuery,
+    ProductIndex,
+    iter_golden_record_pages,
+    trigrams,
+)
+from baystate_consolidator.utils.benchmark import format_match, run_match_benchmark
+from baystate_consolidator.utils.synthetic import CatalogGenerator
+
+GOLDEN = [
+    {"sku": "A1", "name": "acana puppy food", "brand": "acana", "weight": "25.0 lb", "price": 80.0},
+    {"sku": "A2", "name": "acana adult food", "brand": "acana", "weight": "25.0 lb", "price": 82.0},
+    {"sku": "K1", "name": "kong classic toy", "brand": "kong", "weight": None, "price": 12.5},
+    {"sku": "O1", "name": "orijen cat food", "brand": "orijen", "weight": "4.0 lb", "price": 30.0},
+]
+
+
+def _index():
+    index = ProductIndex()
+    index.refresh([GOLDEN[:2], GOLDEN[2:]])
+    return index
+
+
+def test_trigrams_are_padded():
+    assert trigrams("ab") == {"  a", " ab", "ab "}
+
+
+def test_match_ranks_the_same_product_first():
+    product = RawScrapedProduct(
+        scraper_name="chewy", title="ACANA Puppy  Food", price=79.5, brand="Acana", weight="25 lbs"
+    )
+    query = MatchQuery.from_product(product)
+    assert query == MatchQuery("acana puppy food", "acana", "25.0 lb", 79.5)
+
+    matches = _index().match(query, limit=3)
+    assert matches[0].sku == "A1"
+    assert matches[0].match_probability > 0.99
+    assert [m.match_probability for m in matches] == sorted(
+        (m.match_probability for m in matches), reverse=True
+    )
+    assert "K1" not in [m.sku for m in matches]
+
+
+def test_brand_weight_and_price_band_find_renamed_products():
+    index = _index()
+    # No name trigrams in common; found through the exact brand and weight lookups
+    matches = index.match(MatchQuery("xyz", "acana", "25.0 lb", 81.0))
+    assert {m.sku for m in matches} == {"A1", "A2"}
+    # Outside the neighbouring price bands
+    assert index.match(MatchQuery("xyz", "acana", "25.0 lb", 200.0)) == []
+
+
+def test_refresh_applies_changes_incrementally():
+    index = _index()
+    renamed = {**GOLDEN[2], "name": "kong extreme ball"}
+    stats = index.refresh([[GOLDEN[0], GOLDEN[1], renamed]])
+
+    assert (stats.added, stats.updated, stats.removed) == (0, 1, 1)
+    assert len(index) == 3
+    assert "O1" not in [m.sku for m in index.match(MatchQuery("orijen cat food"))]
+    assert index.match(MatchQuery("kong extreme ball"))[0].sku == "K1"
+    assert index.match(MatchQuery("kong classic toy", "kong"))[0].name == "kong extreme ball"
+
+
+def test_sparse_index_is_compacted():
+    index = ProductIndex()
+    rows = [{"sku": f"S{i}", "name": f"product {i}", "price": 1.0} for i in range(3000)]
+    index.upsert(rows)
+    index.remove(f"S{i}" for i in range(2000))
+
+    stats = index.stats()
+    assert (stats["records"], stats["rows"]) == (1000, 1000)
+    assert index.match(MatchQuery("product 2500"), limit=1)[0].sku == "S2500"
+
+
+class FakeQuery:
+    def __init__(self, rows):
+        self.rows = rows
+        self.after = None
+
+    def select(self, columns):
+        return self
+
+    def gt(self, column, value):
+        self.after = value
+        return self
+
+    def order(self, column):
+        return self
+
+    def limit(self, size):
+        self.size = size
+        return self
+
+    def execute(self):
+        rows = [row for row in self.rows if self.after is None or row["sku"] > self.after]
+        return type("Response", (), {"data": rows[: self.size]})
+
+
+class FakeClient:
+    def table(self, name):
+        return FakeQuery(sorted(GOLDEN, key=lambda row: row["sku"]))
+
+
+def test_golden_record_pages_use_keyset_pagination():
+    pages = list(iter_golden_record_pages(FakeClient(), page_size=3))
+    assert [[row["sku"] for row in page] for page in pages] == [["A1", "A2", "K1"], ["O1"]]
+
+
+def test_match_route(monkeypatch):
+    index = ProductIndex()
+    monkeypatch.setattr(match_index, "_default_index", index)
+    app = FastAPI()
+    app.include_router(router, prefix="/api/v1")
+    client = TestClient(app)
+    product = {"scraper_name": "petco", "title": "Orijen Cat Food", "brand": "ORIJEN"}
+
+    assert client.post("/api/v1/match", json=product).status_code == 503
+
+    index.refresh([GOLDEN])
+    response = client.post("/api/v1/match?limit=1", json=product)
+    assert response.status_code == 200
+    body = response.json()
+    assert body["index_size"] == 4
+    assert [match["sku"] for match in body["matches"]] == ["O1"]
+
+
+def test_match_benchmark_reports_latency_percentiles():
+    (result,) = run_match_benchmark([300], queries=50, generator=CatalogGenerator(seed=5))
+
+    assert result.catalog_size == 300 and result.queries == 50
+    assert 0 < result.p50_ms <= result.p99_ms
+    assert result.recall > 0.8
+    assert "p99 ms" in format_match([result])
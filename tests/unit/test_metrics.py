@@ -0,0 +1,158 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from baystate_consolidator.main import process_batch
+from baystate_consolidator.normalizers.weight import get_weight_parser
+from baystate_consolidator.pipelines.dedupe import DeduplicationPipeline
+from baystate_consolidator.utils.metrics import (
+    CANDIDATE_PAIRS,
+    CLUSTER_SIZE,
+    MATCHED_PAIRS,
+    REGISTRY,
+    STAGE_RECORDS,
+    STAGE_SECONDS,
+    MetricsRegistry,
+)
+
+
+@pytest.fixture(autouse=True)
+def clear_metrics():
+    REGISTRY.clear()
+    yield
+    REGISTRY.clear()
+
+
+def test_counter_and_histogram_exposition():
+    registry = MetricsRegistry()
+    counter = registry.counter("demo_records_total", "Records seen", ["stage"])
+    histogram = registry.histogram("demo_seconds", "Latency", buckets=(0.1, 1))
+    counter.inc(3, stage="normalize")
+    counter.inc(stage='quo"te')
+    histogram.observe(0.05)
+    histogram.observe(0.5)
+    histogram.observe(5)
+
+    text = registry.render()
+    assert "# TYPE demo_records_total counter" in text
+    assert 'demo_records_total{stage="normalize"} 3' in text
+    assert 'demo_records_total{stage="quo\\"te"} 1' in text
+    assert "# TYPE demo_seconds histogram" in text
+    assert 'demo_seconds_bucket{le="0.1"} 1' in text
+    assert 'demo_seconds_bucket{le="1"} 2' in text
+    assert 'demo_seconds_bucket{le="+Inf"} 3' in text
+    assert "demo_seconds_sum 5.55" in text
+    assert "demo_seconds_count 3" in text
+    assert text.endswith("\n")
+
+
+def test_labels_are_validated_and_counters_only_increase():
+    counter = MetricsRegistry().counter("demo_total", "Demo", ["stage"])
+    with pytest.raises(ValueError):
+        counter.inc(other="x")
+    with pytest.raises(ValueError):
+        counter.inc(-1, stage="a")
+
+
+def test_changes_since_and_merge_carry_metrics_between_registries():
+    worker, web = MetricsRegistry(), MetricsRegistry()
+    stats = {"hit": 1}
+    for registry in (worker, web):
+        registry.counter("demo_total", "Demo", ["stage"])
+        registry.histogram("demo_seconds", "Latency", buckets=(0.1, 1))
+    worker.register_collector(
+        "demo_cache_total",
+        "Cache",
+        lambda: [("demo_cache_total", {"event": "hit"}, stats["hit"])],
+        kind="counter",
+    )
+    worker.counter("demo_total", "Demo", ["stage"]).inc(5, stage="a")
+    before = worker.snapshot()
+    worker.counter("demo_total", "Demo", ["stage"]).inc(2, stage="a")
+    worker.histogram("demo_seconds", "Latency").observe(0.5)
+    stats["hit"] = 4
+
+    web.merge(worker.changes_since(before))
+    web.merge(worker.changes_since(before))
+    text = web.render()
+    assert 'demo_total{stage="a"} 4' in text
+    assert 'demo_seconds_bucket{le="1"} 2' in text
+    assert 'demo_cache_total{event="hit"} 6' not in text  # Rendered under a collector of that name
+    web.register_collector("demo_cache_total", "Cache", lambda: [], kind="counter")
+    assert 'demo_cache_total{event="hit"} 6' in web.render()
+
+
+def test_registry_reuses_metrics_by_name():
+    registry = MetricsRegistry()
+    assert registry.counter("a_total", "A") is registry.counter("a_total", "A")
+    with pytest.raises(ValueError):
+        registry.histogram("a_total", "A")
+
+
+def test_summary_and_collectors():
+    registry = MetricsRegistry()
+    registry.histogram("demo_seconds", "Latency", ["stage"]).observe(2.0, stage="dedupe")
+    registry.register_collector(
+        "demo_cache_events_total",
+        "Cache",
+        lambda: [("demo_cache_events_total", {"event": "hits"}, 4)],
+        kind="counter",
+    )
+
+    summary = registry.summary()
+    assert summary["demo_seconds"] == {"dedupe": {"count": 1, "sum": 2.0, "mean": 2.0, "max": 2.0}}
+    assert summary["demo_cache_events_total"] == {"hits": 4}
+    assert 'demo_cache_events_total{event="hits"} 4' in registry.render()
+
+
+def test_weight_cache_statistics_are_exported():
+    parser = get_weight_parser()
+    parser.clear()
+    parser.parse("5 lb")
+    parser.parse("5 lb")
+
+    text = REGISTRY.render()
+    assert 'baystate_weight_cache_events_total{event="hits"} 1' in text
+    assert 'baystate_weight_cache_events_total{event="fast_path"} 1' in text
+
+
+def test_process_batch_records_stage_metrics():
+    raw = [
+        {
+            "unique_id": "1",
+            "name": "Acana Puppy",
+            "brand": "acana",
+            "weight": "25 lb",
+            "price": 79.99,
+        },
+        {
+            "unique_id": "2",
+            "name": "Acana Puppy",
+            "brand": "acana",
+            "weight": "25 lb",
+            "price": 79.99,
+        },
+        {"unique_id": "3", "name": "Kong Classic", "brand": "kong", "weight": None, "price": 14.99},
+    ]
+    pipeline = DeduplicationPipeline(blocking_columns=["brand"])
+    process_batch(raw, pipeline)
+
+    assert STAGE_RECORDS.value(stage="normalize") == 3
+    assert STAGE_RECORDS.value(stage="dedupe") == 3
+    assert STAGE_RECORDS.value(stage="survivorship") == 2
+    for stage in ("normalize", "dedupe", "survivorship"):
+        assert STAGE_SECONDS.count(stage=stage) == 1
+    assert CANDIDATE_PAIRS.value() == 1
+    assert MATCHED_PAIRS.value() == 1
+    assert CLUSTER_SIZE.summary()["total"]["count"] == 2
+    assert CLUSTER_SIZE.summary()["total"]["max"] == 2
+
+
+def test_metrics_endpoint():
+    from baystate_consolidator.script_main import app
+
+    STAGE_RECORDS.inc(5, stage="ingest")
+    response = TestClient(app).get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert 'baystate_stage_records_total{stage="ingest"} 5' in response.text
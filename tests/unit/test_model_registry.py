@@ -0,0 +1,73 @@
+import json
+import random
+
+from baystate_consolidator.pipelines.dedupe import DeduplicationPipeline
+from baystate_consolidator.pipelines.model import ModelRegistry
+
+
+def test_versions_increment(tmp_path):
+    registry = ModelRegistry(str(tmp_path / "models"))
+    assert registry.latest_path() is None
+    assert registry.load() is None
+    assert registry.next_path().endswith("splink_model_v0001.json")
+
+    (tmp_path / "models").mkdir()
+    for version in (1, 2, 10):
+        with open(registry.path_for(version), "w") as f:
+            json.dump({"version": version}, f)
+
+    assert registry.versions() == [1, 2, 10]
+    assert registry.latest_path().endswith("splink_model_v0010.json")
+    assert registry.next_path().endswith("splink_model_v0011.json")
+    assert registry.load(2) == {"version": 2}
+
+
+def test_loaded_model_keeps_parameters_and_swaps_blocking(tmp_path):
+    path = tmp_path / "model.json"
+    trained = {
+        "link_type": "dedupe_only",
+        "comparisons": [{"m": 0.9}],
+        "blocking_rules_to_generate_predictions": [],
+    }
+    path.write_text(json.dumps(trained))
+
+    pipeline = DeduplicationPipeline(model_path=str(path))
+    settings = pipeline._get_settings(["l.brand = r.brand"])
+
+    assert settings["comparisons"] == [{"m": 0.9}]
+    assert settings["blocking_rules_to_generate_predictions"] == ["l.brand = r.brand"]
+    assert pipeline.model_settings["blocking_rules_to_generate_predictions"] == []
+
+
+def test_train_saves_versioned_model(tmp_path):
+    rng = random.Random(0)
+    brands = ["acana", "purina", "kong", "kaytee"]
+    data = []
+    for i in range(200):
+        brand = rng.choice(brands)
+        name = f"{brand} item {rng.randint(0, 30)}"
+        data.append(
+            {
+                "unique_id": str(i),
+                "name": name,
+                "brand": brand,
+                "category": "dog food",
+                "weight": rng.choice(["5 lb", "10 lb"]),
+                "price": float(rng.randint(5, 30)),
+            }
+        )
+    registry = ModelRegistry(str(tmp_path / "models"))
+
+    # Stay under Splink's 1e4-pair threshold for salted sampling on single-core runners
+    model_path = DeduplicationPipeline().train(data, registry, max_pairs=5000, seed=1)
+
+    assert registry.versions() == [1]
+    model = registry.load()
+    assert model["comparisons"][0]["comparison_levels"][1]["m_probability"] is not None
+    with open(model_path.replace(".json", ".meta.json")) as f:
+        meta = json.load(f)
+    assert set(meta["timings"]) >= {"estimate_u", "estimate_m_em_0", "estimate_m_em_1"}
+
+    clustered = DeduplicationPipeline(model_path=model_path).run(data[:20])
+    assert clustered.height == 20
+    assert clustered["cluster_id"].null_count() == 0
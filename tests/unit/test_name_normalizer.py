@@ -0,0 +1,144 @@
+import random
+
+import pytest
+from baystate_consolidator.core.name_normalizer import NameNormalizer, UnitRule, normalize_name
+from baystate_consolidator.core.normalization import (
+    normalize_consolidation_result,
+    normalize_name_multipass,
+)
+
+BRANDS = ["ACANA", "Blue Buffalo", "PURINA", "Hill's", "Kaytee", "Scotts", "KONG", "Nylabone"]
+WORDS = [
+    "dog",
+    "FOOD",
+    "Cat",
+    "litter",
+    "Bird",
+    "seed",
+    "Chicken",
+    "&",
+    "rice",
+    "Grain-Free",
+    "(Adult)",
+    "puppy",
+    "Treats",
+    "mat",
+    "Pad",
+    "x",
+    "in",
+    "Made",
+    "USA",
+    "2-pack",
+    "w/",
+    "L-Carnitine",
+    "Small/Medium",
+    "Original",
+    "cage",
+    "Hay",
+    "mix,",
+]
+UNITS = [
+    "lb",
+    "lbs",
+    "LB",
+    "Lbs.",
+    "lb.",
+    "pound",
+    "Pounds",
+    "oz",
+    "OZ.",
+    "ounce",
+    "Ounces",
+    "ct",
+    "CT",
+    "count",
+    "Count",
+    "ft",
+    "FT.",
+    "feet",
+    "in",
+    "inch",
+    "Inches",
+    "IN.",
+    "l",
+    "L",
+    "liter",
+    "Liters",
+]
+NUMBERS = ["1", "2", "5", "10", "12", "0.5", "2.50", "3.0", "10.00", "1.25", "16", "40", "4.5"]
+
+
+def _quantity(rng):
+    number = rng.choice(NUMBERS)
+    unit = rng.choice(UNITS)
+    return number + rng.choice(["", " ", "  ", "\t"]) + unit
+
+
+def _dimensions(rng):
+    unit = rng.choice(['"', " in", "in", " inches", "inch", ""])
+    # Long spellings glued to the separator ("inchesx4") are left alone by both implementations
+    seps = [" x ", " X "] if unit.endswith(("inch", "inches")) else ["x", "X", " x ", " X ", "x "]
+    sep = rng.choice(seps)
+    numbers = [
+        rng.choice(["3", "4", "12", "24", "36", "1.5"]) for _ in range(rng.choice([2, 2, 3]))
+    ]
+    return sep.join(number + unit for number in numbers)
+
+
+def _name(rng):
+    tokens = [rng.choice(BRANDS)]
+    for _ in range(rng.randint(1, 5)):
+        roll = rng.random()
+        if roll < 0.55:
+            tokens.append(rng.choice(WORDS))
+        elif roll < 0.85:
+            tokens.append(_quantity(rng))
+        else:
+            tokens.append(_dimensions(rng))
+    name = rng.choice([" ", " ", "  "]).join(tokens)
+    if rng.random() < 0.1:
+        name = name.upper()
+    if rng.random() < 0.1:
+        name = "  " + name + " "
+    return name
+
+
+def corpus(size, seed=1234):
+    rng = random.Random(seed)
+    return [_name(rng) for _ in range(size)]
+
+
+def test_matches_multipass_on_corpus():
+    mismatches = [
+        (name, normalize_name_multipass(name), normalize_name(name))
+        for name in corpus(20000)
+        if normalize_name_multipass(name) != normalize_name(name)
+    ]
+    assert mismatches[:10] == []
+
+
+@pytest.mark.parametrize(
+    "raw, expected",
+    [
+        ("ACANA Dog Food 10lbs.", "ACANA Dog Food 10 lb"),
+        ("DOG FOOD 5 OZ.", "Dog Food 5 oz"),
+        ('3"x4" pad', "3 X 4 in Pad"),
+        ("3 in x 4 in x 5 inches mat", "3 X 4 X 5 in Mat"),
+        ("kaytee  2.50 Pounds", "Kaytee 2.5 lb"),
+        ("", ""),
+        ("   ", ""),
+    ],
+)
+def test_examples(raw, expected):
+    assert normalize_name(raw) == expected
+    assert normalize_name_multipass(raw) == expected
+
+
+def test_custom_rule_table():
+    normalizer = NameNormalizer((UnitRule("gal", ("gal", "gallon", "gallons")),))
+    assert normalizer.normalize("water 2 Gallons") == "Water 2 gal"
+
+
+def test_consolidation_result_uses_engine():
+    result = normalize_consolidation_result({"name": "kong toy 2ct", "weight": "5.0"})
+    assert result == {"name": "Kong Toy 2 ct", "weight": "5"}
@@ -0,0 +1,166 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import openai
+import pytest
+from baystate_consolidator.services.ocr import AsyncOCRService, OCRCache
+
+IMAGES = {"/img/a.png": b"bag-front", "/img/b.png": b"bag-back", "/img/a-copy.png": b"bag-front"}
+
+
+class FakeOpenAI:
+    """
+    OpenAI-compatible chat completions endpoint plus a static image host.
+    """
+
+    def __init__(self):
+        self.calls = []
+        self.image_gets = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.fail = False
+        self.lock = threading.Lock()
+
+    def complete(self, body):
+        with self.lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            self.calls.append(body)
+        time.sleep(0.05)
+        with self.lock:
+            self.in_flight -= 1
+        image = body["messages"][0]["content"][1]["image_url"]["url"]
+        return {
+            "id": "chatcmpl-1",
+            "object": "chat.completion",
+            "created": 0,
+            "model": body["model"],
+            "choices": [
+                {
+                    "index": 0,
+                    "finish_reason": "stop",
+                    "message": {
+                        "role": "assistant",
+                        "content": json.dumps({"net_weight": "5 lb", "image": image[-16:]}),
+                    },
+                }
+            ],
+        }
+
+
+@pytest.fixture
+def fake():
+    server_state = FakeOpenAI()
+
+    class Handler(BaseHTTPRequestHandler):
+        def _send(self, status, body, content_type="application/json"):
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            with server_state.lock:
+                server_state.image_gets += 1
+            if self.path not in IMAGES:
+                return self._send(404, b"{}")
+            self._send(200, IMAGES[self.path], "image/png")
+
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            if server_state.fail:
+                return self._send(500, b'{"error": {"message": "boom"}}')
+            self._send(200, json.dumps(server_state.complete(body)).encode())
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    server_state.base = f"http://127.0.0.1:{server.server_port}"
+    server_state.client = openai.AsyncOpenAI(
+        base_url=f"{server_state.base}/v1", api_key="test", max_retries=0
+    )
+    yield server_state
+    server.shutdown()
+
+
+def _service(fake, **kwargs):
+    return AsyncOCRService(client=fake.client, **kwargs)
+
+
+def test_batch_dedupes_identical_content(fake):
+    urls = [f"{fake.base}/img/a.png", f"{fake.base}/img/b.png", f"{fake.base}/img/a-copy.png"]
+    results = _service(fake).extract_batch(urls + urls[:1])
+
+    assert set(results) == set(urls)
+    assert len(fake.calls) == 2
+    assert results[urls[0]].data == results[urls[2]].data
+    assert results[urls[2]].cached
+    assert all(r.error is None for r in results.values())
+    # The hashed bytes are what the model sees
+    assert fake.calls[0]["messages"][0]["content"][1]["image_url"]["url"].startswith(
+        "data:image/png;base64,"
+    )
+
+
+def test_concurrency_limit(fake, monkeypatch):
+    for i in range(8):
+        monkeypatch.setitem(IMAGES, f"/img/{i}.png", f"image-{i}".encode())
+    urls = [f"{fake.base}/img/{i}.png" for i in range(8)]
+    _service(fake, max_concurrency=2).extract_batch(urls)
+    assert len(fake.calls) == 8
+    assert fake.max_in_flight <= 2
+
+
+def test_rate_limit_spaces_requests(fake):
+    urls = [f"{fake.base}/img/a.png", f"{fake.base}/img/b.png"]
+    started = time.perf_counter()
+    _service(fake, requests_per_minute=300).extract_batch(urls)
+    assert time.perf_counter() - started >= 0.2
+
+
+def test_disk_cache_skips_download_and_model(fake, tmp_path):
+    cache = OCRCache(str(tmp_path / "ocr.sqlite"))
+    url = f"{fake.base}/img/a.png"
+    first = _service(fake, cache=cache).extract_batch([url])[url]
+    assert not first.cached and len(fake.calls) == 1
+
+    gets = fake.image_gets
+    second = _service(fake, cache=cache).extract_batch([url])[url]
+    assert second.cached and second.data == first.data
+    assert len(fake.calls) == 1
+    assert fake.image_gets == gets
+
+    # A new URL with known content is downloaded but not sent to the model
+    copy = f"{fake.base}/img/a-copy.png"
+    assert _service(fake, cache=cache).extract_batch([copy])[copy].cached
+    assert len(fake.calls) == 1
+
+
+def test_ttl_eviction(fake, tmp_path):
+    cache = OCRCache(str(tmp_path / "ocr.sqlite"), url_ttl=0, result_ttl=0)
+    url = f"{fake.base}/img/a.png"
+    _service(fake, cache=cache).extract_batch([url])
+    time.sleep(0.01)
+    assert cache.content_hash_for_url(url) is None
+    assert cache.evict_expired() == 2
+
+    _service(fake, cache=cache).extract_batch([url])
+    assert len(fake.calls) == 2
+
+
+def test_errors_are_reported_per_url(fake):
+    fake.fail = True
+    missing = f"{fake.base}/img/missing.png"
+    good = f"{fake.base}/img/b.png"
+    service = _service(fake)
+    results = service.extract_batch([missing, good])
+
+    assert "404" in results[missing].error
+    assert "OCR request failed" in results[good].error
+    assert results[good].data == {}
+    assert service.stats["errors"] == 2
@@ -0,0 +1,101 @@
+import polars as pl
+
+from baystate_consolidator.pipelines.dedupe import DeduplicationPipeline
+from baystate_consolidator.pipelines.sharding import (
+    ShardReport,
+    assign_shards,
+    format_shard_report,
+    shard_skew,
+)
+
+
+def _records():
+    rows = [
+        ("1", "Acana Puppy Recipe 25 lb", "acana", "dog", 79.99),
+        ("2", "Acana Puppy Recipe 25 lb", "acana", "dog", 79.99),
+        ("3", "Kong Classic Large", "kong", "dog", 14.99),
+        ("4", "Kong Classic Large", "kong", "dog", 14.99),
+        ("5", "Purina Cat Chow 16 lb", "purina", "cat", 21.5),
+        ("6", "Purina Cat Chow 16 lb", "purina", "cat", 21.5),
+        ("7", "Tidy Cats Litter 20 lb", "tidy cats", "cat", 12.0),
+        ("8", "Mystery Treats", None, "dog", 5.0),
+        ("9", "Mystery Treats", None, "dog", 5.0),
+    ]
+    return pl.DataFrame(
+        {
+            "unique_id": [r[0] for r in rows],
+            "name": [r[1] for r in rows],
+            "brand": [r[2] for r in rows],
+            "category": [r[3] for r in rows],
+            "weight": [None] * len(rows),
+            "price": [r[4] for r in rows],
+        }
+    )
+
+
+def test_assign_shards_keeps_keys_together_and_isolates_missing():
+    sharded, partitions = assign_shards(_records(), "brand", num_shards=2)
+    shard_of = dict(zip(sharded["unique_id"], sharded["__shard"]))
+
+    assert shard_of["1"] == shard_of["2"]
+    assert shard_of["5"] == shard_of["6"]
+    assert shard_of["8"] == shard_of["9"] == 2
+    assert sum(partitions.values()) == 4
+    keyed = sharded.filter(pl.col("__shard") < 2)["__shard"]
+    assert sorted(keyed.value_counts()["count"].to_list()) == [3, 4]
+
+
+def test_assign_shards_composite_key():
+    sharded, _ = assign_shards(_records(), ["brand", "category"], num_shards=3)
+    assert sharded.filter(pl.col("brand").is_null())["__shard"].unique().to_list() == [3]
+
+
+def test_sharded_run_matches_single_linker():
+    df = _records()
+    single = DeduplicationPipeline(blocking_columns=["brand"]).run(df)
+    sharded, reports = DeduplicationPipeline(blocking_columns=["brand"]).run_sharded(
+        df, "brand", max_workers=2, num_shards=2
+    )
+
+    assert sharded.columns == single.columns
+    assert sharded["unique_id"].to_list() == df["unique_id"].to_list()
+    cluster_of = dict(zip(sharded["unique_id"], sharded["cluster_id"]))
+    assert cluster_of["1"] == cluster_of["2"] == "1"
+    assert cluster_of["5"] == cluster_of["6"] == "5"
+    # Missing brands cannot block on brand, in either mode
+    assert cluster_of["8"] != cluster_of["9"]
+    assert sharded["cluster_id"].n_unique() == single["cluster_id"].n_unique()
+
+    assert sum(report.records for report in reports) == len(df)
+    assert [report.shard for report in reports] == [0, 1, 2]
+
+
+def test_broadcast_missing_links_across_shards():
+    bridged = pl.col("unique_id") == "9"
+    df = _records().with_columns(
+        pl.when(bridged).then(pl.lit("Kong Classic Large")).otherwise(pl.col("name")).alias("name"),
+        pl.when(bridged).then(14.99).otherwise(pl.col("price")).alias("price"),
+    )
+    pipeline = DeduplicationPipeline(blocking_columns=["category"])
+    clustered, _ = pipeline.run_sharded(
+        df, "brand", max_workers=1, num_shards=2, broadcast_missing=True
+    )
+    cluster_of = dict(zip(clustered["unique_id"], clustered["cluster_id"]))
+
+    assert cluster_of["3"] == cluster_of["4"] == cluster_of["9"] == "3"
+    assert clustered.height == df.height
+
+
+def test_pipeline_run_uses_shard_key():
+    pipeline = DeduplicationPipeline(blocking_columns=["brand"], shard_key="brand", max_workers=1)
+    clustered = pipeline.run(_records())
+    cluster_of = dict(zip(clustered["unique_id"], clustered["cluster_id"]))
+    assert cluster_of["3"] == cluster_of["4"]
+
+
+def test_skew_and_report():
+    reports = [ShardReport(0, 3, 30, 20, 1.5), ShardReport(1, 1, 10, 10, 0.5)]
+    assert shard_skew(reports) == 1.5
+    text = format_shard_report(["brand", "category"], reports)
+    assert text.splitlines()[0] == "Sharded on brand+category: 2 shards, skew 1.50, slowest 1.50s"
+    assert "shard 0: 30 records (3 keys) -> 20 clusters in 1.50s" in text
@@ -0,0 +1,123 @@
+import os
+import time
+
+import polars as pl
+import pytest
+from polars.testing import assert_frame_equal
+
+from baystate_consolidator.main import process_batch
+from baystate_consolidator.pipelines.dedupe import DeduplicationPipeline
+from baystate_consolidator.stages.runner import StageRunner, fingerprint_records, stage_key
+from baystate_consolidator.stages.survivorship import BatchSurvivorshipEngine
+from baystate_consolidator.utils.database import DatabaseIngestor
+from baystate_consolidator.utils.metrics import CHECKPOINT_HITS, REGISTRY
+from baystate_consolidator.utils.synthetic import generate_catalog
+
+
+@pytest.fixture(autouse=True)
+def clear_metrics():
+    REGISTRY.clear()
+    yield
+    REGISTRY.clear()
+
+
+class _Counting:
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, value):
+        self.calls += 1
+        return pl.DataFrame({"value": [value]})
+
+
+def test_fingerprint_ignores_key_order_but_not_values():
+    assert fingerprint_records([{"a": 1, "b": 2}]) == fingerprint_records([{"b": 2, "a": 1}])
+    assert fingerprint_records([{"a": 1}]) != fingerprint_records([{"a": 2}])
+    assert stage_key("dedupe", "k", {"t": 0.9}) != stage_key("dedupe", "k", {"t": 0.8})
+
+
+def test_resume_skips_unchanged_stages(tmp_path):
+    func = _Counting()
+    first = StageRunner(str(tmp_path)).run("normalize", "input", func, 1)
+    assert not first.cached
+    assert os.path.exists(StageRunner(str(tmp_path)).path("normalize", first.key))
+
+    # Without resume the stage runs again
+    StageRunner(str(tmp_path)).run("normalize", "input", func, 1)
+    assert func.calls == 2
+
+    resumed = StageRunner(str(tmp_path), resume=True).run("normalize", "input", func, 1)
+    assert resumed.cached and resumed.key == first.key
+    assert_frame_equal(resumed.frame, first.frame)
+    assert func.calls == 2
+
+    changed = StageRunner(str(tmp_path), resume=True).run(
+        "normalize", "input", func, 1, config={"option": True}
+    )
+    assert not changed.cached
+    assert func.calls == 3
+
+
+def test_prune_removes_only_stale_checkpoints(tmp_path):
+    runner = StageRunner(str(tmp_path), resume=True)
+    stale = runner.run("normalize", "old", _Counting(), 1)
+    fresh = runner.run("dedupe", "new", _Counting(), 1)
+    an_hour_ago = time.time() - 3600
+    os.utime(runner.path("normalize", stale.key), (an_hour_ago, an_hour_ago))
+
+    assert runner.prune(60) == 1
+    assert runner.checkpoints("normalize") == []
+    assert runner.checkpoints("dedupe") == [fresh.key]
+    assert StageRunner(None).prune(0) == 0
+
+
+def test_from_stage_recomputes_that_stage_and_later(tmp_path):
+    func = _Counting()
+    runner = StageRunner(str(tmp_path))
+    for stage in ("normalize", "dedupe", "survivorship"):
+        runner.run(stage, "input", func, 1)
+
+    runner = StageRunner(str(tmp_path), from_stage="dedupe")
+    assert runner.run("normalize", "input", func, 1).cached
+    assert not runner.run("dedupe", "input", func, 1).cached
+    assert not runner.run("survivorship", "input", func, 1).cached
+    assert func.calls == 5
+    with pytest.raises(ValueError):
+        StageRunner(str(tmp_path), from_stage="load")
+
+
+def test_without_checkpoint_dir_or_input_key_stages_just_run(tmp_path):
+    func = _Counting()
+    assert StageRunner().run("normalize", "input", func, 1).key == ""
+    assert StageRunner(str(tmp_path), resume=True).run("dedupe", None, func, 1).key == ""
+    assert func.calls == 2
+    assert not os.listdir(tmp_path)
+
+
+def test_process_batch_resumes_from_checkpoints(tmp_path):
+    raw = DatabaseIngestor.flatten_rows(generate_catalog(60, seed=5).rows)
+    survivorship = BatchSurvivorshipEngine()
+    pipeline = DeduplicationPipeline(blocking_columns=["brand"])
+    first = process_batch(
+        raw, pipeline, survivorship=survivorship, runner=StageRunner(str(tmp_path))
+    )
+
+    resumed = process_batch(
+        raw,
+        pipeline,
+        survivorship=survivorship,
+        runner=StageRunner(str(tmp_path), resume=True),
+    )
+    assert_frame_equal(resumed, first)
+    assert survivorship.to_golden_records(resumed)
+    for stage in ("normalize", "dedupe", "survivorship"):
+        assert CHECKPOINT_HITS.value(stage=stage) == 1
+
+    # A new threshold reuses normalization but recomputes dedupe and survivorship
+    retuned = DeduplicationPipeline(blocking_columns=["brand"], match_threshold=0.5)
+    process_batch(
+        raw, retuned, survivorship=survivorship, runner=StageRunner(str(tmp_path), resume=True)
+    )
+    assert CHECKPOINT_HITS.value(stage="normalize") == 2
+    assert CHECKPOINT_HITS.value(stage="dedupe") == 1
+    assert len(StageRunner(str(tmp_path)).checkpoints("dedupe")) == 2
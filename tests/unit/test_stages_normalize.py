@@ -0,0 +1,62 @@
+from baystate_consolidator.normalizers.price import normalize_price
+from baystate_consolidator.normalizers.text import normalize_text, normalize_weight
+from baystate_consolidator.stages.normalize import (
+    normalize_frame,
+    normalize_records,
+    records_to_frame,
+)
+
+RECORDS = [
+    {
+        "unique_id": "1_a",
+        "title": "  ACANA  Dog Food ",
+        "brand": "ACANA",
+        "price": "$10.00",
+        "weight": "10 lbs",
+    },
+    {
+        "unique_id": "1_b",
+        "title": "Acana dog\tfood",
+        "brand": "Acana ",
+        "price": 10.5,
+        "weight": "16 oz",
+    },
+    {"unique_id": "2_a", "title": None, "brand": None, "price": None, "weight": None},
+    {"unique_id": "2_b", "title": "", "brand": "", "price": "Not a price", "weight": "1 kg"},
+    {"unique_id": "3_a", "title": "Cat Chow", "brand": "Purina", "price": 3, "weight": "10 lbs"},
+]
+
+
+def _scalar(record):
+    return {
+        "name": normalize_text(record["title"]),
+        "brand": normalize_text(record["brand"]),
+        "price": normalize_price(record["price"]),
+        "weight": normalize_weight(record["weight"]),
+    }
+
+
+def test_matches_scalar_normalizers():
+    df = normalize_records(RECORDS)
+    rows = df.select(["name", "brand", "price", "weight"]).to_dicts()
+    assert rows == [_scalar(record) for record in RECORDS]
+
+
+def test_keeps_other_columns():
+    df = normalize_records(RECORDS)
+    assert df["unique_id"].to_list() == [r["unique_id"] for r in RECORDS]
+    assert df["title"].to_list() == [r["title"] for r in RECORDS]
+
+
+def test_numeric_price_column():
+    df = normalize_frame(records_to_frame([{"price": 1}, {"price": 2}]))
+    assert df["price"].to_list() == [1.0, 2.0]
+
+
+def test_missing_columns_are_skipped():
+    df = normalize_frame(records_to_frame([{"sku": "A"}]))
+    assert df.columns == ["sku"]
+
+
+def test_empty_input():
+    assert normalize_records([]) is None
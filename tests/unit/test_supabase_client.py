@@ -0,0 +1,124 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+import pytest
+
+from baystate_consolidator.core.taxonomy import TaxonomyService
+from baystate_consolidator.utils.database import DatabaseIngestor
+from baystate_consolidator.utils.metrics import EXTERNAL_CALL_SECONDS, REGISTRY
+from baystate_consolidator.utils.supabase_client import (
+    PoolSettings,
+    SupabaseProvider,
+    close_supabase_clients,
+    get_supabase_client,
+)
+
+
+class StubRest:
+    """
+    Keep-alive HTTP/1.1 stand-in for the Supabase REST endpoint. Every GET returns the
+    rows of its table; paths containing "slow" stall for `delay` seconds first.
+    """
+
+    def __init__(self):
+        self.tables = {"categories": [{"name": "Dog Food"}, {"name": "Cat Litter"}]}
+        self.peers = set()
+        self.requests = 0
+        self.delay = 0.0
+        self.lock = threading.Lock()
+
+
+@pytest.fixture
+def stub(monkeypatch):
+    rest = StubRest()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            with rest.lock:
+                rest.peers.add(self.client_address)
+                rest.requests += 1
+            if "slow" in self.path:
+                time.sleep(rest.delay)
+            table = self.path.split("?", 1)[0].rsplit("/", 1)[-1]
+            body = json.dumps(rest.tables.get(table, [])).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    rest.url = f"http://127.0.0.1:{server.server_port}"
+    monkeypatch.setenv("SUPABASE_URL", rest.url)
+    monkeypatch.setenv("SUPABASE_KEY", "test-key")
+    yield rest
+    close_supabase_clients()
+    server.shutdown()
+
+
+def test_call_sites_share_one_pooled_client(stub):
+    ingestor = DatabaseIngestor()
+    taxonomy = TaxonomyService()
+
+    assert ingestor.supabase is taxonomy.supabase is get_supabase_client()
+    assert taxonomy.get_categories() == ["Dog Food", "Cat Litter"]
+    for _ in range(5):
+        ingestor.supabase.table("categories").select("name").execute()
+
+    assert stub.requests == 6
+    # Keep-alive: every request went over the same connection
+    assert len(stub.peers) == 1
+
+
+def test_reports_latency_and_pool_usage(stub):
+    before = EXTERNAL_CALL_SECONDS.count(service="supabase", outcome="ok")
+    client = get_supabase_client()
+    client.table("categories").select("name").execute()
+
+    assert EXTERNAL_CALL_SECONDS.count(service="supabase", outcome="ok") == before + 1
+    rendered = REGISTRY.render()
+    assert 'baystate_supabase_pool_connections{client="sync",state="idle"} 1' in rendered
+    assert 'baystate_supabase_requests_in_flight{client="sync"} 0' in rendered
+    assert 'baystate_supabase_pool_max_connections{client="sync"} 10' in rendered
+
+
+def test_timeouts_apply_and_count_as_errors(stub):
+    stub.delay = 1.0
+    provider = SupabaseProvider(stub.url, "test-key", PoolSettings(timeout=0.2))
+    before = EXTERNAL_CALL_SECONDS.count(service="supabase", outcome="error")
+
+    with pytest.raises(httpx.ReadTimeout):
+        provider.client().table("slow").select("*").execute()
+
+    assert EXTERNAL_CALL_SECONDS.count(service="supabase", outcome="error") == before + 1
+    assert provider.pool_stats()["sync"]["in_flight"] == 0
+    provider.close()
+
+
+def test_pool_size_bounds_concurrent_connections(stub):
+    stub.delay = 0.2
+    provider = SupabaseProvider(stub.url, "test-key", PoolSettings(max_connections=2))
+    client = provider.client()
+
+    threads = [
+        threading.Thread(target=lambda: client.table("slow").select("*").execute())
+        for _ in range(6)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert stub.requests == 6
+    assert len(stub.peers) == 2
+    provider.close()
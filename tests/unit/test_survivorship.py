@@ -0,0 +1,109 @@
+from datetime import datetime
+
+import polars as pl
+import pytest
+from baystate_consolidator.stages.survivorship import (
+    BatchSurvivorshipEngine,
+    FieldRule,
+    SOURCE_PRIORITY,
+)
+
+
+def _clustered():
+    return pl.DataFrame(
+        {
+            "unique_id": ["a_amazon", "a_chewy", "a_petco", "b_chewy"],
+            "cluster_id": ["a", "a", "a", "b"],
+            "sku": ["a", "a", "a", "b"],
+            "scraper_name": ["amazon", "chewy", "petco", "chewy"],
+            "scraped_at": [
+                "2024-01-01T00:00:00",
+                "2024-03-01T00:00:00",
+                "2024-02-01T00:00:00",
+                "2024-01-05T00:00:00",
+            ],
+            "name": ["Acana Puppy", "Acana Puppy Food", "Acana Puppy", None],
+            "description": ["Short", "A much longer description", None, None],
+            "price": [10.0, 12.0, None, 5.0],
+            "brand": ["acana", "acana", "acana", "kong"],
+            "images": [["1.jpg"], ["1.jpg", "2.jpg"], [], None],
+        }
+    )
+
+
+def test_resolves_every_cluster_in_one_pass():
+    resolved = BatchSurvivorshipEngine().resolve(_clustered())
+    a, b = resolved.to_dicts()
+
+    assert a["record_ids"] == ["a_amazon", "a_chewy", "a_petco"]
+    assert a["name"] == "Acana Puppy"  # most frequent
+    assert a["description"] == "A much longer description"  # longest
+    assert a["price"] == 12.0  # freshest non-null
+    assert a["images"] == ["1.jpg", "2.jpg"]
+    assert b["name"] == "Unknown Product"
+
+
+def test_lineage_comes_from_the_same_pass():
+    meta = BatchSurvivorshipEngine().resolve(_clustered())["consolidation_metadata"][0]
+    assert meta["name"]["source"] == "scraper:petco"  # freshest among the most frequent
+    assert meta["name"]["confidence"] == pytest.approx(2 / 3)
+    assert meta["price"]["source"] == "scraper:chewy"
+    assert meta["price"]["confidence"] == pytest.approx(0.5)
+    assert meta["price"]["timestamp"] == datetime(2024, 3, 1)
+
+
+def test_source_priority_rule():
+    engine = BatchSurvivorshipEngine(
+        field_rules={"price": FieldRule(SOURCE_PRIORITY, ["amazon", "chewy"])}
+    )
+    assert engine.resolve(_clustered())["price"].to_list() == [10.0, 5.0]
+
+    engine = BatchSurvivorshipEngine(
+        field_rules={"name": FieldRule(SOURCE_PRIORITY)}, source_priority=["chewy"]
+    )
+    assert engine.resolve(_clustered())["name"][0] == "Acana Puppy Food"
+
+
+def test_excel_price_overrides_price():
+    resolved = BatchSurvivorshipEngine().resolve(_clustered(), excel_prices={"b": 4.5})
+    assert resolved["price"].to_list() == [12.0, 4.5]
+    assert resolved["excel_price"].to_list() == [None, 4.5]
+    assert resolved["consolidation_metadata"][1]["price"]["source"] == "excel"
+
+
+def test_all_null_longest_fields():
+    clustered = pl.DataFrame(
+        {
+            "unique_id": ["a_amazon", "a_chewy"],
+            "cluster_id": ["a", "a"],
+            "name": ["Kong Toy", "Kong Toy"],
+            "description": [None, None],
+            "images": [None, None],
+        }
+    )
+    engine = BatchSurvivorshipEngine()
+    resolved = engine.resolve(clustered)
+
+    assert resolved["description"].to_list() == [None]
+    assert resolved.schema["images"] == pl.List(pl.String)
+    assert resolved["images"].to_list() == [None]
+    (record,) = engine.to_golden_records(resolved)
+    assert record.description is None and record.images == []
+
+
+def test_unknown_strategy_rejected():
+    with pytest.raises(ValueError):
+        BatchSurvivorshipEngine(field_rules={"name": FieldRule("random")})
+
+
+def test_golden_records_validated_at_the_boundary():
+    engine = BatchSurvivorshipEngine()
+    records = engine.to_golden_records(engine.resolve(_clustered(), excel_prices={"b": 4.5}))
+
+    assert [r.sku for r in records] == ["a", "b"]
+    assert records[0].consolidation_metadata["description"].source == "scraper:chewy"
+    assert records[1].price == 4.5
+    assert records[1].images == []
+    # Fields that never had a value carry no lineage
+    assert "name" not in records[1].consolidation_metadata
+    assert records[1].consolidation_metadata["price"].source == "excel"
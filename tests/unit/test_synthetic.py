@@ -0,0 +1,48 @@
+from baystate_consolidator.stages.normalize import normalize_records
+from baystate_consolidator.utils.database import DatabaseIngestor
+from baystate_consolidator.utils.synthetic import CatalogGenerator, generate_catalog
+
+
+def test_generates_exact_record_count_with_truth():
+    catalog = generate_catalog(1000, seed=3)
+    records = DatabaseIngestor.flatten_rows(catalog.rows)
+
+    assert catalog.num_records == len(records) == 1000
+    assert {record["unique_id"] for record in records} == set(catalog.truth)
+    assert all(row["pipeline_status"] == "scraped" for row in catalog.rows)
+    assert all(1 <= len(row["sources"]) <= 4 for row in catalog.rows)
+
+
+def test_same_seed_same_catalog():
+    assert generate_catalog(200, seed=7).rows == generate_catalog(200, seed=7).rows
+    assert generate_catalog(200, seed=7).rows != generate_catalog(200, seed=8).rows
+
+
+def test_duplicate_rate_controls_cross_sku_listings():
+    def listings_per_product(rate):
+        catalog = CatalogGenerator(duplicate_rate=rate, seed=1).generate(5000)
+        skus = {}
+        for unique_id, product in catalog.truth.items():
+            skus.setdefault(product, set()).add(unique_id.split("_")[0])
+        return sum(len(s) > 1 for s in skus.values()) / len(skus)
+
+    assert listings_per_product(0.0) == 0.0
+    assert 0.4 < listings_per_product(0.5) < 0.6
+
+
+def test_noise_free_catalog_normalizes_cleanly():
+    catalog = CatalogGenerator(noise=0.0, seed=2).generate(300)
+    normalized = normalize_records(DatabaseIngestor.flatten_rows(catalog.rows))
+
+    assert normalized["price"].null_count() == 0
+    assert normalized["weight"].null_count() == 0
+    assert normalized["weight"].str.ends_with(" lb").all()
+
+
+def test_noisy_catalog_varies_formats():
+    catalog = CatalogGenerator(noise=1.0, seed=2).generate(500)
+    sources = [source for row in catalog.rows for source in row["sources"].values()]
+
+    assert any(isinstance(source["price"], str) for source in sources)
+    assert any(source["weight"] and source["weight"].endswith("oz") for source in sources)
+    assert any(source["title"].isupper() for source in sources)
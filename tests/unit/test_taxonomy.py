@@ -0,0 +1,110 @@
+import pytest
+
+from baystate_consolidator.core.taxonomy import TaxonomyIndex, TaxonomyService
+
+CATEGORIES = ["Dog Food", "Cat Food", "Bird Seed", "Cat Litter", "Dog Toys"]
+
+
+class FakeTable:
+    def __init__(self, client, table):
+        self.client = client
+        self.table = table
+
+    def select(self, columns):
+        return self
+
+    def execute(self):
+        self.client.calls += 1
+        if self.client.fail:
+            raise ConnectionError("supabase down")
+        return type("Response", (), {"data": [{"name": n} for n in self.client.data[self.table]]})
+
+
+class FakeClient:
+    def __init__(self, data):
+        self.data = data
+        self.calls = 0
+        self.fail = False
+
+    def table(self, name):
+        return FakeTable(self, name)
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_exact_match_ignores_case_and_spacing():
+    index = TaxonomyIndex(CATEGORIES)
+    match = index.match("  dog   FOOD ")
+
+    assert match.category == "Dog Food"
+    assert match.exact and match.confidence == 1.0
+    assert "cat litter" in index
+
+
+def test_fuzzy_batch_assignment():
+    index = TaxonomyIndex(CATEGORIES)
+    matches = index.match_many(["dry dog food", "clumping cat litter", "wild bird seed", None])
+
+    assert [m.category for m in matches] == ["Dog Food", "Cat Litter", "Bird Seed", None]
+    assert all(0.3 <= m.confidence < 1.0 for m in matches[:3])
+    assert not any(m.exact for m in matches)
+
+
+def test_low_similarity_is_unassigned():
+    match = TaxonomyIndex(CATEGORIES).match("garden hose")
+
+    assert match.category is None
+    assert match.confidence < 0.3
+
+
+def test_similarity_matrix_shape_and_scale():
+    index = TaxonomyIndex(CATEGORIES)
+    scores = index.similarity(["Dog Food", "xyz"])
+
+    assert scores.shape == (2, len(CATEGORIES))
+    assert scores[0, 0] == pytest.approx(1.0, abs=1e-5)
+    assert not scores[1].any()
+
+
+def test_empty_index():
+    assert TaxonomyIndex([]).match("dog food").category is None
+
+
+def test_service_refreshes_after_ttl():
+    client = FakeClient({"categories": ["Dog Food"], "product_types": []})
+    clock = Clock()
+    service = TaxonomyService(client=client, ttl=60, clock=clock)
+
+    assert service.get_categories() == ["Dog Food"]
+    client.data["categories"] = ["Dog Food", "Cat Food"]
+    assert service.get_categories() == ["Dog Food"]
+    assert client.calls == 1
+
+    clock.now = 61
+    assert service.get_categories() == ["Dog Food", "Cat Food"]
+    assert client.calls == 2
+
+
+def test_service_keeps_stale_index_when_refresh_fails():
+    client = FakeClient({"categories": CATEGORIES, "product_types": []})
+    clock = Clock()
+    service = TaxonomyService(client=client, ttl=60, clock=clock)
+    service.get_categories()
+
+    client.fail = True
+    clock.now = 61
+    assert [m.category for m in service.assign_categories(["dry dog food"])] == ["Dog Food"]
+
+
+def test_validate_category_uses_closest_option():
+    service = TaxonomyService(client=FakeClient({}))
+
+    assert service.validate_category("cat food", CATEGORIES) == "Cat Food"
+    assert service.validate_category("dog toy", CATEGORIES) == "Dog Toys"
+    assert service.validate_category("garden hose", CATEGORIES) == "garden hose"
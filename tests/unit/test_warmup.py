@@ -0,0 +1,46 @@
+import subprocess
+import sys
+
+import pytest
+
+from baystate_consolidator.utils.warmup import WARMUPS, warm_up
+
+HEAVY_MODULES = ("openai", "supabase", "postgrest", "httpx", "quantulum3", "splink", "pyarrow")
+
+
+def _loaded_heavy_modules(module: str):
+    code = (
+        f"import sys, {module}; "
+        f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+    return [name for name in result.stdout.strip().split(",") if name]
+
+
+@pytest.mark.parametrize(
+    "module", ["baystate_consolidator.script_main", "baystate_consolidator.__main__"]
+)
+def test_entry_points_do_not_import_heavy_dependencies(module):
+    assert _loaded_heavy_modules(module) == []
+
+
+def test_warm_up_loads_heavy_dependencies():
+    timings = warm_up()
+
+    assert set(timings) == set(WARMUPS)
+    assert all(seconds >= 0 for seconds in timings.values())
+    assert "quantulum3" in sys.modules
+    assert "splink" in sys.modules
+
+
+def test_warm_up_failure_is_logged_not_raised(monkeypatch, caplog):
+    def broken():
+        raise RuntimeError("no data")
+
+    monkeypatch.setitem(WARMUPS, "weights", broken)
+    timings = warm_up(["weights"])
+
+    assert list(timings) == ["weights"]
+    assert "Warm-up of weights failed: no data" in caplog.text
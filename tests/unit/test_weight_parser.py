@@ -0,0 +1,95 @@
+import pytest
+from baystate_consolidator.normalizers.weight import (
+    WeightParser,
+    parse_weight_fast,
+    parse_weight_quantulum,
+)
+
+VALUES = ["5", "12", "2.5", "0.5", ".5", "1.50", "16.0", "1,000", "40"]
+UNITS = [
+    "lb",
+    "lbs",
+    "LB",
+    "Lbs.",
+    "pound",
+    "Pounds",
+    "POUNDS",
+    "oz",
+    "OZ",
+    "oz.",
+    "ounce",
+    "Ounces",
+    "kg",
+    "KG",
+    "Kg",
+    "kgs",
+    "kilograms",
+    "g",
+    "grams",
+    "Grams",
+    "ct",
+    "CT",
+    "count",
+]
+SEPARATORS = ["", " ", "-"]
+SUFFIXES = ["", " bag", " Bag", " BOX", " pouch"]
+
+
+def _corpus():
+    return [
+        value + sep + unit + suffix
+        for value in VALUES
+        for unit in UNITS
+        for sep in SEPARATORS
+        for suffix in SUFFIXES
+    ]
+
+
+def test_fast_path_matches_quantulum():
+    mismatches = []
+    for text in _corpus():
+        recognized, result = parse_weight_fast(text)
+        assert recognized, text
+        expected = parse_weight_quantulum(text)
+        if result != expected:
+            mismatches.append((text, result, expected))
+    assert mismatches == []
+
+
+@pytest.mark.parametrize("text", ["1/2 lb", "5 lb 8 oz", "2 x 5 lb", "12 fl oz", "500 G", "heavy"])
+def test_unusual_forms_fall_back(text):
+    recognized, _ = parse_weight_fast(text)
+    assert not recognized
+
+
+def test_lru_cache_and_stats():
+    weights = WeightParser(max_size=2)
+    assert weights.parse("5 lb") == "5.0 lb"
+    assert weights.parse("5 lb") == "5.0 lb"
+    assert weights.parse("1/2 lb") == "0.5 lb"
+    assert weights.parse("12 oz") == "12.0 oz"
+    assert weights.parse(None) is None
+    assert weights.parse(5) is None and weights.parse(5.0) is None
+
+    stats = weights.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 3
+    assert stats["fast_path"] == 2
+    assert stats["fallbacks"] == 1
+    assert stats["size"] == 2
+
+
+def test_disk_cache_shared_across_parsers(tmp_path):
+    path = str(tmp_path / "weights.sqlite")
+    first = WeightParser(disk_cache_path=path)
+    assert first.parse("1/2 lb") == "0.5 lb"
+    assert first.parse("heavy object") is None
+    first.close()
+
+    second = WeightParser(disk_cache_path=path)
+    assert second.parse("1/2 lb") == "0.5 lb"
+    assert second.parse("heavy object") is None
+    stats = second.stats()
+    assert stats["disk_hits"] == 2
+    assert stats["fallbacks"] == 0
+    second.close()